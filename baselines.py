@@ -0,0 +1,117 @@
+import numpy as np
+
+# A bincount is used while the span of the bins is at most this many
+# times the number of voltages; wider spans are counted with np.unique
+SPAN_FACTOR = 4
+
+
+def quantize(voltage, decimals=1):
+    """ Rounds voltages to integer bins
+
+    Args:
+        voltage: voltage array
+        decimals: number of decimals to round to, 1 for 0.1 V bins
+
+    Returns:
+        bins: int64 array of rounded voltages times 10 ** decimals,
+        with NaN, infinite and out of range voltages left out
+    """
+    scaled = np.asarray(voltage, dtype=float) * 10 ** decimals
+    scaled = np.rint(scaled, out=scaled)
+    valid = np.abs(scaled) < 2.0 ** 62
+    if not valid.all():
+        scaled = scaled[valid]
+    return scaled.astype(np.int64)
+
+
+def modal_baseline(voltage, decimals=1):
+    """ Most common voltage after rounding, found with one bincount
+
+    Ties go to the lowest voltage. When outliers spread the bins much
+    wider than the number of voltages, the bins are counted with
+    np.unique instead, so memory stays proportional to the recording.
+
+    Args:
+        voltage: voltage array
+        decimals: number of decimals to round to
+
+    Returns:
+        baseline: modal voltage, or NaN if there are no voltages
+    """
+    bins = quantize(voltage, decimals)
+    if len(bins) == 0:
+        return float('nan')
+    low = bins.min()
+    if bins.max() - low <= SPAN_FACTOR * len(bins):
+        mode = np.argmax(np.bincount(bins - low)) + low
+    else:
+        values, counts = np.unique(bins, return_counts=True)
+        mode = values[np.argmax(counts)]
+    return float(mode / 10.0 ** decimals)
+
+
+def median_baseline(voltage):
+    """ Median voltage, robust to spikes and not tied to a bin size
+
+    Args:
+        voltage: voltage array
+
+    Returns:
+        baseline: median voltage ignoring NaN
+    """
+    return float(np.nanmedian(np.asarray(voltage, dtype=float)))
+
+
+def rolling_baseline(voltage, window=1000):
+    """ Baseline that follows a drifting signal
+
+    The median of each block of window samples is taken and linearly
+    interpolated between block centers, so the cost stays linear in
+    the length of the recording.
+
+    Args:
+        voltage: voltage array
+        window: number of samples per block
+
+    Returns:
+        baseline: array with a baseline voltage for every sample
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    n = len(voltage)
+    if n <= window:
+        return np.full(n, median_baseline(voltage))
+    n_blocks = -(-n // window)
+    blocks = np.full(n_blocks * window, np.nan)
+    blocks[:n] = voltage
+    medians = np.nanmedian(blocks.reshape(n_blocks, window), axis=1)
+    centers = np.arange(n_blocks) * window + (window - 1) / 2.0
+    centers[-1] = (centers[-1] - (window - 1) / 2.0 + n - 1) / 2.0
+    return np.interp(np.arange(n), centers, medians)
+
+
+METHODS = {
+    'mode': modal_baseline,
+    'median': median_baseline,
+    'rolling': rolling_baseline,
+}
+
+
+def estimate(voltage, method='mode', **options):
+    """ Baseline of a recording
+
+    Callers estimate the baseline once per recording and pass it on,
+    as analyze_data does for check_loop and search_cutoff.
+
+    Args:
+        voltage: voltage array
+        method: 'mode', 'median' or 'rolling'
+        options: extra arguments of the chosen estimator, e.g. window
+
+    Returns:
+        baseline: baseline voltage; for 'rolling' an array with one
+        value per sample
+    """
+    if method not in METHODS:
+        raise ValueError('Unknown baseline method ' + str(method) +
+                         ', choose from ' + ', '.join(sorted(METHODS)))
+    return METHODS[method](voltage, **options)
@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import logging
+import contextlib
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import cache
+import memo
+import instrument
+import output
+from main import analyze_data
+from main import analyze_file
+from main import file_number_of
+from main import write_excel
+
+
+def list_csv(directory):
+    """ Lists the csv files of a directory in a fixed order
+
+    Args:
+        directory: folder holding the csv files
+
+    Returns:
+        files: sorted list of csv file paths
+    """
+    files = list()
+    for file in sorted(os.listdir(directory)):
+        if os.path.splitext(file)[1] == '.csv':
+            files.append(os.path.join(directory, file))
+    return files
+
+
+class _LogStream(object):
+    """ Stand in for stdout that logs each printed line at info level """
+
+    def write(self, text):
+        for line in text.splitlines():
+            if line.strip():
+                logging.info(line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def run_file(file, user_interval, space, cache_dir=None,
+             filter_value=0.005, plot_dir=None, timing=False,
+             detector='hilbert', quiet=False):
+    """ Runs analyze_file and catches any error it raises
+
+    Plots are not drawn here. They are decimated and handed back, for
+    run_batch to render in the background while files are analysed.
+
+    Args:
+        file: name of csv file
+        user_interval: window in seconds over which to take the
+        average bpm
+        space: ensuring this distance between peaks
+        cache_dir: folder of the parsed recording cache, or None to
+        always parse the csv
+        filter_value: cutoff frequency for butterworth filter
+        plot_dir: folder to save a png plot of the file to, or None
+        timing: True to time each stage of the file
+        detector: name of the detector in detectors.DETECTORS
+        quiet: True to log what the analysis prints, such as the
+        window and the metrics, instead of printing it to stdout
+
+    Returns:
+        file: name of csv file
+        metrics: dictionary requested by assignment, or None
+        error: description of the error raised, or None
+        timings: stage timings of the file for Recorder.merge, or None
+        plots: list of plots for render.PlotRenderer.submit
+    """
+    print_plot = int(bool(plot_dir))
+    plots = None
+    if plot_dir:
+        import render
+        plots = render.PlotJobs()
+    recorder = None
+    if timing:
+        recorder = instrument.enable()
+    stream = _LogStream() if quiet else sys.stdout
+    try:
+        with contextlib.redirect_stdout(stream):
+            if cache_dir:
+                instrument.begin(file)
+                with instrument.timer('read'):
+                    time, voltage = cache.load_recording(file, cache_dir)
+                data = pd.DataFrame({'time': time, 'voltage': voltage})
+                metrics = analyze_data(data, file, user_interval, space,
+                                       print_plot, filter_value, plot_dir,
+                                       plots, detector=detector)
+            else:
+                metrics = analyze_file(file, user_interval, space, print_plot,
+                                       filter_value, plot_dir, plots,
+                                       detector=detector)
+            error = None
+    except Exception as e:
+        metrics = None
+        error = type(e).__name__ + ': ' + str(e)
+    jobs = plots.jobs if plots else list()
+    if timing:
+        instrument.disable()
+        return file, metrics, error, recorder.files, jobs
+    return file, metrics, error, None, jobs
+
+
+def excel_rows(files, results):
+    """ Collects the excel sheet rows of the analysed files
+
+    Args:
+        files: csv files in the order they should be written
+        results: dictionary of file to metrics
+
+    Returns:
+        file_number: list of test_data numbers
+        export_excel: list of detected beat counts
+    """
+    export_excel = list()
+    file_number = list()
+    for file in files:
+        if file in results:
+            try:
+                numb = file_number_of(file)
+            except IndexError:
+                continue
+            export_excel.append(results[file]['num_beats'])
+            file_number.append(numb)
+    return file_number, export_excel
+
+
+def run_batch(directory='data', workers=None, user_interval=(2, 3),
+              space=1, excel_file_name='Beat_Tracking.xlsx', cache_dir=None,
+              filter_value=0.005, incremental=False, plot_dir=None,
+              recorder=None, detector='hilbert', output_file=None,
+              files=None, output_dir=None, chunksize=1, quiet=False):
+    """ Processes every csv file of a directory with a process pool
+
+    Files are spread across the pool, chunksize files per task, and
+    analysed independently. The
+    json files and the excel sheet are written afterwards in sorted
+    file order, so the output does not depend on which worker
+    finished first. A file that fails is reported and skipped. A plot
+    that fails to render is reported under its file too, but the
+    file's metrics are kept and the rest of the batch still runs.
+
+    In incremental mode a manifest in the directory remembers the hash
+    of every csv, the parameters it was processed with and the output
+    it was written to. Files whose json output is still current are
+    read back instead of analysed, and the excel sheet is rebuilt from
+    all files. With output_file, the metrics are read back from the
+    previous output_file and written to the new one along with the
+    newly analysed files. The manifest is saved once the output is
+    closed.
+
+    Args:
+        directory: folder holding the csv files and the excel sheet
+        workers: number of worker processes; all cores when None
+        user_interval: window in seconds over which to take the
+        average bpm
+        space: ensuring this distance between peaks
+        excel_file_name: name of the excel sheet in directory, or
+        None to skip it
+        cache_dir: folder of the parsed recording cache, or None to
+        always parse the csv files
+        filter_value: cutoff frequency for butterworth filter
+        incremental: True to skip files whose json output is current
+        plot_dir: folder to save a png plot of every analysed file to,
+        or None for no plots; plots are drawn by a render.PlotRenderer
+        process while the pool works on later files
+        recorder: instrument.Recorder to collect stage timings of every
+        file and of the batch in, or None for no timing
+        detector: name of the detector in detectors.DETECTORS
+        output_file: name of one NDJSON file, gzip compressed if it
+        ends in .gz, to write the metrics of every file to instead of
+        a json file per csv, or None
+        files: csv files to process instead of every csv file in
+        directory, or None
+        output_dir: folder for the json file of each csv; next to the
+        csv when None
+        chunksize: number of files handed to a worker at once; larger
+        chunks cut the overhead of many small files
+        quiet: True for the workers to log what the analysis prints
+        instead of printing it to stdout
+
+    Returns:
+        results: dictionary of file to metrics for the files that
+        were analysed or reused
+        errors: dictionary of file to error message for the files
+        that failed
+    """
+    if files is None:
+        files = list_csv(directory)
+    results = dict()
+    errors = dict()
+    if plot_dir and not os.path.isdir(plot_dir):
+        os.makedirs(plot_dir)
+    params = {'user_interval': list(user_interval), 'space': space,
+              'filter_value': filter_value, 'detector': detector}
+    manifest = dict()
+    todo = files
+    if incremental:
+        manifest = memo.load_manifest(directory)
+        written = None
+        if output_file and os.path.isfile(output_file):
+            try:
+                written = output.read_ndjson(output_file)
+            except (ValueError, EOFError) as e:
+                logging.warning(output_file + ' is unreadable, its files '
+                                'are analysed again: ' + str(e))
+        todo = list()
+        for file in files:
+            if not memo.is_current(file, params, manifest, output_dir,
+                                   output_file, written, directory):
+                todo.append(file)
+            elif output_file:
+                results[file] = written[file]
+            else:
+                with open(output.json_name(file, output_dir)) as infile:
+                    results[file] = json.load(infile)
+    with instrument.recording(recorder), \
+            output.MetricsWriter(output_file, output_dir) as writer:
+        if output_file:
+            for file in results:
+                writer.write(file, results[file])
+        if todo:
+            renderer = None
+            if plot_dir:
+                import render
+                renderer = render.PlotRenderer()
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    outcomes = pool.map(
+                        run_file, todo, repeat(user_interval),
+                        repeat(space), repeat(cache_dir),
+                        repeat(filter_value), repeat(plot_dir),
+                        repeat(recorder is not None), repeat(detector),
+                        repeat(quiet), chunksize=chunksize)
+                    for file, metrics, error, timings, plots in outcomes:
+                        if timings:
+                            recorder.merge(timings)
+                        for plot in plots:
+                            renderer.submit(*plot)
+                        if error is None:
+                            results[file] = metrics
+                            with instrument.timer('json', file):
+                                writer.write(file, metrics)
+                            if incremental:
+                                memo.record(file, params, manifest,
+                                            output_dir, output_file,
+                                            directory)
+                        else:
+                            errors[file] = error
+                            logging.warning(file + ' failed: ' + error)
+            finally:
+                if renderer is not None:
+                    with instrument.timer('plot_wait', instrument.BATCH):
+                        renderer.close()
+                    for file, error in renderer.errors.items():
+                        errors[file] = error
+                        logging.warning(file + ' plot failed: ' + error)
+        file_number, export_excel = excel_rows(files, results)
+        if excel_file_name:
+            write_excel(file_number, export_excel,
+                        os.path.join(directory, excel_file_name))
+    if incremental:
+        memo.save_manifest(directory, manifest)
+    return results, errors
+
+
+if __name__ == "__main__":
+    run_batch()
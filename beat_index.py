@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class BeatIndex(object):
+    """ Sorted beat times answering window queries by binary search
+
+    The index is built once per recording. Every query then costs
+    O(log n) per window through np.searchsorted, so many windows of the
+    same recording can be asked for at once.
+
+    Args:
+        beat_times: times of detected beats in seconds
+    """
+
+    def __init__(self, beat_times):
+        self.times = np.sort(np.asarray(beat_times, dtype=float))
+
+    def __len__(self):
+        return len(self.times)
+
+    def count(self, start, end):
+        """ Number of beats strictly inside one or more windows
+
+        Args:
+            start: start of each window in seconds, scalar or array
+            end: end of each window in seconds, scalar or array
+
+        Returns:
+            count: number of beats with start < time < end, an int for
+            scalar windows and an array otherwise
+        """
+        count = np.searchsorted(self.times, end, side='left') - \
+            np.searchsorted(self.times, start, side='right')
+        count = np.maximum(count, 0)
+        if np.ndim(count) == 0:
+            return int(count)
+        return count
+
+    def bpm(self, start, end):
+        """ Average heart rate over one or more windows
+
+        Args:
+            start: start of each window in seconds, scalar or array
+            end: end of each window in seconds, scalar or array
+
+        Returns:
+            bpm: beats per minute inside each window, a float for scalar
+            windows and an array otherwise
+        """
+        width = np.asarray(end, dtype=float) - np.asarray(start, dtype=float)
+        bpm = np.asarray(self.count(start, end), dtype=float) / width * 60
+        if np.ndim(bpm) == 0:
+            return float(bpm)
+        return bpm
+
+    def sliding_bpm(self, window, step, start=0.0, stop=None):
+        """ Heart rate over windows sliding along the recording
+
+        Args:
+            window: width of each window in seconds
+            step: time in seconds between the starts of windows
+            start: start of the first window in seconds
+            stop: no window ends after this time; the last beat when
+            None
+
+        Returns:
+            starts: start of each window in seconds
+            bpm: beats per minute inside each window
+        """
+        if stop is None:
+            stop = self.times[-1] if len(self.times) else start
+        n_windows = int(np.floor((stop - start - window) / step + 1e-9)) + 1
+        starts = start + step * np.arange(max(n_windows, 0))
+        return starts, self.bpm(starts, starts + window)
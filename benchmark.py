@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import timeit
+import logging
+import contextlib
+import numpy as np
+import pandas as pd
+import main
+import detectors
+import instrument
+
+# Timed stages that each run over the whole recording once
+PASS_STAGES = ('envelope', 'detect', 'check_loop_retry')
+
+
+def synthetic_ecg(n_samples, fs=250.0, bpm=72.0, noise=0.02, seed=0):
+    """ Generates an ECG-like recording with a known heart rate
+
+    Each beat is a narrow gaussian R wave followed by a wider T wave on
+    a -0.25 V baseline, with gaussian noise added.
+
+    Args:
+        n_samples: number of samples
+        fs: sample rate in Hz
+        bpm: heart rate of the recording
+        noise: standard deviation of the added noise in volts
+        seed: seed of the noise generator
+
+    Returns:
+        data: data frame with time and voltage columns
+    """
+    time = np.arange(n_samples) / float(fs)
+    period = 60.0 / bpm
+    phase = np.mod(time, period) - period / 4
+    voltage = 1.5 * np.exp(-(phase / 0.012) ** 2) + \
+        0.3 * np.exp(-((phase - 0.25) / 0.05) ** 2) - 0.25
+    rng = np.random.RandomState(seed)
+    voltage += noise * rng.standard_normal(n_samples)
+    data = pd.DataFrame({'time': time, 'voltage': voltage},
+                        columns=['time', 'voltage'])
+    return data
+
+
+def time_call(function, repeat=3):
+    """ Best wall time of a function over a few runs
+
+    Args:
+        function: function taking no arguments
+        repeat: number of runs
+
+    Returns:
+        seconds: the fastest run in seconds
+    """
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        seconds = min(timeit.repeat(function, repeat=repeat, number=1))
+    return seconds
+
+
+def count_passes(file, detector='hilbert'):
+    """ Counts the passes a detector makes over a recording
+
+    The envelope, the first detection and every check_loop retry each
+    filter or search the whole recording once.
+
+    Args:
+        file: name of csv file
+        detector: 'hilbert' or the name of a detector in
+        detectors.DETECTORS
+
+    Returns:
+        passes: number of passes over the recording
+    """
+    recorder = instrument.Recorder()
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull), \
+            instrument.recording(recorder):
+        main.analyze_file(file, (2, 3), 1, 0, detector=detector)
+    totals = recorder.file_totals(file)
+    return sum(totals[stage]['count'] for stage in PASS_STAGES
+               if stage in totals)
+
+
+def bench_passes(n_samples, fs=250.0, workdir=None):
+    """ Counts the passes of each detector on one synthetic recording
+
+    Args:
+        n_samples: number of samples in the recording
+        fs: sample rate in Hz
+        workdir: folder for the csv file, a temporary folder when None
+
+    Returns:
+        passes: dictionary of detector name to number of passes
+    """
+    own = workdir is None
+    if own:
+        workdir = tempfile.mkdtemp()
+    try:
+        file = os.path.join(workdir, 'bench_passes.csv')
+        synthetic_ecg(n_samples, fs).to_csv(file, header=False,
+                                            index=False)
+        passes = {detector: count_passes(file, detector)
+                  for detector in ['hilbert', 'pan_tompkins']}
+    finally:
+        if own:
+            shutil.rmtree(workdir)
+    return passes
+
+
+def bench_stages(n_samples, fs=250.0, repeat=3, workdir=None):
+    """ Times every stage of the pipeline on one synthetic recording
+
+    Args:
+        n_samples: number of samples in the recording
+        fs: sample rate in Hz
+        repeat: number of runs per stage; the fastest is kept
+        workdir: folder for the csv and excel files, a temporary
+        folder when None
+
+    Returns:
+        stages: dictionary of stage name to seconds
+    """
+    own = workdir is None
+    if own:
+        workdir = tempfile.mkdtemp()
+    try:
+        data = synthetic_ecg(n_samples, fs)
+        file = os.path.join(workdir, 'bench_data1.csv')
+        data.to_csv(file, header=False, index=False)
+        excel_file_name = os.path.join(workdir, 'Beat_Tracking.xlsx')
+        shutil.copy(os.path.join(os.path.dirname(__file__),
+                                 'Beat_Tracking_master.xlsx'),
+                    excel_file_name)
+        raw = pd.read_csv(file, names=['time', 'voltage'])
+        valid = main.is_data_valid(raw)
+        avg_v = np.sum(valid['voltage'].values) / len(valid['voltage'])
+        padded = main.edge_case(valid, 150, avg_v)
+        filtered = main.Hilbert(padded, 0.005)
+        found = main.peak_detector(filtered, padded)
+        extreme = main.calc_v_extreme(valid)
+        file_number = [str(x) for x in range(1, 33)]
+        export_excel = [len(found)] * len(file_number)
+        stages = dict()
+        stages['read'] = time_call(
+            lambda: pd.read_csv(file, names=['time', 'voltage']), repeat)
+        stages['is_data_valid'] = time_call(
+            lambda: main.is_data_valid(raw), repeat)
+        stages['edge_case'] = time_call(
+            lambda: main.edge_case(valid, 150, avg_v), repeat)
+        stages['Hilbert'] = time_call(
+            lambda: main.Hilbert(padded, 0.005), repeat)
+        stages['peak_detector'] = time_call(
+            lambda: main.peak_detector(filtered, padded), repeat)
+        stages['check_loop'] = time_call(
+            lambda: main.check_loop(found, padded, 0.005, file, 1, 0,
+                                    extreme), repeat)
+        stages['write_excel'] = time_call(
+            lambda: main.write_excel(file_number, export_excel,
+                                     excel_file_name), repeat)
+        stages['main'] = time_call(
+            lambda: main.analyze_file(file, (2, 3), 1, 0), repeat)
+        stages['pan_tompkins'] = time_call(
+            lambda: detectors.pan_tompkins(padded['time'].values,
+                                           padded['voltage'].values),
+            repeat)
+        stages['main_pan_tompkins'] = time_call(
+            lambda: main.analyze_file(file, (2, 3), 1, 0,
+                                      detector='pan_tompkins'), repeat)
+    finally:
+        if own:
+            shutil.rmtree(workdir)
+    return stages
+
+
+def compare(results, baseline, tolerance=0.5, min_delta=0.005):
+    """ Finds stages that got slower than a stored baseline
+
+    Args:
+        results: benchmark results from run_benchmark
+        baseline: earlier results to compare against
+        tolerance: allowed relative slowdown, 0.5 being 50 percent
+        min_delta: slowdowns smaller than this many seconds are
+        treated as noise
+
+    Returns:
+        regressions: list of tuples of length, stage, baseline
+        seconds, and new seconds
+    """
+    regressions = list()
+    for length, stages in sorted(results['runs'].items()):
+        old_stages = baseline['runs'].get(length, dict())
+        for stage, seconds in sorted(stages.items()):
+            if stage not in old_stages:
+                continue
+            old = old_stages[stage]
+            if seconds > old * (1 + tolerance) and \
+                    seconds - old > min_delta:
+                regressions.append((length, stage, old, seconds))
+    return regressions
+
+
+def run_benchmark(lengths=(10000, 100000, 1000000), fs=250.0, repeat=3,
+                  output='benchmark.json', baseline=None, tolerance=0.5,
+                  min_delta=0.005):
+    """ Benchmarks the pipeline at several recording lengths
+
+    Args:
+        lengths: numbers of samples to benchmark
+        fs: sample rate in Hz
+        repeat: number of runs per stage; the fastest is kept
+        output: name of the json file to write the results to, or None
+        baseline: name of a json file of earlier results to check for
+        regressions, or None
+        tolerance: allowed relative slowdown against the baseline
+        min_delta: slowdowns smaller than this many seconds are
+        treated as noise
+
+    Returns:
+        results: dictionary with the sample rate, the seconds taken
+        by each stage for each length, and the passes each detector
+        made over the recording for each length
+        regressions: list of tuples of length, stage, baseline
+        seconds, and new seconds
+    """
+    results = {'fs': fs, 'repeat': repeat, 'runs': dict(),
+               'passes': dict()}
+    for n_samples in lengths:
+        logging.info('Benchmarking ' + str(n_samples) + ' samples')
+        results['runs'][str(n_samples)] = bench_stages(n_samples, fs,
+                                                       repeat)
+        results['passes'][str(n_samples)] = bench_passes(n_samples, fs)
+    regressions = list()
+    if baseline:
+        with open(baseline) as infile:
+            regressions = compare(results, json.load(infile), tolerance,
+                                  min_delta)
+        for length, stage, old, seconds in regressions:
+            logging.warning(stage + ' at ' + length + ' samples took ' +
+                            str(seconds) + ' s (baseline ' + str(old) +
+                            ' s)')
+    if output:
+        with open(output, 'w') as outfile:
+            json.dump(results, outfile, indent=2, sort_keys=True)
+    return results, regressions
+
+
+if __name__ == "__main__":
+    lengths = [int(x) for x in sys.argv[1:]] or [10000, 100000, 1000000]
+    baseline = None
+    if os.path.isfile('benchmark_baseline.json'):
+        baseline = 'benchmark_baseline.json'
+    results, regressions = run_benchmark(lengths, baseline=baseline)
+    for length, stages in sorted(results['runs'].items(),
+                                 key=lambda x: int(x[0])):
+        print(length + ' samples')
+        for stage, seconds in sorted(stages.items(), key=lambda x: x[1]):
+            print('    {:<15}{:10.4f} s'.format(stage, seconds))
+        for detector, passes in sorted(results['passes'][length].items()):
+            print('    {:<15}{:10d} passes'.format(detector, passes))
+    if regressions:
+        sys.exit(1)
@@ -0,0 +1,122 @@
+import os
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from main import validate_columns
+
+
+def cache_key(file):
+    """ Cache key of a csv file from its path, mtime and size
+
+    Args:
+        file: name of csv file
+
+    Returns:
+        prefix: part of the key that only depends on the path
+        key: full key, which changes whenever the file is modified
+    """
+    stat = os.stat(file)
+    path = os.path.abspath(file).encode('utf-8')
+    prefix = hashlib.sha1(path).hexdigest()[:16]
+    key = prefix + '-' + str(stat.st_mtime_ns) + '-' + str(stat.st_size)
+    return prefix, key
+
+
+def load_recording(file, cache_dir='.hrm_cache', max_bytes=2 ** 30):
+    """ Loads a validated recording, parsing the csv only when needed
+
+    Validated recordings are stored as 2 x n float64 .npy files and
+    memory-mapped read only on later calls. Entries are keyed by the
+    path, mtime and size of the csv, so an edited csv is parsed again
+    and its old entry removed. When the cache grows past max_bytes the
+    least recently used entries are deleted. Worker processes may
+    share the folder, so an entry another worker deletes while it is
+    being read counts as a miss.
+
+    Args:
+        file: name of csv file
+        cache_dir: folder holding the cached arrays
+        max_bytes: size cap of the cache folder in bytes
+
+    Returns:
+        time: float64 array of valid times
+        voltage: float64 array of valid voltages
+    """
+    prefix, key = cache_key(file)
+    path = os.path.join(cache_dir, key + '.npy')
+    try:
+        os.utime(path, None)
+        recording = np.load(path, mmap_mode='r')
+        return recording[0], recording[1]
+    except FileNotFoundError:
+        pass
+    headers = ['time', 'voltage']
+    data = pd.read_csv(file, names=headers)
+    time, voltage, report = validate_columns(data)
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    for entry in os.listdir(cache_dir):
+        if entry.startswith(prefix + '-') and not entry.endswith('.tmp.npy'):
+            remove(os.path.join(cache_dir, entry))
+    temp = os.path.join(cache_dir, key + '.' + str(os.getpid()) + '.tmp.npy')
+    recording = np.vstack((time, voltage))
+    np.save(temp, recording)
+    os.replace(temp, path)
+    evict(cache_dir, max_bytes, keep=path)
+    try:
+        recording = np.load(path, mmap_mode='r')
+    except FileNotFoundError:
+        # Evicted by another worker already; use the parsed copy
+        pass
+    return recording[0], recording[1]
+
+
+def remove(path):
+    """ Deletes a cache entry that another worker may have deleted
+
+    Args:
+        path: cache entry to delete
+
+    Returns:
+        removed: True if this call deleted it
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def evict(cache_dir, max_bytes, keep=None):
+    """ Deletes least recently used entries until the cache fits
+
+    Args:
+        cache_dir: folder holding the cached arrays
+        max_bytes: size cap of the cache folder in bytes
+        keep: entry that must not be deleted, or None
+
+    Returns:
+        removed: list of deleted entries
+    """
+    entries = list()
+    for entry in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, entry)
+        if entry.endswith('.npy') and not entry.endswith('.tmp.npy'):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+    total = sum(entry[2] for entry in entries)
+    removed = list()
+    for mtime, path, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        total -= size
+        if remove(path):
+            removed.append(path)
+            logging.info('Evicted ' + path + ' from cache')
+    return removed
@@ -0,0 +1,186 @@
+import os
+import sys
+import glob
+import argparse
+
+
+def expand(patterns):
+    """ Finds the csv files matched by glob patterns
+
+    Args:
+        patterns: file names, folders or glob patterns; a folder means
+        every csv file in it and ** matches any number of folders
+
+    Returns:
+        files: sorted list of matching csv files, each listed once
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*.csv')
+        for file in glob.glob(pattern, recursive=True):
+            if os.path.isfile(file) and \
+                    os.path.splitext(file)[1] == '.csv':
+                files.add(file)
+    return sorted(files)
+
+
+def clashes(files):
+    """ Finds csv files whose outputs would share a name
+
+    json files and plots are named after the csv file without its
+    folder, so data/a/x.csv and data/b/x.csv would overwrite each
+    other in one output folder.
+
+    Args:
+        files: names of csv files
+
+    Returns:
+        clashes: dictionary of output name, without extension, to the
+        sorted csv files sharing it, for names used more than once
+    """
+    names = dict()
+    for file in files:
+        name = os.path.splitext(os.path.basename(file))[0]
+        names.setdefault(name, list()).append(file)
+    return {name: sorted(same) for name, same in names.items()
+            if len(same) > 1}
+
+
+def build_parser():
+    """ Command line options of the batch tool
+
+    Returns:
+        parser: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description='Detects heart beats in ECG csv files and writes '
+                    'the metrics of each file as json.',
+        epilog='Every csv file is read into memory whole. Recordings too '
+               'long for that can only be streamed in chunks from Python, '
+               'with streaming.stream_peaks; this tool has no streaming '
+               'mode.')
+    parser.add_argument('inputs', nargs='+', metavar='INPUT',
+                        help='csv files, folders or glob patterns such as '
+                             '"data/**/*.csv"')
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help='folder for json files, plots and the timing '
+                             'report; next to each csv by default')
+    parser.add_argument('--ndjson', default=None, metavar='NAME',
+                        help='write every file to one NDJSON file of this '
+                             'name in the output folder instead, gzip '
+                             'compressed if it ends in .gz')
+    parser.add_argument('-w', '--window', nargs=2, type=float,
+                        default=(2.0, 3.0), metavar=('START', 'END'),
+                        help='window in seconds over which to average the '
+                             'bpm (default: 2 3)')
+    parser.add_argument('-c', '--cutoff', type=float, default=0.005,
+                        help='normalized cutoff of the envelope low pass '
+                             'filter (default: 0.005)')
+    parser.add_argument('-d', '--detector', default='hilbert',
+                        help='registered beat detector, e.g. hilbert or '
+                             'pan_tompkins (default: hilbert)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    parser.add_argument('--files-per-task', type=int, default=1,
+                        help='files handed to a worker process at once '
+                             '(default: 1)')
+    parser.add_argument('--cache-dir', default=None,
+                        help='folder to cache parsed recordings in')
+    parser.add_argument('--plots', action='store_true',
+                        help='save a png plot of every file to a plots '
+                             'folder')
+    parser.add_argument('--excel', default=None, metavar='FILE',
+                        help='excel sheet to record the beat counts in')
+    parser.add_argument('--timing', action='store_true',
+                        help='print the time spent in each stage and save '
+                             'it as timing.json')
+    return parser
+
+
+def timing_report(totals):
+    """ Table of stage timings, slowest stage first
+
+    Args:
+        totals: dictionary of stage to count and seconds, as from
+        instrument.Recorder.batch_totals
+
+    Returns:
+        text: one line per stage with its calls and seconds
+    """
+    lines = ['{:<18}{:>8}{:>12}'.format('stage', 'calls', 'seconds')]
+    for stage, entry in sorted(totals.items(),
+                               key=lambda x: -x[1]['seconds']):
+        lines.append('{:<18}{:>8}{:>12.3f}'.format(
+            stage, entry['count'], entry['seconds']))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """ Runs the batch tool
+
+    Only the modules needed by the chosen options are imported, so
+    matplotlib is loaded only with --plots and openpyxl only with
+    --excel.
+
+    Args:
+        argv: command line arguments; sys.argv[1:] when None
+
+    Returns:
+        status: 0 if every file was analysed, 1 if any failed
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    files = expand(args.inputs)
+    if not files:
+        parser.error('no csv files match ' + ' '.join(args.inputs))
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.files_per_task < 1:
+        parser.error('--files-per-task must be at least 1')
+    if args.excel and not os.path.isfile(args.excel):
+        parser.error('excel sheet ' + args.excel + ' does not exist')
+    if (args.output_dir and not args.ndjson) or args.plots:
+        same = clashes(files)
+        if same:
+            parser.error('files with the same name would overwrite each '
+                         'other\'s output: ' + '; '.join(
+                             ', '.join(x) for x in sorted(same.values())) +
+                         '. Run them separately or use --ndjson without '
+                         '--plots.')
+    import detectors
+    try:
+        detectors.get(args.detector)
+    except ValueError as e:
+        parser.error(str(e))
+    import batch
+    import instrument
+    output_dir = args.output_dir
+    if output_dir and not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    base = output_dir or os.getcwd()
+    plot_dir = os.path.join(base, 'plots') if args.plots else None
+    output_file = os.path.join(base, args.ndjson) if args.ndjson else None
+    recorder = instrument.Recorder() if args.timing else None
+    results, errors = batch.run_batch(
+        base, args.workers, tuple(args.window), 1, None, args.cache_dir,
+        args.cutoff, plot_dir=plot_dir, recorder=recorder,
+        detector=args.detector, output_file=output_file, files=files,
+        output_dir=output_dir, chunksize=args.files_per_task, quiet=True)
+    if args.excel:
+        from main import write_excel
+        with instrument.recording(recorder):
+            write_excel(*batch.excel_rows(files, results), args.excel)
+    print('Analysed ' + str(len(results)) + ' of ' + str(len(files)) +
+          ' files')
+    for file in sorted(errors):
+        print(file + ': ' + errors[file], file=sys.stderr)
+    if recorder is not None:
+        recorder.to_json(os.path.join(base, 'timing.json'))
+        print(timing_report(recorder.batch_totals()))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
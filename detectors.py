@@ -0,0 +1,268 @@
+from collections import deque
+import numpy as np
+from scipy.signal import find_peaks
+import filters
+import instrument
+
+# Detector name to function. Every detector is called as
+# detector(time, voltage, fs, **options) with the time and voltage
+# arrays of a recording padded at both ends by main.pad_recording, as
+# main.analyze_data passes them, and returns the indices, times and
+# values of the beats it found. Options are the settings of
+# analyze_data, such as cutoff and space, which a detector may use or
+# ignore; a traces dictionary among them collects signals to plot.
+# Detectors time their own stages with instrument.timer.
+DETECTORS = dict()
+
+
+def register(name):
+    """ Adds a detector function to the registry under a name
+
+    Args:
+        name: name the detector is selected by
+
+    Returns:
+        decorator: function that registers and returns its argument
+    """
+    def decorator(function):
+        DETECTORS[name] = function
+        return function
+    return decorator
+
+
+def get(name):
+    """ Looks up a registered detector
+
+    Args:
+        name: name of the detector
+
+    Returns:
+        detector: function of padded time and voltage returning
+        indices, times and values of beats
+    """
+    if name not in DETECTORS:
+        raise ValueError('Unknown detector ' + str(name) + ', choose from ' +
+                         ', '.join(sorted(DETECTORS)))
+    return DETECTORS[name]
+
+
+def pan_tompkins_signal(voltage, fs):
+    """ Band pass, derivative, squaring and moving window integration
+
+    Every step is a zero phase filter or a centered convolution, so
+    the integrated signal lines up with the voltage sample for sample.
+
+    Args:
+        voltage: voltage array
+        fs: sample rate in Hz
+
+    Returns:
+        filtered: 5-15 Hz band passed voltage
+        derivative: five point derivative of filtered
+        integrated: moving window integral of the squared derivative
+    """
+    high = min(15.0, 0.45 * fs)
+    filtered = filters.band_pass(voltage, min(5.0, high / 2), high, 2, fs)
+    kernel = np.array([1, 2, 0, -2, -1]) * fs / 8.0
+    derivative = np.convolve(filtered, kernel, mode='same')
+    width = max(int(round(0.15 * fs)), 1)
+    integrated = np.convolve(derivative ** 2, np.ones(width) / width,
+                             mode='same')
+    return filtered, derivative, integrated
+
+
+def adaptive_threshold(peaks, heights, slopes, fs):
+    """ Sorts candidate peaks into beats and noise with running levels
+
+    The signal and noise levels follow each peak as in Pan and
+    Tompkins, and a beat must rise above noise plus a quarter of the
+    gap between them. When no beat is found for 1.66 times the mean
+    R-R interval, the tallest skipped peak above half the threshold is
+    taken. A peak within 360 ms of the last beat whose slope is under
+    half of that beat's slope is taken to be a T wave. A peak within
+    360 ms that is more than twice as tall and 1.5 times as steep as
+    the last beat replaces it, since that beat was a P wave or noise
+    ahead of the QRS. Only candidate peaks are visited, not samples.
+
+    Args:
+        peaks: indices of the R waves of the candidate peaks, at
+        least 200 ms apart
+        heights: integrated signal at each candidate
+        slopes: steepest derivative around each R wave
+        fs: sample rate in Hz
+
+    Returns:
+        beats: int64 array of indices of the accepted peaks
+    """
+    if len(peaks) == 0:
+        return np.array([], dtype=np.int64)
+    learning = peaks < peaks[0] + 2 * fs
+    signal_level = heights[learning].max() / 3.0
+    noise_level = heights[learning].mean() / 2.0
+    beats = list()
+    shapes = list()
+    skipped = list()
+    rr = deque(maxlen=8)
+    for peak, height, slope in zip(peaks.tolist(), heights.tolist(),
+                                   slopes.tolist()):
+        threshold = noise_level + 0.25 * (signal_level - noise_level)
+        if rr:
+            limit = 1.66 * sum(rr) / len(rr)
+            if peak - beats[-1] > limit and skipped:
+                best = max(skipped, key=lambda x: x[1])
+                if best[1] > threshold / 2:
+                    signal_level = 0.25 * best[1] + 0.75 * signal_level
+                    rr.append(best[0] - beats[-1])
+                    beats.append(best[0])
+                    shapes.append(best[1:])
+                skipped = list()
+        close = bool(beats) and peak - beats[-1] < 0.36 * fs
+        if height > threshold and close and \
+                height > 2 * shapes[-1][0] and slope > 1.5 * shapes[-1][1]:
+            # The last beat was a P wave or noise ahead of this QRS
+            noise_level = 0.125 * shapes[-1][0] + 0.875 * noise_level
+            beats.pop()
+            shapes.pop()
+            if beats:
+                rr.pop()
+            close = bool(beats) and peak - beats[-1] < 0.36 * fs
+        if height > threshold and not (close and
+                                       slope < 0.5 * shapes[-1][1]):
+            signal_level = 0.125 * height + 0.875 * signal_level
+            if beats:
+                rr.append(peak - beats[-1])
+            beats.append(peak)
+            shapes.append((height, slope))
+            skipped = list()
+        else:
+            noise_level = 0.125 * height + 0.875 * noise_level
+            skipped.append((peak, height, slope))
+    return np.array(beats, dtype=np.int64)
+
+
+@register('pan_tompkins')
+def pan_tompkins(time, voltage, fs=None, **options):
+    """ Single pass Pan-Tompkins QRS detector
+
+    Args:
+        time: time array of the data
+        voltage: voltage array of the data
+        fs: sample rate in Hz; found from time when None
+        options: settings of the other detectors, ignored
+
+    Missing voltages are linearly interpolated before filtering. The
+    recording may be padded or not.
+
+    Returns:
+        indices: int64 array of R peak locations
+        times: float64 array of R peak times
+        values: float64 array of voltages at the R peaks
+    """
+    with instrument.timer('detect'):
+        time = np.asarray(time, dtype=float)
+        voltage = np.asarray(voltage, dtype=float)
+        empty = np.array([], dtype=np.int64)
+        missing = np.isnan(voltage)
+        if missing.all():
+            return empty, time[empty], voltage[empty]
+        if missing.any():
+            voltage = voltage.copy()
+            voltage[missing] = np.interp(np.flatnonzero(missing),
+                                         np.flatnonzero(~missing),
+                                         voltage[~missing])
+        if fs is None:
+            fs = filters.sample_rate(time)
+        filtered, derivative, integrated = pan_tompkins_signal(voltage, fs)
+        refractory = max(int(0.2 * fs), 1)
+        peaks, properties = find_peaks(integrated, distance=refractory,
+                                       height=0)
+        heights = properties['peak_heights']
+        # The R wave is the largest band passed deflection near each peak
+        half = max(int(round(0.075 * fs)), 1)
+        offsets = np.arange(-half, half + 1)
+        window = np.clip(peaks[:, np.newaxis] + offsets, 0, len(voltage) - 1)
+        r_waves = window[np.arange(len(peaks)),
+                         np.argmax(np.abs(filtered[window]), axis=1)]
+        # Peaks whose R waves fall within the refractory period are one QRS
+        keep = np.ones(len(peaks), dtype=bool)
+        last = -1
+        for i in range(len(peaks)):
+            if last >= 0 and r_waves[i] - r_waves[last] < refractory:
+                if heights[i] > heights[last]:
+                    keep[last] = False
+                    last = i
+                else:
+                    keep[i] = False
+            else:
+                last = i
+        r_waves = r_waves[keep]
+        heights = heights[keep]
+        window = np.clip(r_waves[:, np.newaxis] + offsets, 0, len(voltage) - 1)
+        slopes = np.abs(derivative[window]).max(axis=1)
+        indices = adaptive_threshold(r_waves, heights, slopes, fs)
+        return indices, time[indices], voltage[indices]
+
+
+@register('hilbert')
+def hilbert_envelope(time, voltage, fs=None, cutoff=0.005, space=1,
+                     baseline_method='mode', source_fs=None, file='',
+                     print_plot=0, max_min=None, traces=None, **options):
+    """ The Hilbert envelope detector of main.analyze_data
+
+    Peaks of the low pass envelope are found with peak_detector and
+    the cutoff is widened by check_loop until they are evenly spaced.
+    The recording must be padded by main.pad_recording first: without
+    the padding the envelope rings at both ends and other peaks are
+    found.
+
+    Args:
+        time: time array of the padded data
+        voltage: voltage array of the padded data
+        fs: sample rate in Hz the recording was resampled to; ignored
+        without source_fs, since the cutoff is normalized
+        cutoff: cutoff frequency for butterworth filter
+        space: ensuring this distance between peaks
+        baseline_method: 'mode', 'median' or 'rolling' baseline for
+        peak detection, see baselines.estimate
+        source_fs: sample rate in Hz the recording was resampled from,
+        which cutoff is normalized to, or None
+        file: name of csv file, for the check_loop log and plots
+        print_plot: 1 to show the check_loop retries, 0 for don't
+        max_min: tuple of max and min voltage of the data before
+        padding for the threshold fallback; taken from voltage when
+        None
+        traces: optional dictionary the low pass envelope is stored
+        in under 'filtered'
+        options: settings of the other detectors, ignored
+
+    Returns:
+        indices: int64 array of peak locations
+        times: float64 array of peak times
+        values: float64 array of envelope values at the peaks
+    """
+    import pandas as pd
+    import main
+    import baselines
+    if not source_fs:
+        fs = None
+    data = pd.DataFrame({'time': np.asarray(time, dtype=float),
+                         'voltage': np.asarray(voltage, dtype=float)})
+    if max_min is None:
+        max_min = main.calc_v_extreme(data)
+    with instrument.timer('envelope'):
+        amplitude_envelope = main.envelope(data['voltage'])
+        filtered = main.low_pass(amplitude_envelope, cutoff, fs, source_fs)
+    if traces is not None:
+        traces['filtered'] = filtered
+    with instrument.timer('detect'):
+        baseline = baselines.estimate(data['voltage'], baseline_method)
+        found = main.peak_detector(filtered, data, baseline,
+                                   main.scale_samples(main.REFRACTORY, fs,
+                                                      source_fs))
+    with instrument.timer('check_loop'):
+        found = main.check_loop(found, data, cutoff, file, space,
+                                print_plot, max_min, amplitude_envelope,
+                                baseline, fs, source_fs)
+    return (np.asarray(found['index'], dtype=np.int64),
+            np.asarray(found['time'], dtype=float),
+            np.asarray(found['voltage'], dtype=float))
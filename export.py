@@ -0,0 +1,92 @@
+import os
+import numpy as np
+import pandas as pd
+from openpyxl.styles import PatternFill
+
+
+def solid_fill(color):
+    """ Solid cell fill of one color
+
+    Args:
+        color: ARGB hex color
+
+    Returns:
+        fill: openpyxl PatternFill
+    """
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+# One shared fill per category, so cells reuse a single style object
+FILLS = {
+    'bad': solid_fill('FFC0C0C0'),
+    'red': solid_fill('FFFF0000'),
+    'orange': solid_fill('FFFF8C00'),
+    'yellow': solid_fill('FFFFFF00'),
+    'green': solid_fill('FF00FF00'),
+    'untracked': solid_fill('FFFFFFFF'),
+}
+
+
+def classify(detected, hand_counts):
+    """ Sorts detected beat counts by how far they are from hand counts
+
+    Args:
+        detected: array of detected beat counts
+        hand_counts: array of hand counted beats, NaN where a file has
+        not been tracked
+
+    Returns:
+        diff: array of absolute differences, NaN if not tracked
+        category: array of 'bad' (more than 10 apart), 'red' (more
+        than 5), 'orange' (more than 2), 'yellow' (more than 0),
+        'green' (equal) or 'untracked'
+    """
+    detected = np.asarray(detected, dtype=float)
+    hand_counts = np.asarray(hand_counts, dtype=float)
+    diff = np.abs(detected - hand_counts)
+    with np.errstate(invalid='ignore'):
+        category = np.select([diff > 10, diff > 5, diff > 2, diff > 0,
+                              diff == 0],
+                             ['bad', 'red', 'orange', 'yellow', 'green'],
+                             'untracked')
+    return diff, category
+
+
+def summary_table(file_number, export_excel, hand_counts):
+    """ Builds the beat tracking summary as a data frame
+
+    Args:
+        file_number: list of test_data numbers
+        export_excel: list of detected beat counts
+        hand_counts: list of hand counted beats; anything that is not
+        a number counts as not tracked
+
+    Returns:
+        table: data frame with file, hand_count, detected, diff and
+        category columns
+    """
+    hand_counts = pd.to_numeric(pd.Series(hand_counts, dtype=object),
+                                errors='coerce').values
+    diff, category = classify(export_excel, hand_counts)
+    table = pd.DataFrame({'file': [int(x) for x in file_number],
+                          'hand_count': hand_counts,
+                          'detected': list(export_excel),
+                          'diff': diff,
+                          'category': category},
+                         columns=['file', 'hand_count', 'detected', 'diff',
+                                  'category'])
+    return table
+
+
+def write_summary(table, file_name):
+    """ Saves the beat tracking summary as csv or parquet
+
+    Args:
+        table: data frame from summary_table
+        file_name: name of the output file; .parquet files are written
+        as parquet (needs pyarrow or fastparquet), anything else as csv
+    """
+    if os.path.splitext(file_name)[1] == '.parquet':
+        table.to_parquet(file_name, index=False)
+    else:
+        table.to_csv(file_name, index=False)
@@ -0,0 +1,103 @@
+from functools import lru_cache
+import numpy as np
+import scipy.signal as signal
+
+
+@lru_cache(maxsize=32)
+def butter_sos(order, cutoff, fs=None, btype='low'):
+    """ Designs a butterworth filter as second-order sections
+
+    Designs are cached by their arguments, so each filter is only
+    designed once however many files or retries use it.
+
+    Args:
+        order: filter order
+        cutoff: cutoff frequency; normalized to the Nyquist frequency
+        when fs is None, otherwise in Hz. A pair for band filters.
+        fs: sample rate in Hz, or None
+        btype: 'low', 'high', 'band' or 'bandstop'
+
+    Returns:
+        sos: array of second-order sections, shared by every caller
+        with the same arguments so it must not be modified
+    """
+    sos = signal.butter(order, cutoff, btype=btype, output='sos', fs=fs)
+    return sos
+
+
+def low_pass(x, cutoff, order=2, fs=None, axis=-1):
+    """ Zero phase low pass filter using second-order sections
+
+    Second-order sections stay stable at the very low normalized
+    cutoffs used on the envelope, where b/a coefficients lose
+    precision.
+
+    Args:
+        x: data to filter
+        cutoff: cutoff frequency; normalized to the Nyquist frequency
+        when fs is None, otherwise in Hz
+        order: filter order
+        fs: sample rate in Hz, or None
+        axis: axis of x to filter along
+
+    Returns:
+        filtered: low pass filtered data
+    """
+    sos = butter_sos(order, float(cutoff), fs and float(fs))
+    filtered = signal.sosfiltfilt(sos, x, axis=axis)
+    return filtered
+
+
+def band_pass(x, low, high, order=2, fs=None, axis=-1):
+    """ Zero phase band pass filter using second-order sections
+
+    Args:
+        x: data to filter
+        low: lower cutoff frequency
+        high: upper cutoff frequency
+        order: filter order
+        fs: sample rate in Hz, or None if low and high are normalized
+        to the Nyquist frequency
+        axis: axis of x to filter along
+
+    Returns:
+        filtered: band pass filtered data
+    """
+    sos = butter_sos(order, (float(low), float(high)), fs and float(fs),
+                     'band')
+    filtered = signal.sosfiltfilt(sos, x, axis=axis)
+    return filtered
+
+
+def time_step(time, axis=-1, span=50):
+    """ Median time step of a recording
+
+    The median is taken over the time covered by span consecutive
+    steps, divided by span. Timestamps rounded to a coarse resolution
+    then average out, and a few gaps or missing times do not change
+    the result.
+
+    Args:
+        time: time array in seconds
+        axis: axis of time to step along
+        span: number of steps measured together
+
+    Returns:
+        dt: median time step in seconds
+    """
+    time = np.moveaxis(np.asarray(time, dtype=float), axis, -1)
+    span = max(min(span, time.shape[-1] - 1), 1)
+    return np.nanmedian(time[..., span:] - time[..., :-span],
+                        axis=-1) / span
+
+
+def sample_rate(time):
+    """ Sample rate of a recording from its median time step
+
+    Args:
+        time: time array in seconds
+
+    Returns:
+        fs: sample rate in Hz
+    """
+    return 1.0 / time_step(time)
@@ -0,0 +1,112 @@
+import numpy as np
+
+
+def rr_intervals(beat_times):
+    """ R-R intervals between consecutive beats
+
+    Args:
+        beat_times: times of detected beats in seconds
+
+    Returns:
+        intervals: array of time between each beat and the next
+    """
+    return np.diff(np.asarray(beat_times, dtype=float))
+
+
+def spacing_exceeds(intervals, space):
+    """ Checks if the longest interval is far above the mean interval
+
+    Args:
+        intervals: array of time between peaks
+        space: allowed distance in seconds between the longest and the
+        mean interval
+
+    Returns:
+        boolean if peaks are too far apart = True
+    """
+    intervals = np.asarray(intervals, dtype=float)
+    return bool(intervals.max() - intervals.mean() > space)
+
+
+def sdnn(intervals):
+    """ Standard deviation of R-R intervals
+
+    Args:
+        intervals: array of R-R intervals in seconds
+
+    Returns:
+        sdnn: sample standard deviation in seconds, None with fewer
+        than two intervals
+    """
+    if len(intervals) < 2:
+        return None
+    return float(np.std(intervals, ddof=1))
+
+
+def rmssd(intervals):
+    """ Root mean square of successive R-R interval differences
+
+    Args:
+        intervals: array of R-R intervals in seconds
+
+    Returns:
+        rmssd: root mean square difference in seconds, None with fewer
+        than two intervals
+    """
+    if len(intervals) < 2:
+        return None
+    return float(np.sqrt(np.mean(np.diff(intervals) ** 2)))
+
+
+def pnn50(intervals):
+    """ Percent of successive R-R intervals differing by over 50 ms
+
+    Args:
+        intervals: array of R-R intervals in seconds
+
+    Returns:
+        pnn50: percentage of successive differences above 0.05 s, None
+        with fewer than two intervals
+    """
+    if len(intervals) < 2:
+        return None
+    return float(np.mean(np.abs(np.diff(intervals)) > 0.05) * 100)
+
+
+def instantaneous_hr(intervals):
+    """ Heart rate implied by each R-R interval
+
+    Args:
+        intervals: array of R-R intervals in seconds
+
+    Returns:
+        hr: array of beats per minute for each interval
+    """
+    return 60.0 / np.asarray(intervals, dtype=float)
+
+
+def hrv_metrics(beat_times):
+    """ Heart rate variability statistics of a recording
+
+    Args:
+        beat_times: times of detected beats in seconds
+
+    Returns:
+        metrics: dictionary of mean R-R interval, sdnn, rmssd, pnn50,
+        and the minimum and maximum instantaneous heart rate; values
+        that need more beats than were found are None
+    """
+    intervals = rr_intervals(beat_times)
+    metrics = dict()
+    metrics['mean_rr'] = None
+    metrics['min_hr_bpm'] = None
+    metrics['max_hr_bpm'] = None
+    if len(intervals):
+        hr = instantaneous_hr(intervals)
+        metrics['mean_rr'] = float(intervals.mean())
+        metrics['min_hr_bpm'] = float(hr.min())
+        metrics['max_hr_bpm'] = float(hr.max())
+    metrics['sdnn'] = sdnn(intervals)
+    metrics['rmssd'] = rmssd(intervals)
+    metrics['pnn50'] = pnn50(intervals)
+    return metrics
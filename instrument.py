@@ -0,0 +1,290 @@
+import json
+import time
+import cProfile
+import pstats
+import threading
+import contextlib
+
+# Recorder that timers report to, or None while timing is disabled
+_recorder = None
+BATCH = '__batch__'
+
+
+class Recorder(object):
+    """ Collects the time spent in each stage, per file
+
+    Args:
+        prefix: name prefix of the Prometheus metrics
+    """
+
+    def __init__(self, prefix='hrm'):
+        self.prefix = prefix
+        self.files = dict()
+        self.current = BATCH
+        self.lock = threading.Lock()
+
+    def begin(self, file):
+        """ Makes later stages count towards a file
+
+        Args:
+            file: name of csv file
+        """
+        self.current = file
+
+    def add(self, stage, seconds, file=None):
+        """ Adds one timed call of a stage
+
+        Args:
+            stage: name of the stage
+            seconds: time taken
+            file: name of csv file; the current file when None
+        """
+        file = self.current if file is None else file
+        with self.lock:
+            stages = self.files.setdefault(file, dict())
+            entry = stages.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def merge(self, files):
+        """ Adds timings recorded elsewhere, e.g. in a worker process
+
+        Args:
+            files: the files attribute of another Recorder
+        """
+        for file, stages in files.items():
+            for stage, (count, seconds) in stages.items():
+                with self.lock:
+                    entry = self.files.setdefault(file, dict()).setdefault(
+                        stage, [0, 0.0])
+                    entry[0] += count
+                    entry[1] += seconds
+
+    def file_totals(self, file):
+        """ Timings of one file
+
+        Args:
+            file: name of csv file
+
+        Returns:
+            totals: dictionary of stage to count and seconds
+        """
+        return {stage: {'count': count, 'seconds': seconds}
+                for stage, (count, seconds)
+                in self.files.get(file, dict()).items()}
+
+    def batch_totals(self):
+        """ Timings of every file and batch-level stage added together
+
+        Returns:
+            totals: dictionary of stage to count and seconds
+        """
+        totals = dict()
+        for stages in self.files.values():
+            for stage, (count, seconds) in stages.items():
+                entry = totals.setdefault(stage,
+                                          {'count': 0, 'seconds': 0.0})
+                entry['count'] += count
+                entry['seconds'] += seconds
+        return totals
+
+    def to_json(self, file_name=None):
+        """ Exports the per file and per batch timings as json
+
+        Args:
+            file_name: name of a json file to write, or None
+
+        Returns:
+            report: dictionary with 'files' and 'batch' timings
+        """
+        report = {'files': {file: self.file_totals(file)
+                            for file in self.files if file != BATCH},
+                  'batch': self.batch_totals()}
+        if file_name:
+            with open(file_name, 'w') as outfile:
+                json.dump(report, outfile, indent=2, sort_keys=True)
+        return report
+
+    def to_prometheus(self, per_file=False):
+        """ Exports the timings in the Prometheus text format
+
+        Per file timings get metrics of their own, so summing the batch
+        metrics never counts a stage twice.
+
+        Args:
+            per_file: True to add one series per file and stage
+
+        Returns:
+            text: counters of seconds and calls per stage
+        """
+        seconds = self.prefix + '_stage_seconds_total'
+        calls = self.prefix + '_stage_calls_total'
+        lines = ['# HELP ' + seconds + ' Time spent in each stage',
+                 '# TYPE ' + seconds + ' counter']
+        totals = sorted(self.batch_totals().items())
+        for stage, entry in totals:
+            lines.append(seconds + '{stage="' + _label(stage) + '"} ' +
+                         repr(entry['seconds']))
+        lines += ['# HELP ' + calls + ' Number of times each stage ran',
+                  '# TYPE ' + calls + ' counter']
+        for stage, entry in totals:
+            lines.append(calls + '{stage="' + _label(stage) + '"} ' +
+                         str(entry['count']))
+        if per_file:
+            seconds = self.prefix + '_file_stage_seconds_total'
+            lines += ['# HELP ' + seconds + ' Time spent in each stage of '
+                      'each file',
+                      '# TYPE ' + seconds + ' counter']
+            for file in sorted(self.files):
+                if file == BATCH:
+                    continue
+                for stage, (count, taken) in sorted(
+                        self.files[file].items()):
+                    lines.append(seconds + '{file="' + _label(file) +
+                                 '",stage="' + _label(stage) + '"} ' +
+                                 repr(taken))
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    """ Escapes a Prometheus label value
+
+    Args:
+        value: text of the label
+
+    Returns:
+        value: text with backslashes, double quotes and newlines
+        escaped as the exposition format requires
+    """
+    return str(value).replace('\\', '\\\\').replace(
+        '"', '\\"').replace('\n', '\\n')
+
+
+class _Timer(object):
+    """ Context manager adding its running time to the recorder """
+    __slots__ = ('recorder', 'stage', 'file', 'start')
+
+    def __init__(self, recorder, stage, file):
+        self.recorder = recorder
+        self.stage = stage
+        self.file = file
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.recorder.add(self.stage, time.perf_counter() - self.start,
+                          self.file)
+
+
+class _NullTimer(object):
+    """ Context manager that does nothing, for timers while disabled """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+# Shared do-nothing context returned by timer() while disabled
+_NULL = _NullTimer()
+
+
+def enable(recorder=None):
+    """ Turns timing on
+
+    Args:
+        recorder: Recorder to report to; a new one when None
+
+    Returns:
+        recorder: the active Recorder
+    """
+    global _recorder
+    _recorder = recorder or Recorder()
+    return _recorder
+
+
+def disable():
+    """ Turns timing off
+
+    Returns:
+        recorder: the Recorder that was active, or None
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+@contextlib.contextmanager
+def recording(recorder):
+    """ Times stages into a recorder for the length of a block
+
+    Args:
+        recorder: Recorder to report to, or None to leave timing as
+        it is
+    """
+    if recorder is None:
+        yield
+        return
+    global _recorder
+    previous, _recorder = _recorder, recorder
+    try:
+        yield
+    finally:
+        _recorder = previous
+
+
+def active():
+    """ The active Recorder, or None while timing is disabled """
+    return _recorder
+
+
+def begin(file):
+    """ Makes later stages count towards a file, if timing is enabled
+
+    Args:
+        file: name of csv file
+    """
+    if _recorder is not None:
+        _recorder.begin(file)
+
+
+def timer(stage, file=None):
+    """ Times a block of code as one call of a stage
+
+    While timing is disabled this returns one shared do-nothing
+    context, so timers can stay in the pipeline at no real cost.
+
+    Args:
+        stage: name of the stage
+        file: name of csv file; the current file when None
+
+    Returns:
+        context: context manager timing its block
+    """
+    if _recorder is None:
+        return _NULL
+    return _Timer(_recorder, stage, file)
+
+
+def profile_file(function, *args, **kwargs):
+    """ Runs one function, usually main.analyze_file, under cProfile
+
+    Args:
+        function: function to profile
+        args: positional arguments of function
+        kwargs: keyword arguments of function
+
+    Returns:
+        result: what function returned
+        stats: pstats.Stats of the run, e.g. for
+        stats.sort_stats('cumulative').print_stats(20) or
+        stats.dump_stats(file_name)
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args, **kwargs)
+    stats = pstats.Stats(profiler)
+    return result, stats
@@ -1,17 +1,27 @@
 import pandas as pd
 import os
-import matplotlib.pyplot as plt
 import numpy as np
 import sys
-import scipy.signal as signal
 from scipy.signal import hilbert
-import json
 import logging
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-
-
-def plot_data(data, filtered, index, file, method, user_interval):
+from concurrent.futures import ThreadPoolExecutor
+import filters
+import hrv
+import baselines
+import instrument
+import output
+import detectors
+import resample
+from results import BeatResult
+from beat_index import BeatIndex
+
+# Peaks must be more than this many samples apart, at the recording's
+# own sample rate
+REFRACTORY = 5
+
+
+def plot_data(data, filtered, index, file, method, user_interval,
+              plot_file=None, renderer=None):
     """ Plots original data, data envelope with low pass filter, and detected peaks
 
     Args:
@@ -21,22 +31,35 @@ def plot_data(data, filtered, index, file, method, user_interval):
         filtered: low pass enveloped data
         index: locations of found peaks
         file: name of csv file
+        plot_file: optional .png or .svg file to render the plot to
+        without a display instead of showing it
+        renderer: optional render.PlotRenderer that draws the plot to
+        plot_file in the background
 
     Returns:
 
     """
-
-    data_points = []
-    headers = ['time', 'voltage']
+    time = np.asarray(data['time'], dtype=float)
+    index = np.asarray(index, dtype=np.int64)
     if method:
-        for x in index:
-            data_points.append([data.loc[x]['time'], filtered[x]])
+        peak_voltage = np.asarray(filtered, dtype=float)[index]
     else:
-        for x in index:
-            data_points.append([data.loc[x]['time'], data.loc[x]['voltage']])
-    data_points_df = pd.DataFrame(data_points, columns=headers)
+        peak_voltage = np.asarray(data['voltage'], dtype=float)[index]
+    if plot_file:
+        trace = (time, np.asarray(data['voltage'], dtype=float))
+        filtered_trace = (time, np.asarray(filtered, dtype=float))
+        peaks = (time[index], peak_voltage)
+        if renderer:
+            renderer.submit(trace, filtered_trace, peaks, file,
+                            plot_file, user_interval)
+        else:
+            import render
+            render.render_plot(trace, filtered_trace, peaks, file,
+                               plot_file, user_interval)
+        return
+    import matplotlib.pyplot as plt
     plt.plot(data['time'], data['voltage'])
-    plt.scatter(data_points_df['time'], data_points_df['voltage'], c='red')
+    plt.scatter(time[index], peak_voltage, c='red')
     if not np.isnan(np.sum(filtered)):
         plt.plot(data['time'], filtered)
     if 0 < user_interval[0] < user_interval[1]:
@@ -67,8 +90,8 @@ def calc_duration(data):
         dur: duration of input data
 
     """
-    dur = float(data.loc[data.index[-1]]['time']) - \
-        float(data.loc[1]['time'])
+    time = data['time']
+    dur = float(time.iloc[-1]) - float(time.iloc[1])
     return dur
 
 
@@ -88,46 +111,93 @@ def calc_v_extreme(data):
     return store
 
 
-def peak_detector(filtered, data):
+def peak_detector(filtered, data, baseline=None, refractory=REFRACTORY):
     """ Takes ECG data and detects peaks
 
     Args:
         filtered: envelope with low pass butterworth filter
         data: original data from csv file
+        baseline: baseline voltage from baselines.estimate; the modal
+        voltage of data when None
+        refractory: peaks must be more than this many samples apart
 
     Returns:
-        return_df: data frame containing index, time, and
+        return_df: BeatResult containing index, time, and
         voltage point of isolated peaks
     """
-    return_values = []
-    y_old = filtered[0]
-    index_old = -999
-    indices = []
-    switch = False
-    go = False
-    round_data = list()
-    for x in data['voltage']:
-        round_data.append(round(float(x), 1))
-    median_voltage = max(set(round_data), key=round_data.count)
-    for index, y in enumerate(filtered):
-        if y - y_old > 0 and float(data.loc[index]['time']) > 0:
-            go = True
-        if y - y_old <= 0 and index - index_old > 5 \
-                and switch is False and go is True:
-            if index_old == -999 or go is True:
-                if filtered[index] > median_voltage + .2 * median_voltage:
-                    return_values.append([index, data.loc[index]['time'], y])
-                    indices.append(index)
-                    index_old = index
-                    switch = True
-        if y - y_old > 0 and go is True:
-            switch = False
-        y_old = y
-    headers = ['index', 'time', 'voltage']
-    return_df = pd.DataFrame(return_values, columns=headers)
+    time = np.asarray(data['time'])
+    voltage = np.asarray(data['voltage'], dtype=float)
+    indices, times, values = peak_detector_array(filtered,
+                                                 time.astype(float),
+                                                 voltage, baseline,
+                                                 refractory)
+    return_df = found_frame(indices, time[indices], values)
     return return_df
 
 
+def peak_detector_array(filtered, time, voltage, baseline=None,
+                        refractory=REFRACTORY):
+    """ Array version of peak_detector for plain NumPy inputs
+
+    Finds the same peaks as peak_detector: the first non-rising
+    sample of the envelope after a rise, more than refractory samples
+    from the last peak and above 1.2 times the modal voltage. Rises and
+    falls are found with np.diff, so only the candidate peaks are
+    visited in Python instead of every sample.
+
+    Args:
+        filtered: envelope with low pass butterworth filter
+        time: time array of the data
+        voltage: voltage array of the data
+        baseline: baseline voltage to threshold against, a scalar or
+        one value per sample; the modal voltage when None
+        refractory: peaks must be more than this many samples apart
+
+    Returns:
+        indices: int64 array of peak locations
+        times: float64 array of peak times
+        values: float64 array of envelope values at the peaks
+    """
+    filtered = np.asarray(filtered, dtype=float)
+    time = np.asarray(time, dtype=float)
+    voltage = np.asarray(voltage, dtype=float)
+    empty = np.array([], dtype=np.int64)
+    if len(filtered) == 0:
+        return empty, time[empty], filtered[empty]
+    if baseline is None:
+        baseline = baselines.modal_baseline(voltage)
+    median_voltage = baseline
+
+    step = np.diff(filtered, prepend=filtered[0])
+    rising = step > 0
+    falling = step <= 0
+    start = np.flatnonzero(rising & (time > 0))
+    if len(start) == 0:
+        return empty, time[empty], filtered[empty]
+    # Every rise after the detector starts re-arms it, so each run of
+    # samples between two rises can hold at most one peak
+    run = np.cumsum(rising)
+    eligible = falling & (filtered > median_voltage +
+                          .2 * median_voltage)
+    eligible[:start[0] + 1] = False
+    candidates = np.flatnonzero(eligible)
+    first = np.flatnonzero(np.diff(run[candidates], prepend=-1))
+    last = np.append(first[1:], len(candidates))
+
+    indices = list()
+    index_old = -999
+    for lo, hi in zip(first, last):
+        if candidates[lo] - index_old <= refractory:
+            lo += np.searchsorted(candidates[lo:hi], index_old + refractory,
+                                  side='right')
+            if lo == hi:
+                continue
+        index_old = candidates[lo]
+        indices.append(index_old)
+    indices = np.array(indices, dtype=np.int64)
+    return indices, time[indices], filtered[indices]
+
+
 def user_input(duration, window=None):
     """ User Input for choosing window over which to take average
 
@@ -200,34 +270,32 @@ def calc_avg(interval, found, dur):
         bpm = int(float(len(found['time']))/dur*60)
     else:
         bpm_range = interval[0]
-        bpm_count = 0
-        for x in found['time']:
-            if bpm_range[0] < x < bpm_range[1]:
-                bpm_count += 1
-        bpm = float(bpm_count)/(float(bpm_range[1])-float(bpm_range[0]))*60
+        bpm = BeatIndex(found['time']).bpm(float(bpm_range[0]),
+                                           float(bpm_range[1]))
 
     return bpm
 
 
-def create_metrics(found, extreme, dur, bpm):
+def create_metrics(found, extreme, dur, bpm, hrv_stats=False):
     """ Creates metrics dictionary
 
     Args:
-        found: data frame containing index,
-        time, and voltage points of found peaks
+        found: BeatResult or data frame containing index,
+        time, and voltage points of found peaks; left unchanged
         extreme: max and min voltage found in data file
         dur: the time length of the data file
         bpm: number of beats per min in time interval requested by user
+        hrv_stats: True to add heart rate variability statistics
+        under 'hrv'
 
     Returns:
         metrics: dictionary requested by assignment
     """
-    metrics = dict()
-    metrics['voltage_extremes'] = extreme
-    metrics['duration'] = dur
-    metrics['num_beats'] = len(found['time'])
-    metrics['mean_hr_bpm'] = bpm
-    metrics['beats'] = list(found['time'])
+    if not isinstance(found, BeatResult):
+        found = BeatResult.from_frame(found)
+    result = BeatResult(found.index, found.time, found.voltage, extreme,
+                        dur, bpm)
+    metrics = result.to_dict(hrv_stats)
     print(metrics)
     logging.info('Final Dictionary Creation')
     return metrics
@@ -243,62 +311,143 @@ def write_json(file, metrics):
     Returns:
         saves a json file with the requested dictionary
     """
-    json_name = file.split('.')[0] + '.json'
-    with open(json_name, 'w') as outfile:
-        json.dump(metrics, outfile)
+    with instrument.timer('json', file):
+        with open(output.json_name(file), 'w') as outfile:
+            outfile.write(output.encode(metrics))
 
     logging.info('make sure everything in metrics is a '
                  'dictionary and NOT a data frame')
 
 
-def Hilbert(data, cutoff):
+def Hilbert(data, cutoff, hz=False):
     """ Creates envelope and low pass filters data
 
     Args:
         data: input data with padding
-        cutoff:
+        cutoff: cutoff frequency for butterworth filter
+        hz: True if cutoff is in Hz, relative to the sample rate
+        detected from data['time']; otherwise it is normalized
 
     Returns:
         filtered: low pass filtered enveloped data
     """
-    analytic_signal = hilbert(data['voltage'])
+    fs = None
+    if hz:
+        fs = filters.sample_rate(data['time'])
+    filtered = low_pass(envelope(data['voltage']), cutoff, fs)
+    return filtered
+
+
+def envelope(voltage):
+    """ Amplitude envelope of the analytic signal
+
+    The envelope does not depend on the cutoff frequency, so it can be
+    computed once per recording and low pass filtered for each cutoff.
+
+    Args:
+        voltage: voltage of input data with padding
+
+    Returns:
+        amplitude_envelope: magnitude of the analytic signal
+    """
+    analytic_signal = hilbert(voltage)
     amplitude_envelope = np.abs(analytic_signal)
+    return amplitude_envelope
+
+
+def low_pass(amplitude_envelope, cutoff, fs=None, source_fs=None):
+    """ Low pass filters an envelope with a butterworth filter
+
+    Args:
+        amplitude_envelope: envelope from envelope()
+        cutoff: cutoff frequency for butterworth filter
+        fs: sample rate in Hz if cutoff is in Hz; None if cutoff is
+        normalized
+        source_fs: for a recording resampled from this rate in Hz to
+        fs, the rate a normalized cutoff refers to, so the filter
+        keeps the same cutoff in Hz; None otherwise
+
+    Returns:
+        filtered: low pass filtered enveloped data
+    """
     n = 2  # Filter order
-    wn = cutoff  # Cutoff frequency
-    b, a = signal.butter(n, wn, output='ba')
-    filtered = signal.filtfilt(b, a, amplitude_envelope)
+    if source_fs:
+        cutoff = cutoff * source_fs / 2.0
+    filtered = filters.low_pass(amplitude_envelope, cutoff, n, fs)
     return filtered
 
 
-def edge_case(data, amount, level):
+def edge_case(data, amount, level, lead=200):
     """ Pads the input data with -0.25 to increase efficiency of peak detection
 
     Args:
         level: Voltage to set padding to
         amount: Number of points used to buffer either side of data set
         data: raw input data from csv file
+        lead: the pre-pad starts this many time steps before the data
 
     Returns:
         data: raw input data with padding
     """
-    extra = []
+    padded = edge_case_array(data['time'], data['voltage'], amount, level,
+                             lead)
     headers = ['time', 'voltage']
-    dt = float(data.loc[50]['time']) - float(data.loc[49]['time'])
-    for x in range(0, amount):
-        extra.append([dt*x+float(data.loc[len(data['time'])-1]['time']),
-                      level])
-    extra = pd.DataFrame(extra, columns=headers)
-    data = data.append(extra, sort=False)
-    data = data.reset_index()
-    extra2 = []
-    for x in range(0, amount):
-        extra2.append([float(data.loc[0]['time']) - dt*200 + dt * x, level])
-    extra2 = pd.DataFrame(extra2, columns=headers)
-    data = extra2.append(data, sort=False)
-    data = data.reset_index()
+    data = pd.DataFrame(padded.T, columns=headers, copy=False)
     return data
 
 
+def pad_recording(data, fs=None, source_fs=None):
+    """ Pads a recording the way analyze_data does before detection
+
+    Every detector in detectors.DETECTORS expects its input padded
+    like this: 150 samples at the mean voltage on either side, the
+    first starting 200 time steps before the data.
+
+    Args:
+        data: data frame of time and voltage cast to floats
+        fs: sample rate in Hz the recording was resampled to, or None
+        source_fs: sample rate in Hz it was resampled from, or None
+
+    Returns:
+        data: data with padded ends
+    """
+    avg_v = np.sum(data['voltage'].values) / len(data['voltage'])
+    return edge_case(data, scale_samples(150, fs, source_fs), avg_v,
+                     scale_samples(200, fs, source_fs))
+
+
+def edge_case_array(time, voltage, amount, level, lead=200):
+    """ Pads time and voltage arrays with a single allocation
+
+    The pre-pad, the signal and the post-pad are written into one
+    preallocated array, with the same timestamps and level as
+    edge_case. Pad samples are spaced by the median time step.
+
+    Args:
+        time: time array of the data
+        voltage: voltage array of the data
+        amount: Number of points used to buffer either side of data set
+        level: Voltage to set padding to
+        lead: the pre-pad starts this many time steps before the data
+
+    Returns:
+        padded: 2 x n array holding the padded time and voltage rows,
+        so it can be unpacked as time, voltage
+    """
+    time = np.asarray(time, dtype=float)
+    n = len(time)
+    dt = filters.time_step(time)
+    padded = np.empty((2, n + 2 * amount))
+    steps = dt * np.arange(amount)
+    padded[0, :amount] = time[0] - dt * lead + steps
+    padded[0, amount:amount + n] = time
+    padded[0, amount + n:] = time[-1] + steps
+    padded[1, :amount] = level
+    padded[1, amount:amount + n] = voltage
+    padded[1, amount + n:] = level
+    return padded
+
+
 def check_spacing(found, data, space):
     """ Ensures peaks are close enough together
 
@@ -312,15 +461,10 @@ def check_spacing(found, data, space):
     Returns:
         boolean if peaks are too far apart = True
     """
-    difference = []
-    old_x = 0
-    for x in found['index']:
-        difference.append(data.loc[x]['time']-data.loc[old_x]['time'])
-        old_x = x
-    if max(difference) - sum(difference)/len(difference) > space:
-        return True
-    else:
-        return False
+    time = np.asarray(data['time'], dtype=float)
+    index = np.asarray(found['index'], dtype=np.int64)
+    difference = hrv.rr_intervals(np.append(time[0], time[index]))
+    return hrv.spacing_exceeds(difference, space)
 
 
 def is_data_valid(data):
@@ -330,27 +474,55 @@ def is_data_valid(data):
         data: raw input data frame
 
     Returns:
-        data: data that has been cast to floats
+        data: data that has been cast to floats, indexed 0 to n - 1
+        like a recording read back from the cache
     """
-    dropped = 0
-    for index_, y in enumerate(data['time']):
-        try:
-            data['time'][index_] = float(y)
-        except ValueError:
-            data = data.drop(data.index[index_])
-            dropped += 1
-            logging.warning('Data type was not a float')
-    for index_, y in enumerate(data['voltage']):
-        try:
-            data['voltage'][index_] = float(y)
-        except ValueError:
-            data = data.drop(data.index[index_])
-            dropped += 1
-            logging.warning('Data type was not a float')
+    time, voltage, report = validate_columns(data)
+    data = pd.DataFrame({'time': time, 'voltage': voltage})
     return data
 
 
-def check_loop(found, data, filter_value, file, space, print_plot, max_min):
+def validate_columns(data):
+    """ Casts the time and voltage columns to floats in one pass
+
+    Every cell is converted with pd.to_numeric and rows holding
+    anything that is not a number are dropped with a single mask.
+    Missing values (NaN) are kept, as float('NaN') is a valid float.
+
+    Args:
+        data: raw input data frame
+
+    Returns:
+        time: float64 array of valid times
+        voltage: float64 array of valid voltages
+        report: dictionary with the number of rows read and dropped,
+        the number of bad cells per column and the boolean mask of
+        kept rows
+    """
+    keep = np.ones(len(data), dtype=bool)
+    columns = dict()
+    report = dict()
+    for name in ['time', 'voltage']:
+        raw = data[name]
+        cast = pd.to_numeric(raw, errors='coerce')
+        bad = (cast.isna() & raw.notna()).values
+        keep &= ~bad
+        columns[name] = cast.values.astype(np.float64)
+        report[name] = int(bad.sum())
+    report['rows'] = len(data)
+    report['dropped'] = int(len(data) - keep.sum())
+    report['keep'] = keep
+    if report['dropped']:
+        logging.warning('Dropped ' + str(report['dropped']) +
+                        ' rows that were not floats (time: ' +
+                        str(report['time']) + ', voltage: ' +
+                        str(report['voltage']) + ')')
+    return columns['time'][keep], columns['voltage'][keep], report
+
+
+def check_loop(found, data, filter_value, file, space, print_plot, max_min,
+               amplitude_envelope=None, baseline=None, fs=None,
+               source_fs=None):
     """ Change cutoff frequency if detected peaks are too far apart
 
     Args:
@@ -362,38 +534,135 @@ def check_loop(found, data, filter_value, file, space, print_plot, max_min):
         data: data that has been padded
         filter_value: cutoff frequency for butterworth filter
         file: name of csv file
+        amplitude_envelope: envelope of data from envelope(); computed
+        here when None
+        baseline: baseline voltage from baselines.estimate; the modal
+        voltage of data when None
+        fs: sample rate of data in Hz when it was resampled, or None
+        source_fs: sample rate in Hz the recording was resampled from,
+        which filter_value is normalized to, or None
 
     Returns:
-        found: optimized data frame containing index,
+        found: optimized BeatResult containing index,
         time, and voltage of found peaks
     """
     if not found.empty:
-        check = check_spacing(found, data, space)
-        counter = 0
-        while check:
-            filter_value += 0.002
-            filtered = Hilbert(data, filter_value)
-            if print_plot:
-                plt.plot(data['time'], data['voltage'])
-                plt.plot(data['time'], filtered)
-                plt.title(str(file) + ' ' + str(counter))
-                plt.show()
-            found = peak_detector(filtered, data)
-            check = check_spacing(found, data, 1)
-            if counter == 3:
-                check = False
-            counter += 1
+        def show(filtered, counter):
+            import matplotlib.pyplot as plt
+            plt.plot(data['time'], data['voltage'])
+            plt.plot(data['time'], filtered)
+            plt.title(str(file) + ' ' + str(counter))
+            plt.show()
+        if print_plot:
+            on_retry = show
+        else:
+            on_retry = None
+        found, cutoff, iterations = search_cutoff(found, data,
+                                                  filter_value, space,
+                                                  amplitude_envelope,
+                                                  on_retry=on_retry,
+                                                  baseline=baseline,
+                                                  fs=fs,
+                                                  source_fs=source_fs)
+        logging.info(str(file) + ': cutoff ' + str(cutoff) + ' after ' +
+                     str(iterations) + ' retries')
     else:
-        found_pos = threshold_peak_detect(data, max_min, 1)
-        found_neg = threshold_peak_detect(data, max_min, 0)
-        if len(found_pos['index']) > len(found_neg['index']):
-            found = found_neg
+        pos, neg = threshold_peak_detect_array(data['voltage'], max_min)
+        if len(pos[0]) > len(neg[0]):
+            index, voltage = neg
         else:
-            found = found_pos
+            index, voltage = pos
+        found = found_frame(index, np.asarray(data['time'])[index],
+                            voltage)
 
     return found
 
 
+def search_cutoff(found, data, filter_value, space,
+                  amplitude_envelope=None, workers=None, on_retry=None,
+                  baseline=None, fs=None, source_fs=None):
+    """ Widens the cutoff frequency until detected peaks are evenly spaced
+
+    Up to four cutoffs, each 0.002 above the last, are tried in order
+    and the first one whose peaks pass check_spacing is kept. All of
+    them reuse one envelope, so only the low pass filter and peak
+    detection are repeated, and the baseline is estimated once for all
+    of them. With workers set, the candidate cutoffs
+    are evaluated together on a thread pool; the result is the same.
+
+    Args:
+        found: data frame containing index, time,
+        and voltage of found peaks
+        data: data that has been padded
+        filter_value: starting cutoff frequency for butterworth filter
+        space: ensuring this distance between peaks
+        amplitude_envelope: envelope of data from envelope(); computed
+        here when None
+        workers: number of threads to evaluate cutoffs with, or None to
+        try them one at a time
+        on_retry: optional function called with the filtered data and
+        retry number of each cutoff tried
+        baseline: baseline voltage from baselines.estimate; the modal
+        voltage of data when None
+        fs: sample rate of data in Hz when it was resampled, or None
+        source_fs: sample rate in Hz the recording was resampled from,
+        which the cutoffs are normalized to, or None
+
+    Returns:
+        found: BeatResult of peaks found with the chosen cutoff
+        cutoff: the chosen cutoff frequency
+        iterations: number of cutoffs tried after filter_value
+    """
+    if not check_spacing(found, data, space):
+        return found, filter_value, 0
+    if amplitude_envelope is None:
+        amplitude_envelope = envelope(data['voltage'])
+    if baseline is None:
+        baseline = baselines.estimate(data['voltage'])
+    refractory = scale_samples(REFRACTORY, fs, source_fs)
+    cutoffs = list()
+    for counter in range(4):
+        filter_value += 0.002
+        cutoffs.append(filter_value)
+
+    def attempt(cutoff):
+        with instrument.timer('check_loop_retry'):
+            filtered = low_pass(amplitude_envelope, cutoff, fs, source_fs)
+            attempt_found = peak_detector(filtered, data, baseline,
+                                          refractory)
+            check = check_spacing(attempt_found, data, 1)
+        return filtered, attempt_found, check
+
+    if workers:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            attempts = pool.map(attempt, cutoffs)
+    else:
+        attempts = map(attempt, cutoffs)
+    for counter, (filtered, found, check) in enumerate(attempts):
+        if on_retry:
+            on_retry(filtered, counter)
+        if not check:
+            break
+    return found, cutoffs[counter], counter + 1
+
+
+def scale_samples(samples, fs=None, source_fs=None):
+    """ Number of samples spanning the same time after resampling
+
+    Args:
+        samples: number of samples at the recording's own rate
+        fs: sample rate in Hz the recording was resampled to, or None
+        source_fs: its own sample rate in Hz, or None
+
+    Returns:
+        samples: samples scaled by fs / source_fs, at least 1; left
+        as it is when source_fs is None
+    """
+    if not source_fs:
+        return samples
+    return max(int(round(samples * fs / source_fs)), 1)
+
+
 def threshold_peak_detect(data, max_min, sign):
     """
 
@@ -405,89 +674,237 @@ def threshold_peak_detect(data, max_min, sign):
     Returns:
 
     """
-    max_val = max_min[0]
-    min_val = max_min[1]
+    pos, neg = threshold_peak_detect_array(data['voltage'], max_min)
     if sign:
-        thresh = .75 * float(max_val)
+        index, voltage = pos
     else:
-        thresh = -.75 * float(min_val)
-    switch = False
-    count = 0
-    found = list()
-    for index, x in enumerate(data['voltage']):
-        x = float(x)
-        if not sign:
-            x = -1 * x
-        if x > thresh and switch is False:
-            switch = True
-            count += 1
-            found.append([index, data.loc[index]['time'], x])
-        elif x < thresh:
-            switch = False
-    headers = ['index', 'time', 'voltage']
-    found = pd.DataFrame(found, columns=headers)
-    return found
+        index, voltage = neg
+    return found_frame(index, np.asarray(data['time'])[index], voltage)
+
+
+def threshold_peak_detect_array(voltage, max_min):
+    """ Threshold peak detection for both polarities in one pass
 
+    A peak is recorded every time the signal rises above 0.75 of the
+    max (or below 0.75 of the min for the negative polarity) after
+    having dropped back below it, as in threshold_peak_detect.
 
-def write_excel(file_number, export_excel, excel_file_name):
+    Args:
+        voltage: voltage array of the data with padding
+        max_min: tuple containing max and min
+
+    Returns:
+        pos: tuple of peak indices and voltages for the positive
+        threshold
+        neg: tuple of peak indices and negated voltages for the
+        negative threshold
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    signed = np.vstack((voltage, -voltage))
+    thresh = np.array([[.75 * float(max_min[0])],
+                       [-.75 * float(max_min[1])]])
+    above = signed > thresh
+    below = signed < thresh
+    # Samples sitting exactly on the threshold keep the previous state,
+    # so carry the last above/below decision forward along each row
+    decided = np.where(above | below, np.arange(len(voltage)), -1)
+    decided = np.maximum.accumulate(decided, axis=1)
+    state = np.take_along_axis(above, np.maximum(decided, 0), axis=1)
+    state[decided < 0] = False
+    armed = np.ones_like(state)
+    armed[:, 1:] = ~state[:, :-1]
+    hits = above & armed
+    pos = np.flatnonzero(hits[0])
+    neg = np.flatnonzero(hits[1])
+    return (pos, signed[0, pos]), (neg, signed[1, neg])
+
+
+def found_frame(index, time, voltage):
+    """ Wraps detected peak arrays in a BeatResult
+
+    The result is read like the found data frame, e.g. found['time'],
+    len(found) and found.empty, without building one.
+
+    Args:
+        index: locations of found peaks
+        time: times of found peaks
+        voltage: voltages of found peaks
+
+    Returns:
+        found: BeatResult containing index, time, and
+        voltage of found peaks
+    """
+    return BeatResult(index, time, voltage)
+
+
+def write_excel(file_number, export_excel, excel_file_name,
+                summary_file_name=None):
     """ Exports all saved bpm values to excel sheet for comparison
 
+    The hand counts in column B are read once, every difference is
+    classified at the same time, and the values and shared fills are
+    written in a single pass over the rows.
+
     Args:
         file_number: list of test_data numbers in the working directory
         export_excel: list of bpms that need to be written to the excel sheet
         excel_file_name: name of the excels sheet you want to open and edit
+        summary_file_name: optional csv or parquet file to also save the
+        summary to
 
     Returns:
         Saved excel file can be found in working directory
 
     """
-    wb = load_workbook(excel_file_name)
-    ws = wb.active
-    counter = 0
-    yellow_fill = PatternFill(start_color='FFFFFF00',
-                              end_color='FFFFFF00',
-                              fill_type='solid')
-    white_fill = PatternFill(start_color='FFFFFFFF',
-                             end_color='FFFFFFFF',
-                             fill_type='solid')
-    orange_fill = PatternFill(start_color='FFFF8C00',
-                              end_color='FFFF8C00',
-                              fill_type='solid')
-    red_fill = PatternFill(start_color='FFFF0000',
-                           end_color='FFFF0000',
-                           fill_type='solid')
-    green_fill = PatternFill(start_color='FF00FF00',
-                             end_color='FF00FF00',
-                             fill_type='solid')
-    grey_fill = PatternFill(start_color='FFC0C0C0',
-                            end_color='FFC0C0C0',
-                            fill_type='solid')
-    for x in file_number:
-        ws['C' + str(int(x) + 1)] = str(export_excel[counter])
-        counter += 1
-        try:
-            if np.abs(int(ws['C' + str(int(x) + 1)].value) -
-                      int(ws['B' + str(int(x) + 1)].value)) > 10:
-                ws['C' + str(int(x) + 1)].fill = grey_fill
-                ws['C' + str(int(x) + 1)] = str('Bad Data')
-            elif np.abs(int(ws['C' + str(int(x) + 1)].value) -
-                        int(ws['B' + str(int(x) + 1)].value)) > 5:
-                ws['C' + str(int(x) + 1)].fill = red_fill
-            elif np.abs(int(ws['C' + str(int(x) + 1)].value) -
-                        int(ws['B' + str(int(x) + 1)].value)) > 2:
-                ws['C' + str(int(x) + 1)].fill = orange_fill
-            elif np.abs(int(ws['C' + str(int(x) + 1)].value) -
-                        int(ws['B' + str(int(x) + 1)].value)) > 0:
-                ws['C' + str(int(x) + 1)].fill = yellow_fill
-            elif np.abs(int(ws['C' + str(int(x) + 1)].value) -
-                        int(ws['B' + str(int(x) + 1)].value)) == 0:
-                ws['C' + str(int(x) + 1)].fill = green_fill
+    from openpyxl import load_workbook
+    import export
+    with instrument.timer('excel', instrument.BATCH):
+        wb = load_workbook(excel_file_name)
+        ws = wb.active
+        rows = [int(x) + 1 for x in file_number]
+        hand_counts = [ws.cell(row=row, column=2).value for row in rows]
+        table = export.summary_table(file_number, export_excel,
+                                     hand_counts)
+        for x, row, value, category in zip(file_number, rows, export_excel,
+                                           table['category']):
+            cell = ws.cell(row=row, column=3)
+            if category == 'bad':
+                cell.value = str('Bad Data')
             else:
-                ws['C' + str(int(x) + 1)].fill = white_fill
-        except TypeError:
-            print('File ' + str(x) + ' has not been tracked')
-            ws['C' + str(int(x) + 1)].fill = white_fill
-    wb.save(excel_file_name)
+                cell.value = str(value)
+            if category == 'untracked':
+                print('File ' + str(x) + ' has not been tracked')
+            cell.fill = export.FILLS[category]
+        wb.save(excel_file_name)
+        if summary_file_name:
+            export.write_summary(table, summary_file_name)
+
+
+def analyze_file(file, user_interval, space=1, print_plot=0,
+                 filter_value=0.005, plot_dir=None, renderer=None,
+                 baseline_method='mode', detector='hilbert',
+                 target_fs=None, max_fs=None):
+    """ Runs peak detection on a single csv file
+
+    Args:
+        file: name of csv file
+        user_interval: window in seconds over which to take the
+        average bpm
+        space: ensuring this distance between peaks
+        print_plot: 1 for plot filtered data, 0 for don't
+        filter_value: cutoff frequency for butterworth filter
+        plot_dir: folder to save plots to as png files instead of
+        showing them
+        renderer: optional render.PlotRenderer drawing the saved plots
+        baseline_method: 'mode', 'median' or 'rolling' baseline for
+        peak detection, see baselines.estimate
+        detector: 'hilbert' for the envelope peak detector, or the
+        name of another detector in detectors.DETECTORS such as
+        'pan_tompkins'
+        target_fs: sample rate in Hz to resample every recording to
+        before filtering, or None to keep its own
+        max_fs: recordings sampled faster than this many Hz are
+        decimated to it before filtering, or None
+
+    Returns:
+        metrics: dictionary requested by assignment
+    """
+    instrument.begin(file)
+    headers = ['time', 'voltage']
+    with instrument.timer('read'):
+        data = pd.read_csv(file, names=headers)
+    with instrument.timer('validate'):
+        data = is_data_valid(data)
+    metrics = analyze_data(data, file, user_interval, space, print_plot,
+                           filter_value, plot_dir, renderer,
+                           baseline_method, detector, target_fs, max_fs)
+    return metrics
+
+
+def analyze_data(data, file, user_interval, space=1, print_plot=0,
+                 filter_value=0.005, plot_dir=None, renderer=None,
+                 baseline_method='mode', detector='hilbert',
+                 target_fs=None, max_fs=None):
+    """ Runs peak detection on a validated recording
+
+    Args:
+        data: data frame of time and voltage cast to floats, as
+        returned by is_data_valid
+        file: name of csv file
+        user_interval: window in seconds over which to take the
+        average bpm
+        space: ensuring this distance between peaks
+        print_plot: 1 for plot filtered data, 0 for don't
+        filter_value: cutoff frequency for butterworth filter
+        plot_dir: folder to save plots to as png files instead of
+        showing them; the check_loop debug plots are skipped
+        renderer: optional render.PlotRenderer drawing the saved plots
+        baseline_method: 'mode', 'median' or 'rolling' baseline for
+        peak detection, see baselines.estimate
+        detector: 'hilbert' for the envelope peak detector, or the
+        name of another detector in detectors.DETECTORS such as
+        'pan_tompkins'
+        target_fs: sample rate in Hz to resample every recording to
+        before filtering, or None to keep its own
+        max_fs: recordings sampled faster than this many Hz are
+        decimated to it before filtering, or None
+
+    Returns:
+        metrics: dictionary requested by assignment
+    """
+    instrument.begin(file)
+    extreme = calc_v_extreme(data)
+    dur = calc_duration(data)
+    interval = user_input(dur, user_interval)
+    fs = source_fs = None
+    if target_fs or max_fs:
+        with instrument.timer('resample'):
+            data, report = resample.ingest(data, target_fs, max_fs)
+        if report['resampled_fs']:
+            # filter_value and the refractory period are set for the
+            # recording's own rate, so keep them the same in Hz
+            fs, source_fs = report['resampled_fs'], report['fs']
+    with instrument.timer('pad'):
+        data = pad_recording(data, fs, source_fs)
+    traces = dict()
+    found = found_frame(*detectors.get(detector)(
+        data['time'].values, data['voltage'].values, fs,
+        cutoff=filter_value, space=space, baseline_method=baseline_method,
+        source_fs=source_fs, file=file,
+        print_plot=print_plot and not plot_dir, max_min=extreme,
+        traces=traces))
+    filtered = traces.get('filtered', np.full(len(data), np.nan))
+    if np.isnan(np.sum(filtered)):
+        method = 0
+    else:
+        method = 1
+    print(interval)
+    with instrument.timer('metrics'):
+        bpm = calc_avg(interval, found, dur)
+        metrics = create_metrics(found, extreme, dur, bpm)
+    if print_plot:
+        plot_file = None
+        if plot_dir:
+            name = os.path.splitext(os.path.basename(file))[0] + '.png'
+            plot_file = os.path.join(plot_dir, name)
+        with instrument.timer('plot'):
+            plot_data(data, filtered, found['index'],
+                      file, method, user_interval, plot_file, renderer)
+    return metrics
+
+
+def file_number_of(file):
+    """ Finds the test_data number of a csv file
+
+    Args:
+        file: name of csv file
+
+    Returns:
+        numb: the number following 'data' in the file name
+    """
+    numb = os.path.basename(file).split('.')[0]
+    numb = numb.split('data')[1]
+    return numb
 
 
 def main():
@@ -496,10 +913,10 @@ def main():
     Returns: saved json file and lots of plots of viewing
 
     """
+    import matplotlib.pyplot as plt
     plt.close('all')
     new_path = os.getcwd() + '/data'
     os.chdir(new_path)
-    headers = ['time', 'voltage']
     export_excel = list()
     file_number = list()
     space = 1
@@ -509,35 +926,11 @@ def main():
         print(file)
         try:
             if file.split('.')[1] == 'csv':
-                data = pd.read_csv(file, names=headers)
-                extreme = calc_v_extreme(data)
-                dur = calc_duration(data)
-                interval = user_input(dur, user_interval)
-                data = is_data_valid(data)
-                avg_v = 0
-                for x in data['voltage']:
-                    avg_v += float(x)
-                avg_v /= len(data['voltage'])
-                data = edge_case(data, 150, avg_v)
-                filter_value = 0.005
-                filtered = Hilbert(data, filter_value)
-                if np.isnan(np.sum(filtered)):
-                    method = 0
-                else:
-                    method = 1
-                found = peak_detector(filtered, data)
-                found = check_loop(found, data, filter_value,
-                                   file, space, print_plot, extreme)
-                print(interval)
-                bpm = calc_avg(interval, found, dur)
-                metrics = create_metrics(found, extreme, dur, bpm)
-                if print_plot:
-                    plot_data(data, filtered, found['index'],
-                              file, method, user_interval)
+                metrics = analyze_file(file, user_interval, space,
+                                       print_plot)
                 write_json(file, metrics)
+                numb = file_number_of(file)
                 export_excel.append(metrics['num_beats'])
-                numb = file.split('.')[0]
-                numb = numb.split('data')[1]
                 file_number.append(numb)
         except IndexError:
             print('Ignore Folder')
@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import output
+
+MANIFEST = '.hrm_manifest.json'
+
+
+def fingerprint(file, params):
+    """ Hash of a csv file's contents together with detector parameters
+
+    Args:
+        file: name of csv file
+        params: dictionary of detector parameters
+
+    Returns:
+        digest: hex digest that changes with either the data or the
+        parameters
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    with open(file, 'rb') as infile:
+        for block in iter(lambda: infile.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(directory):
+    """ Reads the manifest of processed files in a directory
+
+    Args:
+        directory: folder holding the csv files
+
+    Returns:
+        manifest: dictionary of csv file path to its entry, empty if
+        there is no manifest yet
+    """
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.isfile(path):
+        return dict()
+    with open(path) as infile:
+        return json.load(infile)
+
+
+def save_manifest(directory, manifest):
+    """ Writes the manifest of processed files in a directory
+
+    Args:
+        directory: folder holding the csv files
+        manifest: dictionary of csv file path to its entry
+    """
+    path = os.path.join(directory, MANIFEST)
+    temp = path + '.tmp'
+    with open(temp, 'w') as outfile:
+        json.dump(manifest, outfile)
+    os.replace(temp, path)
+
+
+def _key(file, directory=None):
+    """ Manifest key of a csv file, its path relative to directory """
+    if directory is None:
+        return os.path.abspath(file)
+    return os.path.relpath(file, directory)
+
+
+def _target(file, output_dir=None, output_file=None):
+    """ Name of the file a csv file's metrics are written to """
+    if output_file:
+        return output_file
+    return output.json_name(file, output_dir)
+
+
+def is_current(file, params, manifest, output_dir=None, output_file=None,
+               written=None, directory=None):
+    """ Checks if a file's json output is up to date
+
+    The output must be the one the file was recorded with and must
+    still hold the file. The size and mtime of the csv are compared
+    next, so unchanged files are never read. If they differ the
+    contents are hashed, so a file that was only touched is still
+    found to be current.
+
+    Args:
+        file: name of csv file
+        params: dictionary of detector parameters
+        manifest: dictionary of csv file path to its entry
+        output_dir: folder holding the json output; next to the csv
+        when None
+        output_file: consolidated NDJSON file holding the output
+        instead of a json file per csv, or None
+        written: csv file names found in output_file, e.g. the keys of
+        output.read_ndjson; None when it could not be read
+        directory: folder of the manifest; files are looked up by
+        their path relative to it, or by absolute path when None
+
+    Returns:
+        current: True if the json output can be reused
+    """
+    entry = manifest.get(_key(file, directory))
+    if entry is None or entry['params'] != params or \
+            entry.get('output') != _target(file, output_dir, output_file):
+        return False
+    if output_file:
+        if written is None or file not in written:
+            return False
+    elif not os.path.isfile(output.json_name(file, output_dir)):
+        return False
+    stat = os.stat(file)
+    if entry['size'] == stat.st_size and \
+            entry['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if entry['hash'] != fingerprint(file, params):
+        return False
+    entry['size'] = stat.st_size
+    entry['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+
+def record(file, params, manifest, output_dir=None, output_file=None,
+           directory=None):
+    """ Marks a file as processed with the given parameters
+
+    Call it only once the metrics have been written to the output that
+    is_current will look in.
+
+    Args:
+        file: name of csv file
+        params: dictionary of detector parameters
+        manifest: dictionary of csv file path to its entry
+        output_dir: folder the json output was written to; next to the
+        csv when None
+        output_file: consolidated NDJSON file the output was written
+        to instead, or None
+        directory: folder of the manifest; files are recorded by their
+        path relative to it, or by absolute path when None
+
+    Returns:
+        manifest: the updated manifest
+    """
+    stat = os.stat(file)
+    manifest[_key(file, directory)] = {
+        'params': params,
+        'output': _target(file, output_dir, output_file),
+        'hash': fingerprint(file, params),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+    return manifest
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import hilbert
+import filters
+import baselines
+import main
+
+
+def as_batch(times, voltages):
+    """ Brings times and voltages of many recordings to one 2D shape
+
+    Args:
+        times: time array shared by every recording, or one row of
+        times per recording
+        voltages: n_recordings x n_samples array of voltages
+
+    Returns:
+        times: n_recordings x n_samples float array of times
+        voltages: n_recordings x n_samples float array of voltages
+    """
+    voltages = np.atleast_2d(np.asarray(voltages, dtype=float))
+    times = np.broadcast_to(np.asarray(times, dtype=float), voltages.shape)
+    return times, voltages
+
+
+def durations(times):
+    """ Duration of each recording, measured as calc_duration does
+
+    Args:
+        times: n_recordings x n_samples array of times
+
+    Returns:
+        dur: array of durations in seconds
+    """
+    times = np.atleast_2d(times)
+    return times[:, -1] - times[:, 1]
+
+
+def extremes(voltages):
+    """ Maximum and minimum voltage of each recording
+
+    Args:
+        voltages: n_recordings x n_samples array of voltages
+
+    Returns:
+        store: n_recordings x 2 array of maximum and minimum voltage,
+        in the order of calc_v_extreme
+    """
+    voltages = np.atleast_2d(voltages)
+    return np.column_stack((np.nanmax(voltages, axis=1),
+                            np.nanmin(voltages, axis=1)))
+
+
+def pad_batch(times, voltages, amount, levels):
+    """ Pads every recording the way edge_case_array pads one
+
+    Args:
+        times: n_recordings x n_samples array of times
+        voltages: n_recordings x n_samples array of voltages
+        amount: Number of points used to buffer either side of each row
+        levels: voltage to set the padding of each row to
+
+    Returns:
+        times: padded n_recordings x (n_samples + 2 amount) times
+        voltages: padded n_recordings x (n_samples + 2 amount) voltages
+    """
+    n_rows, n = voltages.shape
+    dt = filters.time_step(times, axis=1)[:, np.newaxis]
+    steps = dt * np.arange(amount)
+    padded_time = np.empty((n_rows, n + 2 * amount))
+    padded_time[:, :amount] = times[:, :1] - dt * 200 + steps
+    padded_time[:, amount:amount + n] = times
+    padded_time[:, amount + n:] = times[:, -1:] + steps
+    padded_voltage = np.empty_like(padded_time)
+    padded_voltage[:, :amount] = np.asarray(levels)[:, np.newaxis]
+    padded_voltage[:, amount:amount + n] = voltages
+    padded_voltage[:, amount + n:] = padded_voltage[:, :1]
+    return padded_time, padded_voltage
+
+
+def envelopes(voltages, cutoff, fs=None, axis=-1):
+    """ Low pass filtered Hilbert envelopes of many recordings at once
+
+    The analytic signal of every row is found with one batched FFT and
+    all rows go through a single sosfiltfilt call.
+
+    Args:
+        voltages: array of voltages with recordings along the other
+        axis
+        cutoff: cutoff frequency for butterworth filter
+        fs: sample rate in Hz if cutoff is in Hz; None if cutoff is
+        normalized
+        axis: axis holding the samples of each recording
+
+    Returns:
+        filtered: low pass filtered envelopes, same shape as voltages
+    """
+    amplitude_envelope = np.abs(hilbert(voltages, axis=axis))
+    return filters.low_pass(amplitude_envelope, cutoff, 2, fs, axis)
+
+
+def detect_batch(times, voltages, cutoff=0.005, amount=150, space=1):
+    """ Detects beats in many same-length recordings
+
+    Padding, envelopes and extremes are computed for all rows in single
+    vectorized calls; only the peak extraction visits each row. Each
+    row then goes through check_loop as in analyze_data, which widens
+    the cutoff when its beats are too far apart and falls back to
+    threshold detection when none are found, so every row gets the
+    beats of the hilbert detector.
+
+    Args:
+        times: time array shared by every recording, or one row of
+        times per recording
+        voltages: n_recordings x n_samples array of voltages
+        cutoff: cutoff frequency for butterworth filter
+        amount: Number of points used to buffer either side of each row
+        space: ensuring this distance between peaks
+
+    Returns:
+        offsets: int64 array of n_recordings + 1 offsets; the beats of
+        row i are at offsets[i]:offsets[i + 1] in the flat arrays
+        indices: flat int64 array of beat locations in the unpadded rows
+        beat_times: flat float64 array of beat times
+        extreme: n_recordings x 2 array of maximum and minimum voltage
+        dur: array of durations in seconds
+    """
+    times, voltages = as_batch(times, voltages)
+    extreme = extremes(voltages)
+    dur = durations(times)
+    levels = voltages.sum(axis=1) / voltages.shape[1]
+    padded_time, padded_voltage = pad_batch(times, voltages, amount, levels)
+    amplitude_envelope = np.abs(hilbert(padded_voltage, axis=-1))
+    filtered = filters.low_pass(amplitude_envelope, cutoff, 2, None, -1)
+    offsets = np.zeros(len(voltages) + 1, dtype=np.int64)
+    indices = list()
+    beat_times = list()
+    for row in range(len(voltages)):
+        data = pd.DataFrame({'time': padded_time[row],
+                             'voltage': padded_voltage[row]})
+        baseline = baselines.estimate(padded_voltage[row])
+        found = main.found_frame(*main.peak_detector_array(
+            filtered[row], padded_time[row], padded_voltage[row], baseline))
+        found = main.check_loop(found, data, cutoff, '', space, 0,
+                                tuple(extreme[row]), amplitude_envelope[row],
+                                baseline)
+        index = np.asarray(found['index'], dtype=np.int64)
+        offsets[row + 1] = offsets[row] + len(index)
+        indices.append(index - amount)
+        beat_times.append(np.asarray(found['time'], dtype=float))
+    indices = np.concatenate(indices) if indices else \
+        np.array([], dtype=np.int64)
+    beat_times = np.concatenate(beat_times) if beat_times else \
+        np.array([], dtype=float)
+    return offsets, indices, beat_times, extreme, dur
+
+
+def split(offsets, flat):
+    """ Splits a flat beat array back into one array per recording
+
+    Args:
+        offsets: offsets from detect_batch
+        flat: flat array from detect_batch
+
+    Returns:
+        rows: list of arrays, one per recording
+    """
+    return np.split(flat, offsets[1:-1])
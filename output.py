@@ -0,0 +1,163 @@
+import os
+import gzip
+import json
+import threading
+import numpy as np
+
+# Bytes of encoded lines held before they are written out
+BUFFER_SIZE = 1 << 20
+
+
+def json_name(file, directory=None):
+    """ Name of the json file holding the metrics of a csv file
+
+    Args:
+        file: name of csv file
+        directory: folder to put the json file in; next to the csv
+        when None
+
+    Returns:
+        name: the csv name with its last extension replaced by .json
+    """
+    name = os.path.splitext(file)[0] + '.json'
+    if directory is not None:
+        name = os.path.join(directory, os.path.basename(name))
+    return name
+
+
+def _default(value):
+    """ Converts numpy values the json encoder does not know """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(type(value).__name__ + ' is not json serializable')
+
+
+def encode(metrics, file=None):
+    """ Encodes a metrics dictionary as one line of json
+
+    Args:
+        metrics: dictionary containing necessary parameters for assignment
+        file: name of csv file to store under 'file' first, or None
+
+    Returns:
+        text: json text without a newline, loading back to metrics
+    """
+    if file is not None:
+        metrics = dict([('file', file)] + list(metrics.items()))
+    return json.dumps(metrics, default=_default)
+
+
+class MetricsWriter(object):
+    """ Writes the metrics of many recordings
+
+    With a path every recording is appended as one NDJSON line, holding
+    its csv name under 'file', to a single consolidated file, which is
+    gzip compressed when compress is True or the path ends in .gz.
+    Lines are buffered and written out in blocks of about buffer_size
+    bytes. Without a path one json file is written per recording, as
+    write_json does. Writes from several threads are safe.
+
+    Args:
+        path: name of the consolidated NDJSON file, or None for per
+        file json
+        directory: folder for the per file json files; next to each
+        csv when None
+        compress: True to gzip the consolidated file; decided by the
+        .gz extension when None
+        buffer_size: bytes of lines to hold before writing
+    """
+
+    def __init__(self, path=None, directory=None, compress=None,
+                 buffer_size=BUFFER_SIZE):
+        self.path = path
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self.pending = list()
+        self.pending_size = 0
+        self.count = 0
+        self.lock = threading.Lock()
+        self.stream = None
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+        if path is not None:
+            if compress is None:
+                compress = path.endswith('.gz')
+            if compress:
+                self.stream = gzip.open(path, 'wb')
+            else:
+                self.stream = open(path, 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, file, metrics):
+        """ Writes the metrics of one recording
+
+        Args:
+            file: name of csv file
+            metrics: dictionary containing necessary parameters for
+            assignment
+        """
+        if self.path is None:
+            text = encode(metrics)
+            with open(json_name(file, self.directory), 'w') as outfile:
+                outfile.write(text)
+            with self.lock:
+                self.count += 1
+            return
+        line = (encode(metrics, file) + '\n').encode('utf-8')
+        with self.lock:
+            if self.stream is None:
+                raise ValueError('Cannot write to a closed MetricsWriter')
+            self.pending.append(line)
+            self.pending_size += len(line)
+            self.count += 1
+            if self.pending_size >= self.buffer_size:
+                self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.stream.write(b''.join(self.pending))
+            self.pending = list()
+            self.pending_size = 0
+
+    def flush(self):
+        """ Writes out the buffered lines """
+        if self.stream is not None:
+            with self.lock:
+                self._flush()
+                self.stream.flush()
+
+    def close(self):
+        """ Writes out the buffered lines and closes the file """
+        if self.stream is not None:
+            with self.lock:
+                self._flush()
+                self.stream.close()
+                self.stream = None
+
+
+def read_ndjson(path):
+    """ Reads back a consolidated metrics file
+
+    Args:
+        path: name of an NDJSON file from MetricsWriter, gzip
+        compressed if it ends in .gz
+
+    Returns:
+        results: dictionary of csv file name to metrics, in the order
+        they were written
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    results = dict()
+    with opener(path, 'rt') as infile:
+        for line in infile:
+            if line.strip():
+                metrics = json.loads(line)
+                results[metrics.pop('file')] = metrics
+    return results
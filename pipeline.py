@@ -0,0 +1,209 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import output
+from batch import list_csv
+from batch import excel_rows
+from main import analyze_data
+from main import is_data_valid
+from main import write_json
+from main import write_excel
+
+
+def read_file(file):
+    """ Reads and validates one csv file; runs on an I/O thread
+
+    Args:
+        file: name of csv file
+
+    Returns:
+        data: data frame of time and voltage cast to floats
+    """
+    data = pd.read_csv(file, names=['time', 'voltage'])
+    return is_data_valid(data)
+
+
+async def produce(files, queue, io_pool):
+    """ Starts reading files ahead of the workers
+
+    Each read is started before it is queued, so up to the queue size
+    of files are read while earlier ones are analysed. A full queue
+    makes the producer wait, which bounds the memory held by reads
+    that are done but not yet analysed.
+
+    Args:
+        files: csv files to read
+        queue: bounded asyncio queue of (file, read future) pairs
+        io_pool: executor for blocking file I/O
+    """
+    loop = asyncio.get_event_loop()
+    for file in files:
+        await queue.put((file, loop.run_in_executor(io_pool, read_file,
+                                                    file)))
+
+
+async def write_metrics(file, metrics, write, io_pool, results, errors):
+    """ Writes the metrics of one file on an I/O thread
+
+    A failed write moves the file from results to errors, so the other
+    files are still analysed and written.
+
+    Args:
+        file: name of csv file
+        metrics: dictionary containing necessary parameters for
+        assignment
+        write: function of file and metrics that writes the metrics
+        io_pool: executor for blocking file I/O
+        results: dictionary of file to metrics
+        errors: dictionary of file to error message
+    """
+    try:
+        await asyncio.get_event_loop().run_in_executor(io_pool, write,
+                                                       file, metrics)
+    except Exception as e:
+        results.pop(file, None)
+        errors[file] = type(e).__name__ + ': ' + str(e)
+        logging.warning(file + ' failed: ' + errors[file])
+
+
+async def consume(queue, cpu_pool, io_pool, options, results, errors,
+                  writes, write=write_json):
+    """ Analyses queued files until a None item is met
+
+    Args:
+        queue: bounded asyncio queue of (file, read future) pairs
+        cpu_pool: executor for analyze_data
+        io_pool: executor for blocking file I/O
+        options: tuple of the analyze_data arguments after file
+        results: dictionary of file to metrics to fill
+        errors: dictionary of file to error message to fill
+        writes: list collecting the json write futures
+        write: function of file and metrics that writes the metrics
+    """
+    loop = asyncio.get_event_loop()
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        file, read = item
+        try:
+            data = await read
+            metrics = await loop.run_in_executor(cpu_pool, analyze_data,
+                                                 data, file, *options)
+        except Exception as e:
+            errors[file] = type(e).__name__ + ': ' + str(e)
+            logging.warning(file + ' failed: ' + errors[file])
+            continue
+        results[file] = metrics
+        writes.append(asyncio.ensure_future(write_metrics(
+            file, metrics, write, io_pool, results, errors)))
+
+
+async def run_pipeline(files, user_interval=(2, 3), space=1,
+                       filter_value=0.005, excel_file_name=None,
+                       workers=None, io_workers=4, prefetch=4,
+                       cpu_pool=None, output_file=None):
+    """ Analyses csv files with reads and writes overlapping the work
+
+    Reads run on a thread pool ahead of the analysis, which runs on a
+    process pool, and each json file is written on the thread pool as
+    soon as its file is done. The excel sheet is written last, in
+    file order.
+
+    Args:
+        files: csv files to analyse
+        user_interval: window in seconds over which to take the
+        average bpm
+        space: ensuring this distance between peaks
+        filter_value: cutoff frequency for butterworth filter
+        excel_file_name: name of the excel sheet to write, or None
+        workers: number of files analysed at once; all cores when None
+        io_workers: number of threads for reads and writes
+        prefetch: number of files read ahead of the analysis
+        cpu_pool: executor for the analysis; a process pool of workers
+        when None
+        output_file: name of one NDJSON file, gzip compressed if it
+        ends in .gz, to write all metrics to instead of a json file
+        per csv, or None
+
+    Returns:
+        results: dictionary of file to metrics
+        errors: dictionary of file to error message for the files
+        that failed
+    """
+    workers = workers or os.cpu_count() or 1
+    options = (user_interval, space, 0, filter_value)
+    results = dict()
+    errors = dict()
+    writes = list()
+    queue = asyncio.Queue(maxsize=prefetch)
+    own = cpu_pool is None
+    if own:
+        cpu_pool = ProcessPoolExecutor(max_workers=workers)
+    io_pool = ThreadPoolExecutor(max_workers=io_workers)
+    writer = output.MetricsWriter(output_file)
+    write = writer.write if output_file else write_json
+    try:
+        consumers = [asyncio.ensure_future(
+            consume(queue, cpu_pool, io_pool, options, results, errors,
+                    writes, write)) for worker in range(workers)]
+        await produce(files, queue, io_pool)
+        for consumer in consumers:
+            await queue.put(None)
+        await asyncio.gather(*consumers)
+        await asyncio.gather(*writes)
+        if excel_file_name:
+            file_number, export_excel = excel_rows(files, results)
+            await asyncio.get_event_loop().run_in_executor(
+                io_pool, write_excel, file_number, export_excel,
+                excel_file_name)
+    finally:
+        io_pool.shutdown()
+        writer.close()
+        if own:
+            cpu_pool.shutdown()
+    return results, errors
+
+
+def run_async_batch(directory='data', workers=None, user_interval=(2, 3),
+                    space=1, excel_file_name='Beat_Tracking.xlsx',
+                    filter_value=0.005, io_workers=4, prefetch=4,
+                    output_file=None):
+    """ Processes every csv file of a directory with run_pipeline
+
+    Args:
+        directory: folder holding the csv files and the excel sheet
+        workers: number of files analysed at once; all cores when None
+        user_interval: window in seconds over which to take the
+        average bpm
+        space: ensuring this distance between peaks
+        excel_file_name: name of the excel sheet in directory, or
+        None to skip it
+        filter_value: cutoff frequency for butterworth filter
+        io_workers: number of threads for reads and writes
+        prefetch: number of files read ahead of the analysis
+        output_file: name of one NDJSON file for all metrics, or None
+        for a json file per csv
+
+    Returns:
+        results: dictionary of file to metrics
+        errors: dictionary of file to error message for the files
+        that failed
+    """
+    if excel_file_name:
+        excel_file_name = os.path.join(directory, excel_file_name)
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run_pipeline(
+            list_csv(directory), user_interval, space, filter_value,
+            excel_file_name, workers, io_workers, prefetch,
+            output_file=output_file))
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    run_async_batch()
@@ -0,0 +1,144 @@
+from collections import deque
+import numpy as np
+import scipy.signal as signal
+import filters
+from main import REFRACTORY
+
+
+class RealtimeDetector(object):
+    """ Incremental peak detector for live ECG samples
+
+    Samples can be pushed one at a time or in small blocks. The
+    envelope is the rectified voltage passed through a causal
+    butterworth filter whose state is carried between calls, and the
+    peak state machine of peak_detector (switch, go and index_old) is
+    kept on the object, so each sample costs the same no matter how
+    long the detector has been running. The threshold is 1.2 times
+    the running modal voltage, as in peak_detector. Beats are only
+    looked for after warmup seconds, once the filter has settled from
+    its start at the first sample and the modal voltage has seen a few
+    beats; otherwise the start up transient is taken for a beat.
+
+    The causal filter delays the envelope by delay seconds, so each
+    beat is reported about that long after the beat found by
+    peak_detector on the whole recording.
+
+    Args:
+        fs: sample rate in Hz
+        cutoff: cutoff frequency for butterworth filter, normalized
+        like the filter_value of main
+        window: number of R-R intervals in the rolling mean bpm
+        hz: True if cutoff is in Hz rather than normalized
+        warmup: seconds of samples that only settle the filter and
+        the modal voltage before beats are looked for
+    """
+
+    def __init__(self, fs, cutoff=0.005, window=10, hz=False,
+                 warmup=2.0):
+        self.fs = float(fs)
+        self.warmup = int(round(warmup * self.fs))
+        # Two passes of the order 2 filter match the magnitude response
+        # of filtfilt in main, but only look at past samples
+        if hz:
+            sos = filters.butter_sos(2, float(cutoff), self.fs)
+        else:
+            sos = filters.butter_sos(2, float(cutoff))
+        self.sos = np.vstack((sos, sos))
+        self.delay = sum(signal.group_delay((section[:3], section[3:]),
+                                            w=[0.0])[1][0]
+                         for section in self.sos) / self.fs
+        self.zi = None
+        self.last = None
+        self.index = 0
+        self.y_old = None
+        self.index_old = -999
+        self.switch = False
+        self.go = False
+        self.counts = dict()
+        self.mode = None
+        self.beats = deque(maxlen=window + 1)
+
+    def update(self, time, voltage):
+        """ Pushes new samples through the detector
+
+        Missing voltages are replaced by the last valid one before
+        filtering and are left out of the modal voltage.
+
+        Args:
+            time: time of the new samples in seconds, scalar or array
+            voltage: voltage of the new samples, scalar or array
+
+        Returns:
+            found: list of tuples of sample index, time, and rolling
+            mean bpm for each beat confirmed by these samples
+        """
+        time = np.atleast_1d(np.asarray(time, dtype=float))
+        voltage = np.atleast_1d(np.asarray(voltage, dtype=float))
+        rectified = np.abs(voltage)
+        valid = ~np.isnan(rectified)
+        if not valid.all():
+            # Missing samples repeat the last valid one, so they cannot
+            # poison the filter state
+            if self.last is None:
+                if not valid.any():
+                    self.index += len(rectified)
+                    return list()
+                self.last = rectified[valid][0]
+            latest = np.maximum.accumulate(
+                np.where(valid, np.arange(len(rectified)), -1))
+            rectified = np.where(latest >= 0,
+                                 rectified[np.maximum(latest, 0)],
+                                 self.last)
+        self.last = rectified[-1]
+        if self.zi is None:
+            self.zi = signal.sosfilt_zi(self.sos) * rectified[0]
+            self.y_old = rectified[0]
+        filtered, self.zi = signal.sosfilt(self.sos, rectified,
+                                           zi=self.zi)
+        found = list()
+        for t, v, y in zip(time.tolist(), voltage.tolist(),
+                           filtered.tolist()):
+            self.count(v)
+            if y - self.y_old > 0 and t > 0 and \
+                    self.index >= self.warmup:
+                self.go = True
+            if y - self.y_old <= 0 and \
+                    self.index - self.index_old > REFRACTORY \
+                    and self.switch is False and self.go is True:
+                if self.mode is not None and \
+                        y > self.mode + .2 * self.mode:
+                    self.beats.append(t)
+                    found.append((self.index, t, self.bpm()))
+                    self.index_old = self.index
+                    self.switch = True
+            if y - self.y_old > 0 and self.go is True:
+                self.switch = False
+            self.y_old = y
+            self.index += 1
+        return found
+
+    def count(self, v):
+        """ Adds one voltage to the running modal voltage
+
+        Args:
+            v: voltage of the new sample
+        """
+        if v != v:
+            return
+        key = int(round(v * 10))
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self.mode is None or \
+                self.counts[key] > self.counts[int(round(self.mode * 10))]:
+            self.mode = key / 10.0
+
+    def bpm(self):
+        """ Rolling mean heart rate over the last few beats
+
+        Returns:
+            bpm: beats per minute over the stored R-R intervals, or
+            None before the second beat
+        """
+        if len(self.beats) < 2:
+            return None
+        span = self.beats[-1] - self.beats[0]
+        return (len(self.beats) - 1) / span * 60
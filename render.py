@@ -0,0 +1,185 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+def decimate_minmax(x, y, buckets):
+    """ Shrinks a trace to the min and max of each pixel bucket
+
+    Args:
+        x: x values of the trace
+        y: y values of the trace
+        buckets: number of buckets, usually the plot width in pixels
+
+    Returns:
+        x: decimated x values, in their original order
+        y: decimated y values, which keep every peak and trough
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(y) <= 2 * buckets:
+        return x, y
+    size = int(np.ceil(len(y) / float(buckets)))
+    usable = len(y) // size * size
+    blocks = y[:usable].reshape(-1, size)
+    missing = np.isnan(blocks)
+    starts = np.arange(0, usable, size)
+    low = np.argmin(np.where(missing, np.inf, blocks), axis=1) + starts
+    high = np.argmax(np.where(missing, -np.inf, blocks), axis=1) + starts
+    keep = np.unique(np.concatenate((low, high,
+                                     np.arange(usable, len(y)))))
+    return x[keep], y[keep]
+
+
+def render_plot(trace, envelope, peaks, file, output, user_interval=(0, 0),
+                width=1600, dpi=100):
+    """ Saves the plot of plot_data to a file without a display
+
+    The figure is drawn with the Agg canvas directly, so no window is
+    opened and pyplot state is never touched.
+
+    Args:
+        trace: tuple of time and voltage of the data with padded ends
+        envelope: tuple of time and low pass enveloped data, or None
+        peaks: tuple of time and voltage of found peaks
+        file: name of csv file
+        output: name of the .png or .svg file to write
+        user_interval: window in seconds marked on the plot
+        width: width of the image in pixels
+        dpi: resolution of the image
+
+    Returns:
+        output: name of the written file
+    """
+    fig = Figure(figsize=(width / float(dpi), 6), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.plot(*decimate_minmax(trace[0], trace[1], width))
+    ax.scatter(peaks[0], peaks[1], c='red')
+    if envelope is not None and np.isnan(np.sum(envelope[1])):
+        envelope = None
+    if envelope is not None:
+        ax.plot(*decimate_minmax(envelope[0], envelope[1], width))
+    if 0 < user_interval[0] < user_interval[1]:
+        if np.max(trace[0]) > user_interval[1] > user_interval[0]:
+            ax.axvline(x=user_interval[0], c='orange')
+            ax.axvline(x=user_interval[1], c='orange')
+    ax.axis('tight')
+    ax.set_ylabel('Voltage')
+    ax.set_xlabel('Time (s)')
+    ax.set_title('ECG with Peak Detection: ' + str(file))
+    if envelope is not None:
+        ax.legend(['ECG', 'LPF Envelope', 'User Window',
+                   'User Window', 'Detected Peak', ])
+    else:
+        ax.legend(['ECG', 'User Window', 'User Window', 'Detected Peak', ])
+    fig.savefig(output)
+    return output
+
+
+class PlotJobs(object):
+    """ Collects plots to be rendered elsewhere
+
+    Takes the place of a PlotRenderer inside a worker process, which
+    cannot reach the renderer's pool. The decimated plots are sent
+    back with the results and submitted to a PlotRenderer there.
+
+    Args:
+        width: width of the images in pixels
+    """
+
+    def __init__(self, width=1600):
+        self.width = width
+        self.jobs = list()
+
+    def submit(self, trace, envelope, peaks, file, output,
+               user_interval=(0, 0)):
+        """ Keeps a decimated plot for later
+
+        Args:
+            trace: tuple of time and voltage of the data with padded ends
+            envelope: tuple of time and low pass enveloped data, or None
+            peaks: tuple of time and voltage of found peaks
+            file: name of csv file
+            output: name of the .png or .svg file to write
+            user_interval: window in seconds marked on the plot
+        """
+        trace = decimate_minmax(trace[0], trace[1], self.width)
+        if envelope is not None:
+            envelope = decimate_minmax(envelope[0], envelope[1],
+                                       self.width)
+        self.jobs.append((trace, envelope, peaks, file, output,
+                          tuple(user_interval)))
+
+
+class PlotRenderer(object):
+    """ Renders plots on a pool of background processes
+
+    Traces are decimated before they are sent to the pool, so only a
+    few thousand points per plot cross the process boundary and
+    detection can carry on while plots are drawn. Plots that fail to
+    render are listed in errors, by csv file, once close returns.
+
+    Args:
+        workers: number of rendering processes
+        width: width of the images in pixels
+    """
+
+    def __init__(self, workers=1, width=1600):
+        self.width = width
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.futures = list()
+        self.errors = dict()
+
+    def submit(self, trace, envelope, peaks, file, output,
+               user_interval=(0, 0)):
+        """ Queues a plot for rendering
+
+        Args:
+            trace: tuple of time and voltage of the data with padded ends
+            envelope: tuple of time and low pass enveloped data, or None
+            peaks: tuple of time and voltage of found peaks
+            file: name of csv file
+            output: name of the .png or .svg file to write
+            user_interval: window in seconds marked on the plot
+
+        Returns:
+            future: future holding the name of the written file
+        """
+        trace = decimate_minmax(trace[0], trace[1], self.width)
+        if envelope is not None:
+            envelope = decimate_minmax(envelope[0], envelope[1],
+                                       self.width)
+        future = self.pool.submit(render_plot, trace, envelope, peaks,
+                                  file, output, user_interval, self.width)
+        self.futures.append((file, future))
+        return future
+
+    def close(self):
+        """ Waits for every queued plot and stops the pool
+
+        A plot that fails to render does not stop the others; its error
+        is kept in errors under the name of its csv file.
+
+        Returns:
+            outputs: names of the written files, in submission order,
+            with None for plots that failed
+        """
+        outputs = list()
+        try:
+            for file, future in self.futures:
+                try:
+                    outputs.append(future.result())
+                except Exception as e:
+                    self.errors[file] = type(e).__name__ + ': ' + str(e)
+                    outputs.append(None)
+        finally:
+            self.pool.shutdown()
+        return outputs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
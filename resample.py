@@ -0,0 +1,181 @@
+import logging
+from fractions import Fraction
+import numpy as np
+import pandas as pd
+from scipy.signal import resample_poly
+import filters
+
+
+def resolution(time, max_decimals=9):
+    """ Step that the timestamps of a recording were rounded to
+
+    Args:
+        time: time array in seconds
+        max_decimals: most decimals to try
+
+    Returns:
+        quantum: 10 ** -decimals for the fewest decimals that hold
+        every time, or 0.0 when more than max_decimals are needed
+    """
+    time = np.asarray(time, dtype=float)
+    time = time[np.isfinite(time)]
+    for decimals in range(max_decimals + 1):
+        scaled = time * 10 ** decimals
+        if np.all(np.abs(scaled - np.rint(scaled)) < 1e-6):
+            return 10.0 ** -decimals
+    return 0.0
+
+
+def inspect(time, gap_factor=1.5):
+    """ Estimates the sample rate of a recording and checks its spacing
+
+    Steps that differ from the median step by no more than the rounding
+    of the timestamps, e.g. 2 and 3 ms steps of a 360 Hz recording
+    written to the millisecond, are not counted as uneven. The rate of
+    such a uniform recording is then taken over its whole span, where
+    the rounding averages out.
+
+    Args:
+        time: time array in seconds
+        gap_factor: steps longer than this many median steps are gaps
+
+    Returns:
+        report: dictionary of the sample rate 'fs', median step 'dt',
+        'jitter' (standard deviation of the steps that are not gaps,
+        relative to dt), 'resolution' of the timestamps from
+        resolution(), number of 'gaps', 'gap_seconds' of time lost to
+        them, and 'uniform', True when there are no gaps and no jitter
+        beyond the resolution
+    """
+    time = np.asarray(time, dtype=float)
+    known = time[~np.isnan(time)]
+    steps = np.diff(known)
+    dt = float(filters.time_step(time))
+    gaps = steps > gap_factor * dt
+    jitter = float(np.std(steps[~gaps]) / dt) if len(steps) else 0.0
+    quantum = resolution(time)
+    report = {'fs': 1.0 / dt, 'dt': dt, 'jitter': jitter,
+              'resolution': quantum, 'gaps': int(gaps.sum()),
+              'gap_seconds': float(np.sum(steps[gaps] - dt))}
+    even = jitter < 0.01
+    if not even and len(steps):
+        even = np.max(np.abs(steps[~gaps] - dt)) <= quantum + 0.01 * dt
+    report['uniform'] = report['gaps'] == 0 and bool(even)
+    if report['uniform'] and len(steps):
+        report['dt'] = float((known[-1] - known[0]) / len(steps))
+        report['fs'] = 1.0 / report['dt']
+    return report
+
+
+def rational(ratio, max_denominator=100):
+    """ Up and down factors for resample_poly close to a ratio
+
+    Args:
+        ratio: new sample rate over old sample rate
+        max_denominator: largest factor to allow
+
+    Returns:
+        up: upsampling factor
+        down: downsampling factor
+    """
+    fraction = Fraction(ratio).limit_denominator(max_denominator)
+    return fraction.numerator, fraction.denominator
+
+
+def regularize(time, voltage, fs):
+    """ Linearly interpolates a recording onto an even time grid
+
+    Missing times and voltages are dropped first, so gaps are bridged.
+
+    Args:
+        time: time array in seconds
+        voltage: voltage array
+        fs: sample rate of the grid in Hz
+
+    Returns:
+        time: evenly spaced times from the first to the last sample
+        voltage: voltages at those times
+    """
+    time = np.asarray(time, dtype=float)
+    voltage = np.asarray(voltage, dtype=float)
+    keep = ~(np.isnan(time) | np.isnan(voltage))
+    time = time[keep]
+    voltage = voltage[keep]
+    grid = time[0] + np.arange(int(np.floor((time[-1] - time[0]) * fs +
+                                            1e-6)) + 1) / fs
+    return grid, np.interp(grid, time, voltage)
+
+
+def resample(time, voltage, target_fs, fs=None):
+    """ Polyphase resampling of an evenly spaced recording
+
+    Args:
+        time: evenly spaced time array in seconds
+        voltage: voltage array
+        target_fs: sample rate to resample to in Hz
+        fs: sample rate of the recording; found from time when None
+
+    Returns:
+        time: times of the resampled recording
+        voltage: resampled voltages
+        fs: the sample rate reached, which is target_fs unless the
+        ratio had to be rounded
+    """
+    time = np.asarray(time, dtype=float)
+    if fs is None:
+        fs = filters.sample_rate(time)
+    up, down = rational(target_fs / fs)
+    voltage = resample_poly(np.asarray(voltage, dtype=float), up, down)
+    fs = fs * up / down
+    if abs(fs - target_fs) <= 1e-9 * target_fs:
+        fs = float(target_fs)
+    time = time[0] + np.arange(len(voltage)) / fs
+    return time, voltage, fs
+
+
+def ingest(data, target_fs=None, max_fs=None, tolerance=0.01):
+    """ Checks the sample rate of a recording and resamples it if asked
+
+    Recordings with gaps, or jitter beyond the rounding of their
+    timestamps, are put on an even grid before they are resampled.
+    Without a target, or when the recording is already at it, the data
+    is returned unchanged.
+
+    Args:
+        data: data frame of time and voltage, as from is_data_valid
+        target_fs: canonical sample rate in Hz to bring every
+        recording to, or None
+        max_fs: recordings sampled faster than this are decimated to
+        it, or None
+        tolerance: relative difference in sample rate that is ignored
+
+    Returns:
+        data: data frame of time and voltage at the new sample rate
+        report: dictionary from inspect, with 'resampled_fs' set to the
+        new sample rate or None
+    """
+    report = inspect(data['time'])
+    report['resampled_fs'] = None
+    if report['gaps']:
+        logging.warning(str(report['gaps']) + ' gaps found, ' +
+                        str(report['gap_seconds']) + ' s missing')
+    fs = report['fs']
+    new_fs = target_fs
+    if new_fs is None and max_fs and fs > max_fs:
+        new_fs = max_fs
+    if new_fs is None or (abs(new_fs - fs) <= tolerance * fs and
+                          report['uniform']):
+        return data, report
+    time, voltage = data['time'].values, data['voltage'].values
+    if abs(new_fs - fs) <= tolerance * fs:
+        # Close enough that interpolating onto the new grid will do
+        fs = float(new_fs)
+        time, voltage = regularize(time, voltage, fs)
+    else:
+        if not report['uniform'] or np.isnan(voltage).any():
+            time, voltage = regularize(time, voltage, fs)
+        time, voltage, fs = resample(time, voltage, new_fs, fs)
+    report['resampled_fs'] = fs
+    data = pd.DataFrame({'time': time, 'voltage': voltage},
+                        columns=['time', 'voltage'])
+    return data, report
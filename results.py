@@ -0,0 +1,167 @@
+import json
+import struct
+import numpy as np
+import hrv
+
+# Magic, version, number of beats, maximum and minimum voltage,
+# duration and bpm; missing values are stored as NaN
+HEADER = struct.Struct('<4sIq4d')
+MAGIC = b'BEAT'
+VERSION = 1
+
+
+class BeatResult(object):
+    """ Detected beats of one recording as contiguous arrays
+
+    Columns are read like a data frame, e.g. result['time'], so code
+    written for the found data frame keeps working, but nothing is
+    built through pandas. The voltage extremes, duration and bpm of
+    the recording are kept alongside once they are known.
+
+    Args:
+        index: locations of found peaks
+        time: times of found peaks
+        voltage: voltages of found peaks
+        extremes: tuple of maximum and minimum voltage, or None
+        duration: duration of the recording in seconds, or None
+        bpm: average beats per minute, or None
+    """
+    __slots__ = ('index', 'time', 'voltage', 'extremes', 'duration', 'bpm')
+    COLUMNS = ('index', 'time', 'voltage')
+
+    def __init__(self, index, time, voltage, extremes=None, duration=None,
+                 bpm=None):
+        self.index = np.ascontiguousarray(index, dtype=np.int64)
+        self.time = np.ascontiguousarray(time, dtype=np.float64)
+        self.voltage = np.ascontiguousarray(voltage, dtype=np.float64)
+        self.extremes = extremes
+        self.duration = duration
+        self.bpm = bpm
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, column):
+        if column not in self.COLUMNS:
+            raise KeyError(column)
+        return getattr(self, column)
+
+    @property
+    def empty(self):
+        """ True if no beats were found """
+        return len(self.index) == 0
+
+    @classmethod
+    def from_frame(cls, found):
+        """ Builds a result from a data frame or anything with index,
+        time and voltage columns
+
+        Args:
+            found: data frame containing index, time, and voltage of
+            found peaks; only time is required, a missing index is
+            filled with -1 and a missing voltage with NaN
+
+        Returns:
+            result: BeatResult with the same beats
+        """
+        time = np.asarray(found['time'])
+        index = np.full(len(time), -1)
+        voltage = np.full(len(time), np.nan)
+        if 'index' in found:
+            index = np.asarray(found['index'])
+        if 'voltage' in found:
+            voltage = np.asarray(found['voltage'])
+        return cls(index, time, voltage)
+
+    def to_frame(self):
+        """ The beats as the found data frame
+
+        Returns:
+            found: data frame with index, time and voltage columns
+        """
+        import pandas as pd
+        return pd.DataFrame({'index': self.index, 'time': self.time,
+                             'voltage': self.voltage},
+                            columns=list(self.COLUMNS))
+
+    def to_dict(self, hrv_stats=False):
+        """ Metrics dictionary in the layout of create_metrics
+
+        Args:
+            hrv_stats: True to add heart rate variability statistics
+            under 'hrv'
+
+        Returns:
+            metrics: dictionary requested by assignment
+        """
+        metrics = dict()
+        metrics['voltage_extremes'] = self.extremes
+        metrics['duration'] = self.duration
+        metrics['num_beats'] = len(self.time)
+        metrics['mean_hr_bpm'] = self.bpm
+        metrics['beats'] = self.time.tolist()
+        if hrv_stats:
+            metrics['hrv'] = hrv.hrv_metrics(self.time)
+        return metrics
+
+    def to_json(self, hrv_stats=False):
+        """ Metrics dictionary encoded as json
+
+        Args:
+            hrv_stats: True to add heart rate variability statistics
+
+        Returns:
+            text: json text of to_dict
+        """
+        metrics = self.to_dict(hrv_stats)
+        if metrics['voltage_extremes'] is not None:
+            metrics['voltage_extremes'] = [
+                float(x) for x in metrics['voltage_extremes']]
+        return json.dumps(metrics)
+
+    def to_bytes(self):
+        """ Packs the result into a compact binary record
+
+        Returns:
+            record: header followed by the index, time and voltage
+            arrays in little endian order
+        """
+        extremes = self.extremes or (np.nan, np.nan)
+        header = HEADER.pack(MAGIC, VERSION, len(self),
+                             float(extremes[0]), float(extremes[1]),
+                             _or_nan(self.duration), _or_nan(self.bpm))
+        return b''.join((header, self.index.astype('<i8').tobytes(),
+                         self.time.astype('<f8').tobytes(),
+                         self.voltage.astype('<f8').tobytes()))
+
+    @classmethod
+    def from_bytes(cls, record):
+        """ Unpacks a record made by to_bytes
+
+        Args:
+            record: bytes from to_bytes
+
+        Returns:
+            result: the BeatResult that was packed
+        """
+        magic, version, n, high, low, duration, bpm = \
+            HEADER.unpack_from(record)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a version ' + str(VERSION) +
+                             ' beat record')
+        arrays = np.frombuffer(record, dtype='<f8', count=3 * n,
+                               offset=HEADER.size)
+        extremes = None
+        if not (np.isnan(high) and np.isnan(low)):
+            extremes = (high, low)
+        return cls(arrays[:n].view('<i8'), arrays[n:2 * n],
+                   arrays[2 * n:], extremes, _or_none(duration),
+                   _or_none(bpm))
+
+
+def _or_nan(value):
+    return float('nan') if value is None else float(value)
+
+
+def _or_none(value):
+    return None if np.isnan(value) else value
@@ -0,0 +1,266 @@
+import logging
+import numpy as np
+import pandas as pd
+import filters
+from main import Hilbert
+from main import REFRACTORY
+from main import validate_columns
+
+
+def scan_levels(file, chunk_size=100000):
+    """ First pass over a csv file for the voltage levels of detection
+
+    Args:
+        file: name of csv file
+        chunk_size: number of rows read from the file at a time
+
+    Returns:
+        baseline: modal voltage of the whole recording, as
+        baselines.modal_baseline finds it
+        level: mean voltage of the whole recording, used for padding
+    """
+    headers = ['time', 'voltage']
+    counts = dict()
+    total = 0.0
+    seen = 0
+    for chunk in pd.read_csv(file, names=headers, chunksize=chunk_size):
+        chunk_time, chunk_voltage, report = validate_columns(chunk)
+        update_histogram(counts, chunk_voltage)
+        total += np.nansum(chunk_voltage)
+        seen += len(chunk_voltage)
+    level = total / seen if seen else 0.0
+    return mode(counts), level
+
+
+def stream_peaks(file, chunk_size=100000, overlap=8000, cutoff=0.005,
+                 amount=150, baseline=None, level=None, window=100000):
+    """ Detects beats in a csv file without loading it whole
+
+    The file is read chunk_size rows at a time. The recording is split
+    into windows of window samples on a fixed grid, each enveloped
+    together with overlap samples of context on either side, and only
+    the window itself is searched. The detector state is carried from
+    one window to the next, so no beat is lost or counted twice at a
+    seam. The grid does not depend on chunk_size, so every chunk size
+    gives the same beats, and a recording that fits in one window gets
+    exactly the beats peak_detector_array finds on it after edge_case.
+
+    The Hilbert envelope of a sample depends on the whole recording, so
+    beats of a recording longer than one window only approximate the
+    beats of the whole file: counts can differ and beats can move near
+    any seam. More overlap brings the envelope of each window closer to
+    the whole file's.
+
+    The threshold and padding need the modal and mean voltage of the
+    whole recording. Unless both are given, they are found by a first
+    pass over the file with scan_levels.
+
+    Args:
+        file: name of csv file
+        chunk_size: number of rows read from the file at a time
+        overlap: number of samples of context kept on either side of
+        a window; should cover the baseline wander of the recording
+        cutoff: cutoff frequency for butterworth filter
+        amount: number of points used to pad the start and end of
+        the recording, as in edge_case
+        baseline: voltage peaks must clear 1.2 times of, or None
+        level: voltage to pad the recording with, or None
+        window: number of samples searched per window; memory use
+        grows with window + 2 overlap + chunk_size
+
+    Yields:
+        beat: tuple of sample index, time, and envelope voltage of
+        each detected peak, in order
+    """
+    if baseline is None or level is None:
+        found_baseline, found_level = scan_levels(file, chunk_size)
+        baseline = found_baseline if baseline is None else baseline
+        level = found_level if level is None else level
+    headers = ['time', 'voltage']
+    time = np.array([], dtype=np.float64)
+    voltage = np.array([], dtype=np.float64)
+    start = 0
+    done = 0
+    state = new_state()
+    for chunk in pd.read_csv(file, names=headers, chunksize=chunk_size):
+        chunk_time, chunk_voltage, report = validate_columns(chunk)
+        time = np.concatenate((time, chunk_time))
+        voltage = np.concatenate((voltage, chunk_voltage))
+        # A window touching the last sample read may end the recording,
+        # so it waits for more data or the end of the file
+        while done + window + overlap < start + len(voltage):
+            stop = done + window
+            end = stop + overlap - start
+            for beat in window_peaks(time[:end], voltage[:end], start,
+                                     done, stop, cutoff, amount, level,
+                                     baseline, state, final=False):
+                yield beat
+            done = stop
+            keep = max(done - overlap - start, 0)
+            time = time[keep:]
+            voltage = voltage[keep:]
+            start += keep
+    if len(voltage) > 0:
+        stop = start + len(voltage)
+        for beat in window_peaks(time, voltage, start, done, stop,
+                                 cutoff, amount, level, baseline, state,
+                                 final=True):
+            yield beat
+    logging.info('Streamed ' + str(start + len(voltage)) +
+                 ' samples from ' + str(file))
+
+
+def new_state():
+    """ Detector state at the start of a recording
+
+    Returns:
+        state: dictionary of 'started' (a rise after time 0 was seen),
+        'armed' (the run of samples since the last rise has not given
+        a peak yet) and 'index_old' (sample index of the last peak)
+    """
+    return {'started': False, 'armed': False, 'index_old': -999}
+
+
+def owned_peaks(filtered, time, lo, hi, offset, baseline, state):
+    """ peak_detector_array over part of an envelope, resumable
+
+    Samples lo to hi of the envelope are searched with the rules of
+    peak_detector_array, starting from the state left by the previous
+    part and updating it, so searching a recording part by part finds
+    the same peaks as searching it whole.
+
+    Args:
+        filtered: envelope with low pass butterworth filter, with the
+        sample before lo included when there is one
+        time: time array of the envelope
+        lo: first sample to search
+        hi: sample after the last one to search
+        offset: added to positions in filtered to give sample indices
+        of the recording
+        baseline: voltage peaks must clear 1.2 times of
+        state: dictionary from new_state, updated in place
+
+    Returns:
+        indices: int64 array of peak locations in filtered
+    """
+    empty = np.array([], dtype=np.int64)
+    if hi <= lo:
+        return empty
+    step = np.diff(filtered[max(lo - 1, 0):hi], prepend=filtered[0])
+    if lo > 0:
+        step = step[1:]
+    rising = step > 0
+    eligible = ~rising & (filtered[lo:hi] > baseline + .2 * baseline)
+    if not state['started']:
+        begin = np.flatnonzero(rising & (time[lo:hi] > 0))
+        if len(begin) == 0:
+            return empty
+        eligible[:begin[0] + 1] = False
+        state['started'] = True
+        state['armed'] = False
+    # Run 0 is the run that was open at the end of the previous part
+    run = np.cumsum(rising)
+    if not state['armed']:
+        eligible &= run > 0
+    candidates = np.flatnonzero(eligible)
+    groups = run[candidates]
+    first = np.flatnonzero(np.diff(groups, prepend=-1))
+    last = np.append(first[1:], len(candidates))
+    indices = list()
+    index_old = state['index_old']
+    for a, b in zip(first, last):
+        if candidates[a] + lo + offset - index_old <= REFRACTORY:
+            a += np.searchsorted(candidates[a:b] + lo + offset,
+                                 index_old + REFRACTORY, side='right')
+            if a == b:
+                continue
+        index_old = candidates[a] + lo + offset
+        indices.append(candidates[a] + lo)
+    state['index_old'] = index_old
+    picked = len(indices) > 0 and run[indices[-1] - lo] == run[-1]
+    if run[-1] > 0:
+        state['armed'] = not picked
+    else:
+        state['armed'] = state['armed'] and not picked
+    return np.array(indices, dtype=np.int64)
+
+
+def window_peaks(time, voltage, start, done, stop, cutoff, amount, level,
+                 baseline, state, final):
+    """ Detects peaks in the part of a window it owns
+
+    Args:
+        time: time array of the window
+        voltage: voltage array of the window
+        start: sample index of the first point in the window
+        done: first sample index owned by this window
+        stop: sample index after the last one owned by this window
+        cutoff: cutoff frequency for butterworth filter
+        amount: number of points used to pad the recording edges
+        level: voltage to set padding to
+        baseline: voltage peaks must clear 1.2 times of
+        state: detector state from new_state, carried between windows
+        final: True if the window ends the recording
+
+    Returns:
+        beats: list of tuples of sample index, time, and envelope
+        voltage of the owned peaks
+    """
+    n = len(time)
+    dt = filters.time_step(time) if n > 1 else 1.0
+    pre = amount if start == 0 else 0
+    post = amount if final else 0
+    padded_time = np.empty(pre + n + post)
+    padded_voltage = np.full(pre + n + post, level)
+    # Same padding times as edge_case_array
+    steps = dt * np.arange(amount)
+    padded_time[:pre] = (time[0] - dt * 200 + steps)[:pre]
+    padded_time[pre:pre + n] = time
+    padded_time[pre + n:] = (time[-1] + steps)[:post]
+    padded_voltage[pre:pre + n] = voltage
+    if len(padded_voltage) <= 9:
+        return []
+    filtered = np.asarray(Hilbert(pd.DataFrame({'voltage': padded_voltage}),
+                                  cutoff))
+    # The padding at either end of the recording belongs to the
+    # first and last windows
+    lo = 0 if done == 0 else done - start + pre
+    hi = len(filtered) if final else stop - start + pre
+    indices = owned_peaks(filtered, padded_time, lo, hi, start - pre,
+                          baseline, state)
+    return list(zip((indices - pre + start).tolist(),
+                    padded_time[indices].tolist(),
+                    filtered[indices].tolist()))
+
+
+def update_histogram(counts, voltage):
+    """ Adds voltages rounded to 0.1 to a running histogram
+
+    Args:
+        counts: dictionary of rounded voltage (in tenths) to count
+        voltage: voltage array to add
+
+    Returns:
+        counts: the updated histogram
+    """
+    voltage = voltage[~np.isnan(voltage)]
+    values, found = np.unique(np.round(voltage * 10).astype(np.int64),
+                              return_counts=True)
+    for value, count in zip(values.tolist(), found.tolist()):
+        counts[value] = counts.get(value, 0) + count
+    return counts
+
+
+def mode(counts):
+    """ Most common voltage of a running histogram
+
+    Args:
+        counts: dictionary of rounded voltage (in tenths) to count
+
+    Returns:
+        voltage: the modal voltage, or 0 if nothing has been counted
+    """
+    if not counts:
+        return 0.0
+    value = max(sorted(counts), key=counts.get)
+    return value / 10.0
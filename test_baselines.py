@@ -0,0 +1,154 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pytest import approx
+from baselines import quantize
+from baselines import modal_baseline
+from baselines import median_baseline
+from baselines import rolling_baseline
+from baselines import estimate
+from main import peak_detector_array
+
+
+@pytest.mark.parametrize("voltage, expected", [
+    ([0.04, -0.26, 1.15, np.nan], [0, -3, 12]),
+    ([0.5, np.inf, -np.inf, 1e30, -0.1], [5, -1]),
+    ([], []),
+])
+def test_quantize(voltage, expected):
+    """
+
+    Args:
+        voltage: voltages to round
+        expected: voltage bins in tenths of a volt
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == list(quantize(voltage))
+
+
+@pytest.mark.parametrize("voltage, expected", [
+    ([-0.25, -0.26, -0.24, 1.2, 0.5], -0.2),
+    ([-0.31, -0.29, 0.2, 0.21, np.nan, np.nan, np.nan], -0.3),
+    ([np.nan], None),
+    ([0.1, 0.1, 1e9, -1e9, 0.3], 0.1),
+    ([np.inf, -0.3, -0.3, -np.inf, np.nan, 0.2], -0.3),
+    ([1e17, 1e17, -5.0], 1e17),
+])
+def test_modal_baseline(voltage, expected):
+    """
+
+    Args:
+        voltage: voltages of a recording
+        expected: modal voltage, lowest on ties; None when NaN
+
+    Returns: Pass or Fail
+
+    """
+    out = modal_baseline(voltage)
+    if expected is None:
+        assert np.isnan(out)
+    else:
+        assert expected == approx(out)
+
+
+@pytest.mark.parametrize("file", [
+    'test_data1.csv',
+    'test_data22.csv',
+])
+def test_modal_baseline_matches_unique(file):
+    """
+
+    Args:
+        file: name of csv file
+
+    Returns: Pass or Fail
+
+    """
+    voltage = pd.read_csv(file, names=['time', 'voltage'])['voltage']
+    voltage = voltage.dropna().values
+    values, counts = np.unique(np.round(voltage, 1), return_counts=True)
+    assert values[np.argmax(counts)] == approx(modal_baseline(voltage))
+
+
+@pytest.mark.parametrize("voltage, expected", [
+    ([1, 2, 100, np.nan], 2),
+])
+def test_median_baseline(voltage, expected):
+    """
+
+    Args:
+        voltage: voltages of a recording
+        expected: median voltage
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == median_baseline(voltage)
+
+
+@pytest.mark.parametrize("n, window", [
+    (2500, 1000),
+    (10000, 1000),
+    (500, 1000),
+])
+def test_rolling_baseline(n, window):
+    """
+
+    Args:
+        n: number of samples of a linear drift
+        window: number of samples per block
+
+    Returns: Pass or Fail
+
+    """
+    voltage = np.arange(n, dtype=float)
+    baseline = rolling_baseline(voltage, window)
+    assert n == len(baseline)
+    if n > window:
+        middle = slice(window // 2, n - window // 2)
+        assert voltage[middle] == approx(baseline[middle], abs=1)
+
+
+@pytest.mark.parametrize("method, options, function", [
+    ('mode', {}, modal_baseline),
+    ('median', {}, median_baseline),
+    ('rolling', {'window': 100}, rolling_baseline),
+])
+def test_estimate(method, options, function):
+    """
+
+    Args:
+        method: baseline estimator
+        options: extra arguments of the estimator
+        function: estimator the method names
+
+    Returns: Pass or Fail
+
+    """
+    voltage = np.random.RandomState(0).randn(1000)
+    assert function(voltage, **options) == \
+        approx(estimate(voltage, method, **options))
+    with pytest.raises(ValueError):
+        estimate(voltage, 'no_such_method')
+
+
+def test_rolling_detects_drift():
+    """ A drifting recording loses its late beats with the modal
+    baseline but keeps them with the rolling baseline
+
+    Returns: Pass or Fail
+
+    """
+    time = np.arange(20000) / 250.0
+    beats = np.exp(-((np.mod(time, 1) - 0.5) / 0.02) ** 2)
+    drift = np.linspace(0, 2, len(time))
+    voltage = 0.3 + drift + beats
+    filtered = voltage.copy()
+    modal = peak_detector_array(filtered, time, voltage)[0]
+    rolling = peak_detector_array(filtered, time, voltage,
+                                  estimate(voltage, 'rolling',
+                                           window=500))[0]
+    assert 80 == len(rolling)
+    assert len(modal) < len(rolling)
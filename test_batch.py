@@ -0,0 +1,238 @@
+import pytest
+import os
+import json
+import logging
+import shutil
+from output import read_ndjson
+from batch import list_csv
+from batch import run_batch
+from batch import run_file
+
+
+@pytest.mark.parametrize("files, workers, expected", [
+    (['test_data22.csv', 'sine_with_words.csv'], 2, (2, 0)),
+    (['test_data22.csv', 'sine.xlsx'], 1, (1, 0)),
+])
+def test_run_batch(tmpdir, files, workers, expected):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+        files: files copied into the folder
+        workers: number of worker processes
+        expected: number of files analysed and number that failed
+
+    Returns: Pass or Fail
+
+    """
+    for file in files:
+        shutil.copy(file, str(tmpdir))
+    shutil.copy('test_write_excel.xlsx',
+                os.path.join(str(tmpdir), 'Beat_Tracking.xlsx'))
+    results, errors = run_batch(str(tmpdir), workers, (2, 3), 1)
+    assert expected == (len(results), len(errors))
+    for file in results:
+        assert os.path.isfile(os.path.splitext(file)[0] + '.json')
+
+
+def test_run_batch_isolates_errors(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+
+    Returns: Pass or Fail
+
+    """
+    shutil.copy('test_data22.csv', str(tmpdir))
+    with open(os.path.join(str(tmpdir), 'empty_data1.csv'), 'w'):
+        pass
+    results, errors = run_batch(str(tmpdir), 2, (2, 3), 1, None)
+    assert list(results) == list_csv(str(tmpdir))[1:]
+    assert list(errors) == list_csv(str(tmpdir))[:1]
+    assert 37 == results[list_csv(str(tmpdir))[1]]['num_beats']
+
+
+def test_run_batch_cache(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+
+    Returns: Pass or Fail
+
+    """
+    shutil.copy('test_data22.csv', str(tmpdir))
+    shutil.copy('sine_with_words.csv', str(tmpdir))
+    cache_dir = os.path.join(str(tmpdir), 'cache')
+    plain, errors = run_batch(str(tmpdir), 2, (2, 3), 1, None)
+    for attempt in range(2):
+        cached, errors = run_batch(str(tmpdir), 2, (2, 3), 1, None,
+                                   cache_dir)
+        assert plain == cached
+    assert 2 == len(os.listdir(cache_dir))
+
+
+def test_run_batch_incremental(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+
+    Returns: Pass or Fail
+
+    """
+    shutil.copy('test_data22.csv', str(tmpdir))
+    shutil.copy('sine.csv', str(tmpdir))
+    json_file = os.path.join(str(tmpdir), 'test_data22.json')
+    first, errors = run_batch(str(tmpdir), 2, (2, 3), 1, None,
+                              incremental=True)
+    os.utime(json_file, (0, 0))
+    second, errors = run_batch(str(tmpdir), 2, (2, 3), 1, None,
+                               incremental=True)
+    assert 0 == os.path.getmtime(json_file)
+    assert sorted(first) == sorted(second)
+    assert first[json_file[:-5] + '.csv']['beats'] == \
+        second[json_file[:-5] + '.csv']['beats']
+    third, errors = run_batch(str(tmpdir), 2, (2, 3), 1, None,
+                              filter_value=0.006, incremental=True)
+    assert 0 != os.path.getmtime(json_file)
+
+
+def test_run_batch_incremental_same_name(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder holding two folders with a x.csv each
+
+    Returns: Pass or Fail
+
+    """
+    files = list()
+    for folder in ['a', 'b']:
+        tmpdir.mkdir(folder)
+        files.append(os.path.join(str(tmpdir), folder, 'x.csv'))
+        shutil.copy('test_data22.csv', files[-1])
+    run_batch(str(tmpdir), 1, (2, 3), 1, None, incremental=True,
+              files=files)
+    json_files = [x[:-4] + '.json' for x in files]
+    for json_file in json_files:
+        os.utime(json_file, (0, 0))
+    run_batch(str(tmpdir), 1, (2, 3), 1, None, incremental=True,
+              files=files)
+    for json_file in json_files:
+        assert 0 == os.path.getmtime(json_file)
+
+
+def test_run_batch_incremental_output_file(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+
+    Returns: Pass or Fail
+
+    """
+    shutil.copy('test_data22.csv', str(tmpdir))
+    shutil.copy('sine.csv', str(tmpdir))
+    sine = os.path.join(str(tmpdir), 'sine.csv')
+    ndjson = os.path.join(str(tmpdir), 'metrics.ndjson')
+    first, errors = run_batch(str(tmpdir), 1, (2, 3), 1, None,
+                              incremental=True)
+    second, errors = run_batch(str(tmpdir), 1, (2, 3), 1, None,
+                               incremental=True, output_file=ndjson)
+    assert sorted(first) == sorted(read_ndjson(ndjson))
+    shutil.copy('test_data22.csv', sine)
+    third, errors = run_batch(str(tmpdir), 1, (2, 3), 1, None,
+                              incremental=True, output_file=ndjson)
+    written = read_ndjson(ndjson)
+    assert sorted(first) == sorted(written)
+    assert 37 == third[sine]['num_beats'] == written[sine]['num_beats']
+    with open(os.path.join(str(tmpdir), 'sine.json')) as infile:
+        assert first[sine]['num_beats'] == json.load(infile)['num_beats']
+    fourth, errors = run_batch(str(tmpdir), 1, (2, 3), 1, None,
+                               incremental=True)
+    assert 37 == fourth[sine]['num_beats']
+
+
+def test_run_batch_plots(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+
+    Returns: Pass or Fail
+
+    """
+    shutil.copy('test_data22.csv', str(tmpdir))
+    plot_dir = os.path.join(str(tmpdir), 'plots')
+    results, errors = run_batch(str(tmpdir), 1, (2, 3), 1, None,
+                                plot_dir=plot_dir)
+    assert ['test_data22.png'] == os.listdir(plot_dir)
+
+
+def test_run_batch_plot_fails(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+
+    Returns: Pass or Fail
+
+    """
+    for file in ['test_data22.csv', 'sine.csv', 'test_write_excel.xlsx']:
+        shutil.copy(file, str(tmpdir))
+    plot_dir = os.path.join(str(tmpdir), 'plots')
+    os.makedirs(os.path.join(plot_dir, 'sine.png'))
+    results, errors = run_batch(str(tmpdir), 1, (2, 3), 1,
+                                'test_write_excel.xlsx', incremental=True,
+                                plot_dir=plot_dir)
+    sine = os.path.join(str(tmpdir), 'sine.csv')
+    assert [sine] == list(errors)
+    assert 2 == len(results)
+    assert os.path.getsize(os.path.join(plot_dir, 'test_data22.png')) > 0
+    assert os.path.isfile(os.path.join(str(tmpdir), '.hrm_manifest.json'))
+
+
+def test_run_file_defers_plots(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the plot
+
+    Returns: Pass or Fail
+
+    """
+    plot_dir = str(tmpdir)
+    file, metrics, error, timings, plots = run_file(
+        'test_data22.csv', (2, 3), 1, plot_dir=plot_dir)
+    assert error is None
+    assert [] == os.listdir(plot_dir)
+    assert 1 == len(plots)
+    trace, envelope, peaks, name, output, user_interval = plots[0]
+    assert os.path.join(plot_dir, 'test_data22.png') == output
+    assert len(trace[0]) <= 2 * 1600
+    assert metrics['num_beats'] == len(peaks[0])
+
+
+@pytest.mark.parametrize("quiet", [False, True])
+def test_run_file_quiet(capsys, caplog, quiet):
+    """
+
+    Args:
+        capsys: captured stdout
+        caplog: captured log records
+        quiet: True to log instead of print
+
+    Returns: Pass or Fail
+
+    """
+    with caplog.at_level(logging.INFO):
+        file, metrics, error, timings, plots = run_file(
+            'test_data22.csv', (2, 3), 1, quiet=quiet)
+    assert error is None
+    printed = capsys.readouterr().out
+    logged = [record.getMessage() for record in caplog.records]
+    line = str(metrics)
+    assert (line in printed) is not quiet
+    assert (line in logged) is quiet
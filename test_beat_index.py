@@ -0,0 +1,69 @@
+import pytest
+import numpy as np
+from pytest import approx
+from beat_index import BeatIndex
+
+
+@pytest.mark.parametrize("beats, start, end, expected", [
+    ([1, 2, 3, 4, 5], 1, 3, 1),
+    ([1, 2, 3, 4, 5], 0.5, 5.5, 5),
+    ([5, 1, 3, 2, 4], 1.5, 4.5, 3),
+    ([1, 2, 3, 4, 5], 6, 8, 0),
+    ([], 0, 10, 0),
+])
+def test_count(beats, start, end, expected):
+    """
+
+    Args:
+        beats: times of detected beats
+        start: start of the window
+        end: end of the window
+        expected: number of beats strictly inside the window
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == BeatIndex(beats).count(start, end)
+
+
+@pytest.mark.parametrize("beats, starts, ends, expected", [
+    ([1, 2, 3, 4, 5], [1, 0, 2.5], [3, 10, 2.6], [30, 30, 0]),
+])
+def test_bpm_batch(beats, starts, ends, expected):
+    """
+
+    Args:
+        beats: times of detected beats
+        starts: start of each window
+        ends: end of each window
+        expected: bpm inside each window
+
+    Returns: Pass or Fail
+
+    """
+    bpm = BeatIndex(beats).bpm(np.array(starts), np.array(ends))
+    assert expected == approx(list(bpm))
+
+
+@pytest.mark.parametrize("beats, window, step, stop, expected", [
+    (np.arange(0.5, 30, 0.5), 10, 1, 30, (21, 114)),
+    (np.arange(0.5, 30, 0.5), 10, 5, None, (4, 114)),
+    ([1, 2], 10, 1, None, (0, None)),
+])
+def test_sliding_bpm(beats, window, step, stop, expected):
+    """
+
+    Args:
+        beats: times of detected beats
+        window: width of each window in seconds
+        step: time between window starts
+        stop: end of the last window
+        expected: number of windows and bpm inside each of them
+
+    Returns: Pass or Fail
+
+    """
+    starts, bpm = BeatIndex(beats).sliding_bpm(window, step, stop=stop)
+    assert expected[0] == len(starts)
+    if expected[1] is not None:
+        assert [expected[1]] * len(bpm) == approx(list(bpm))
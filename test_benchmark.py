@@ -0,0 +1,100 @@
+import pytest
+import os
+import json
+from benchmark import synthetic_ecg
+from benchmark import compare
+from benchmark import run_benchmark
+from benchmark import count_passes
+from main import Hilbert
+from main import peak_detector
+
+
+@pytest.mark.parametrize("n_samples, fs, bpm, expected", [
+    (25000, 250.0, 72.0, 120),
+    (36000, 360.0, 60.0, 100),
+])
+def test_synthetic_ecg(n_samples, fs, bpm, expected):
+    """
+
+    Args:
+        n_samples: number of samples
+        fs: sample rate in Hz
+        bpm: heart rate of the recording
+        expected: number of beats in the recording
+
+    Returns: Pass or Fail
+
+    """
+    data = synthetic_ecg(n_samples, fs, bpm)
+    assert n_samples == len(data)
+    assert (n_samples - 1) / fs == data['time'].iloc[-1]
+    found = peak_detector(Hilbert(data, 0.005), data)
+    assert abs(expected - len(found)) <= 1
+
+
+@pytest.mark.parametrize("old, new, expected", [
+    (1.0, 1.2, 0),
+    (1.0, 2.0, 1),
+    (0.001, 0.004, 0),
+])
+def test_compare(old, new, expected):
+    """
+
+    Args:
+        old: baseline seconds of a stage
+        new: new seconds of the stage
+        expected: number of regressions flagged
+
+    Returns: Pass or Fail
+
+    """
+    baseline = {'runs': {'100': {'Hilbert': old}}}
+    results = {'runs': {'100': {'Hilbert': new, 'main': new}}}
+    assert expected == len(compare(results, baseline, 0.5))
+
+
+def test_run_benchmark(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the output files
+
+    Returns: Pass or Fail
+
+    """
+    output = os.path.join(str(tmpdir), 'bench.json')
+    results, regressions = run_benchmark([2000], repeat=1, output=output)
+    with open(output) as infile:
+        assert results == json.load(infile)
+    stages = results['runs']['2000']
+    for stage in ['is_data_valid', 'edge_case', 'Hilbert',
+                  'peak_detector', 'check_loop', 'write_excel', 'main']:
+        assert stages[stage] > 0
+    passes = results['passes']['2000']
+    assert passes['pan_tompkins'] < passes['hilbert']
+    for stage in stages:
+        stages[stage] /= 100.0
+    with open(output, 'w') as outfile:
+        json.dump(results, outfile)
+    results, regressions = run_benchmark([2000], repeat=1, output=None,
+                                         baseline=output, min_delta=0)
+    assert 'main' in [x[1] for x in regressions]
+
+
+@pytest.mark.parametrize("file, hilbert, pan_tompkins", [
+    ('test_data1.csv', 2, 1),
+    ('data/test_data10.csv', 3, 1),
+])
+def test_count_passes(file, hilbert, pan_tompkins):
+    """
+
+    Args:
+        file: name of csv file
+        hilbert: passes of the envelope detector with its retries
+        pan_tompkins: passes of the Pan-Tompkins detector
+
+    Returns: Pass or Fail
+
+    """
+    assert hilbert == count_passes(file)
+    assert pan_tompkins == count_passes(file, 'pan_tompkins')
@@ -0,0 +1,120 @@
+import pytest
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import cache
+from cache import cache_key
+from cache import load_recording
+from cache import evict
+from main import is_data_valid
+
+
+@pytest.mark.parametrize("file", [
+    'sine.csv',
+    'sine_with_words.csv',
+])
+def test_load_recording(tmpdir, file):
+    """
+
+    Args:
+        tmpdir: temporary folder for the cache
+        file: file name
+
+    Returns: Pass or Fail
+
+    """
+    cache_dir = os.path.join(str(tmpdir), 'cache')
+    headers = ['time', 'voltage']
+    valid = is_data_valid(pd.read_csv(file, names=headers))
+    for attempt in range(2):
+        time, voltage = load_recording(file, cache_dir)
+        assert list(valid['time']) == list(time)
+        assert list(valid['voltage']) == list(voltage)
+    assert isinstance(time.base, np.memmap)
+    assert [cache_key(file)[1] + '.npy'] == os.listdir(cache_dir)
+
+
+def test_load_recording_invalidates(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the csv and cache
+
+    Returns: Pass or Fail
+
+    """
+    cache_dir = os.path.join(str(tmpdir), 'cache')
+    file = os.path.join(str(tmpdir), 'data.csv')
+    shutil.copy('sine.csv', file)
+    time, voltage = load_recording(file, cache_dir)
+    assert 239 == len(time)
+    with open(file, 'w') as outfile:
+        outfile.write('0,1\n0.1,2\n0.2,3\n')
+    os.utime(file, (0, 0))
+    time, voltage = load_recording(file, cache_dir)
+    assert [1.0, 2.0, 3.0] == list(voltage)
+    assert 1 == len(os.listdir(cache_dir))
+
+
+def test_evict(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the csv files and cache
+
+    Returns: Pass or Fail
+
+    """
+    cache_dir = os.path.join(str(tmpdir), 'cache')
+    files = list()
+    for number in range(3):
+        file = os.path.join(str(tmpdir), str(number) + '.csv')
+        shutil.copy('sine.csv', file)
+        load_recording(file, cache_dir)
+        path = os.path.join(cache_dir, cache_key(file)[1] + '.npy')
+        os.utime(path, (number, number))
+        files.append(path)
+    size = os.path.getsize(files[0])
+    removed = evict(cache_dir, 2 * size)
+    assert files[:1] == removed
+    assert sorted(files[1:]) == sorted(
+        os.path.join(cache_dir, x) for x in os.listdir(cache_dir))
+
+
+@pytest.mark.parametrize("target", ['load', 'evict'])
+def test_concurrent_removal(tmpdir, monkeypatch, target):
+    """
+
+    Args:
+        tmpdir: temporary folder for the csv files and cache
+        monkeypatch: pytest fixture to stand in for another worker
+        target: 'load' to delete the entry just before it is loaded,
+        'evict' to delete every entry just before evict lists them
+
+    Returns: Pass or Fail
+
+    """
+    cache_dir = os.path.join(str(tmpdir), 'cache')
+    file = os.path.join(str(tmpdir), 'sine.csv')
+    shutil.copy('sine.csv', file)
+    expected = list(load_recording(file, cache_dir)[1])
+    listdir = os.listdir
+
+    def other_worker(folder):
+        entries = listdir(folder)
+        for entry in entries:
+            os.remove(os.path.join(folder, entry))
+        return entries
+    if target == 'load':
+        path = os.path.join(cache_dir, cache_key(file)[1] + '.npy')
+        utime = os.utime
+
+        def gone(name, times):
+            os.remove(path)
+            utime(name, times)
+        monkeypatch.setattr(cache.os, 'utime', gone)
+        assert expected == list(load_recording(file, cache_dir)[1])
+    else:
+        monkeypatch.setattr(cache.os, 'listdir', other_worker)
+        assert [] == evict(cache_dir, 0)
@@ -0,0 +1,213 @@
+import pytest
+import os
+import sys
+import json
+import shutil
+import subprocess
+from openpyxl import load_workbook
+from cli import expand
+from cli import clashes
+from cli import build_parser
+from cli import timing_report
+from cli import main
+from output import read_ndjson
+
+
+@pytest.mark.parametrize("patterns, expected", [
+    (['*.csv'], ['a.csv', 'b.csv']),
+    (['.'], ['a.csv', 'b.csv']),
+    (['a.csv', '*.csv'], ['a.csv', 'b.csv']),
+    (['**/*.csv'], ['a.csv', 'b.csv', os.path.join('sub', 'c.csv')]),
+    (['*.txt'], []),
+])
+def test_expand(tmpdir, patterns, expected):
+    """
+
+    Args:
+        tmpdir: temporary folder holding the files
+        patterns: glob patterns to expand
+        expected: csv files found, relative to tmpdir
+
+    Returns: Pass or Fail
+
+    """
+    for name in ['a.csv', 'b.csv', 'notes.txt', os.path.join('sub', 'c.csv')]:
+        tmpdir.join(name).ensure()
+    patterns = [os.path.join(str(tmpdir), x) for x in patterns]
+    assert [os.path.join(str(tmpdir), x) for x in expected] == \
+        [os.path.normpath(x) for x in expand(patterns)]
+
+
+@pytest.mark.parametrize("files, expected", [
+    (['a/x.csv', 'b/y.csv'], {}),
+    (['b/x.csv', 'a/x.csv', 'c/y.csv'], {'x': ['a/x.csv', 'b/x.csv']}),
+    (['a/x.csv', 'a/x.1.csv'], {}),
+])
+def test_clashes(files, expected):
+    """
+
+    Args:
+        files: names of csv files
+        expected: output names used by more than one file
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == clashes(files)
+
+
+@pytest.mark.parametrize("options, status", [
+    (['-o', 'out'], None),
+    (['--plots'], None),
+    (['-o', 'out', '--ndjson', 'metrics.ndjson'], 0),
+    ([], 0),
+])
+def test_main_clashes(tmpdir, options, status):
+    """
+
+    Args:
+        tmpdir: temporary folder holding two sine.csv files
+        options: extra command line arguments
+        status: exit status, or None if the run is refused
+
+    Returns: Pass or Fail
+
+    """
+    for folder in ['a', 'b']:
+        tmpdir.mkdir(folder)
+        shutil.copy('sine.csv', os.path.join(str(tmpdir), folder))
+    options = [os.path.join(str(tmpdir), x) if x.startswith('out') else x
+               for x in options]
+    argv = [os.path.join(str(tmpdir), '**', '*.csv'), '-j', '1'] + options
+    if status is None:
+        with pytest.raises(SystemExit):
+            main(argv)
+    else:
+        assert status == main(argv)
+        if options:
+            assert 2 == len(read_ndjson(os.path.join(str(tmpdir), 'out',
+                                                     'metrics.ndjson')))
+
+
+@pytest.mark.parametrize("argv, name, expected", [
+    (['data'], 'window', (2.0, 3.0)),
+    (['data', '-w', '1', '4.5'], 'window', [1.0, 4.5]),
+    (['data'], 'cutoff', 0.005),
+    (['data', '-c', '0.01'], 'cutoff', 0.01),
+    (['data', '-d', 'pan_tompkins'], 'detector', 'pan_tompkins'),
+    (['data', '-j', '3'], 'workers', 3),
+    (['data', '--files-per-task', '8'], 'files_per_task', 8),
+    (['data'], 'plots', False),
+    (['a.csv', 'b/*.csv'], 'inputs', ['a.csv', 'b/*.csv']),
+])
+def test_build_parser(argv, name, expected):
+    """
+
+    Args:
+        argv: command line arguments
+        name: option to check
+        expected: parsed value of the option
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == getattr(build_parser().parse_args(argv), name)
+
+
+def test_help_streaming():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    assert 'streaming.stream_peaks' in build_parser().format_help()
+
+
+def test_timing_report():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    text = timing_report({'read': {'count': 2, 'seconds': 0.5},
+                          'detect': {'count': 2, 'seconds': 1.25}})
+    lines = text.split('\n')
+    assert 3 == len(lines)
+    assert lines[1].startswith('detect')
+    assert lines[2].endswith('0.500')
+
+
+@pytest.mark.parametrize("options, expected", [
+    (['--files-per-task', '2'], ['sine.json', 'test_data22.json']),
+    (['--ndjson', 'metrics.ndjson', '--timing'],
+     ['metrics.ndjson', 'timing.json']),
+    (['--plots', '--excel'], ['plots', 'sine.json', 'test_data22.json']),
+])
+def test_main(tmpdir, options, expected):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the tool in
+        options: extra command line arguments
+        expected: sorted contents of the output folder
+
+    Returns: Pass or Fail
+
+    """
+    for file in ['test_data22.csv', 'sine.csv']:
+        shutil.copy(file, str(tmpdir))
+    out = os.path.join(str(tmpdir), 'out')
+    if '--excel' in options:
+        excel = os.path.join(str(tmpdir), 'Beat_Tracking.xlsx')
+        shutil.copy('test_write_excel.xlsx', excel)
+        options = options + [excel]
+    status = main([os.path.join(str(tmpdir), '*.csv'), '-o', out,
+                   '-j', '1'] + options)
+    assert 0 == status
+    assert expected == sorted(os.listdir(out))
+    if 'test_data22.json' in expected:
+        with open(os.path.join(out, 'test_data22.json')) as infile:
+            assert 37 == json.load(infile)['num_beats']
+    if '--plots' in options:
+        assert ['sine.png', 'test_data22.png'] == \
+            sorted(os.listdir(os.path.join(out, 'plots')))
+        wb = load_workbook(excel)
+        assert '37' == wb.active['C23'].value
+
+
+@pytest.mark.parametrize("argv", [
+    ['no_such_folder_*.csv'],
+    ['.', '-d', 'no_such_detector'],
+    ['.', '--files-per-task', '0'],
+    ['.', '--excel', 'no_such_sheet.xlsx'],
+])
+def test_main_errors(argv):
+    """
+
+    Args:
+        argv: command line arguments that are rejected
+
+    Returns: Pass or Fail
+
+    """
+    with pytest.raises(SystemExit):
+        main(argv)
+
+
+def test_lazy_imports(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the tool in
+
+    Returns: Pass or Fail
+
+    """
+    shutil.copy('sine.csv', str(tmpdir))
+    code = ('import sys, cli; cli.main([sys.argv[1], "-j", "1"]); '
+            'print(sorted(m for m in ("matplotlib", "openpyxl") '
+            'if m in sys.modules))')
+    result = subprocess.run([sys.executable, '-c', code, str(tmpdir)],
+                            stdout=subprocess.PIPE, universal_newlines=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert '[]' == result.stdout.strip().split('\n')[-1]
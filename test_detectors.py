@@ -0,0 +1,171 @@
+import pytest
+import numpy as np
+import pandas as pd
+import detectors
+from detectors import register
+from detectors import get
+from detectors import adaptive_threshold
+from detectors import pan_tompkins
+from detectors import hilbert_envelope
+from benchmark import synthetic_ecg
+from main import analyze_file
+from main import pad_recording
+from main import is_data_valid
+
+
+def test_registry():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    @register('test_nothing')
+    def nothing(time, voltage, fs=None, **options):
+        empty = np.array([], dtype=np.int64)
+        return empty, np.asarray(time)[empty], np.asarray(voltage)[empty]
+    assert get('test_nothing') is nothing
+    assert get('pan_tompkins') is pan_tompkins
+    with pytest.raises(ValueError):
+        get('no_such_detector')
+    assert 0 == analyze_file('test_data22.csv', (2, 3),
+                             detector='test_nothing')['num_beats']
+    del detectors.DETECTORS['test_nothing']
+
+
+@pytest.mark.parametrize("n_samples, fs, bpm", [
+    (10000, 250.0, 72),
+    (20000, 1000.0, 60),
+    (30000, 360.0, 120),
+])
+def test_pan_tompkins(n_samples, fs, bpm):
+    """
+
+    Args:
+        n_samples: number of samples
+        fs: sample rate in Hz
+        bpm: heart rate of the synthetic recording
+
+    Returns: Pass or Fail
+
+    """
+    data = synthetic_ecg(n_samples, fs, bpm)
+    indices, times, values = pan_tompkins(data['time'], data['voltage'])
+    expected = int(n_samples / fs * bpm / 60.0)
+    assert abs(expected - len(indices)) <= 1
+    assert np.all(values > 1)
+    assert np.allclose(np.diff(times), 60.0 / bpm, atol=2 / fs)
+
+
+@pytest.mark.parametrize("file, expected", [
+    ('test_data1.csv', 35),
+    ('test_data22.csv', 37),
+    ('data/test_data3.csv', 34),
+    ('data/test_data4.csv', 32),
+    ('data/test_data8.csv', 33),
+    ('data/test_data9.csv', 28),
+    ('data/test_data10.csv', 44),
+    ('data/test_data11.csv', 32),
+    ('data/test_data16.csv', 19),
+    ('data/test_data20.csv', 19),
+])
+def test_pan_tompkins_files(file, expected):
+    """
+
+    Args:
+        file: name of csv file
+        expected: number of beats
+
+    Returns: Pass or Fail
+
+    """
+    metrics = analyze_file(file, (2, 3), detector='pan_tompkins')
+    assert expected == metrics['num_beats']
+    assert expected == analyze_file(file, (2, 3))['num_beats']
+
+
+@pytest.mark.parametrize("file, expected, hilbert", [
+    ('data/test_data12.csv', 9, 19),
+    ('data/test_data15.csv', 21, 14),
+    ('data/test_data25.csv', 36, 30),
+    ('data/test_data26.csv', 59, 38),
+    ('data/test_data29.csv', 18, 9),
+    ('data/test_data30.csv', 79, 65),
+])
+def test_pan_tompkins_limits(file, expected, hilbert):
+    """
+
+    Args:
+        file: name of csv file, whose Pan-Tompkins count is off the
+        hand count as listed in README
+        expected: number of beats found by Pan-Tompkins
+        hilbert: number of beats found by the Hilbert detector
+
+    Returns: Pass or Fail
+
+    """
+    metrics = analyze_file(file, (2, 3), detector='pan_tompkins')
+    assert expected == metrics['num_beats']
+    assert hilbert == analyze_file(file, (2, 3))['num_beats']
+
+
+@pytest.mark.parametrize("peaks, heights, slopes, expected", [
+    ([0, 200, 400, 600], [10, 10, 10, 10], [10, 10, 10, 10],
+     [0, 200, 400, 600]),
+    ([0, 200, 260, 400, 600], [10, 10, 9, 10, 10], [10, 10, 3, 10, 10],
+     [0, 200, 400, 600]),
+    ([0, 200, 400, 460, 600], [10, 10, 8, 30, 10], [10, 10, 5, 20, 10],
+     [0, 200, 460, 600]),
+])
+def test_adaptive_threshold(peaks, heights, slopes, expected):
+    """
+
+    Args:
+        peaks: indices of the candidate peaks
+        heights: integrated signal at each candidate
+        slopes: steepest derivative around each candidate
+        expected: indices of the accepted beats
+
+    Returns: Pass or Fail
+
+    """
+    beats = adaptive_threshold(np.array(peaks),
+                               np.array(heights, dtype=float),
+                               np.array(slopes, dtype=float), 250.0)
+    assert expected == beats.tolist()
+
+
+def test_pan_tompkins_missing():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    data = synthetic_ecg(5000)
+    voltage = data['voltage'].values.copy()
+    voltage[1000:1010] = np.nan
+    indices, times, values = pan_tompkins(data['time'], voltage)
+    assert 24 == len(indices)
+    indices, times, values = pan_tompkins(data['time'], voltage * np.nan)
+    assert 0 == len(indices)
+
+
+@pytest.mark.parametrize("file", [
+    'test_data22.csv',
+    'data/test_data10.csv',
+    'data/test_data31.csv',
+])
+def test_hilbert_envelope(file):
+    """
+
+    Args:
+        file: name of csv file
+
+    Returns: Pass or Fail
+
+    """
+    data = is_data_valid(pd.read_csv(file, names=['time', 'voltage']))
+    padded = pad_recording(data)
+    indices, times, values = hilbert_envelope(padded['time'],
+                                              padded['voltage'])
+    metrics = analyze_file(file, (2, 3))
+    assert metrics['beats'] == list(times)
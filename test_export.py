@@ -0,0 +1,74 @@
+import pytest
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from export import classify
+from export import summary_table
+from export import FILLS
+from main import write_excel
+
+
+@pytest.mark.parametrize("detected, hand_counts, expected", [
+    ([35, 35, 35, 35, 35, 35],
+     [35, 34, 32, 29, 24, np.nan],
+     ['green', 'yellow', 'orange', 'red', 'bad', 'untracked']),
+    ([10, 11], [21, 10], ['bad', 'yellow']),
+])
+def test_classify(detected, hand_counts, expected):
+    """
+
+    Args:
+        detected: detected beat counts
+        hand_counts: hand counted beats
+        expected: category of each count
+
+    Returns: Pass or Fail
+
+    """
+    diff, category = classify(detected, hand_counts)
+    assert expected == list(category)
+
+
+@pytest.mark.parametrize("hand_counts, expected", [
+    ([35, '32', None, 'n/a'], [0, 3, np.nan, np.nan]),
+])
+def test_summary_table(hand_counts, expected):
+    """
+
+    Args:
+        hand_counts: hand counted beats as found in the excel sheet
+        expected: absolute difference of each count
+
+    Returns: Pass or Fail
+
+    """
+    table = summary_table(['1', '2', '3', '4'], [35, 35, 35, 35],
+                          hand_counts)
+    assert [1, 2, 3, 4] == list(table['file'])
+    assert np.allclose(expected, table['diff'], equal_nan=True)
+
+
+def test_write_excel_summary(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the excel and summary files
+
+    Returns: Pass or Fail
+
+    """
+    excel_file_name = os.path.join(str(tmpdir), 'Beat_Tracking.xlsx')
+    summary_file_name = os.path.join(str(tmpdir), 'summary.csv')
+    shutil.copy('Beat_Tracking_master.xlsx', excel_file_name)
+    write_excel(['1', '2', '3', '6'], [35, 0, 31, 36], excel_file_name,
+                summary_file_name)
+    ws = load_workbook(excel_file_name).active
+    assert ['35', 'Bad Data', '31', '36'] == \
+        [ws['C' + str(row)].value for row in [2, 3, 4, 7]]
+    assert FILLS['green'].start_color.rgb == ws['C2'].fill.start_color.rgb
+    assert FILLS['bad'].start_color.rgb == ws['C3'].fill.start_color.rgb
+    table = pd.read_csv(summary_file_name)
+    assert ['green', 'bad', 'orange', 'untracked'] == \
+        list(table['category'])
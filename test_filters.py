@@ -0,0 +1,95 @@
+import pytest
+import pandas as pd
+import numpy as np
+from pytest import approx
+from filters import butter_sos
+from filters import low_pass
+from filters import band_pass
+from filters import sample_rate
+from main import Hilbert
+
+
+@pytest.mark.parametrize("order, cutoff, fs", [
+    (2, 0.005, None),
+    (2, 1.5, 360.0),
+])
+def test_butter_sos(order, cutoff, fs):
+    """
+
+    Args:
+        order: filter order
+        cutoff: cutoff frequency
+        fs: sample rate in Hz, or None for a normalized cutoff
+
+    Returns: Pass or Fail
+
+    """
+    sos = butter_sos(order, cutoff, fs)
+    assert (1, 6) == sos.shape
+    assert sos is butter_sos(order, cutoff, fs)
+
+
+@pytest.mark.parametrize("file, expected", [
+    ('sine.csv', 20.0),
+    ('test_data22.csv', 250.0),
+    ('data/test_data28.csv', 360.0),
+])
+def test_sample_rate(file, expected):
+    """
+
+    Args:
+        file: file name
+        expected: sample rate in Hz
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv(file, names=headers)
+    assert expected == approx(sample_rate(data['time']), rel=1e-2)
+
+
+@pytest.mark.parametrize("file, cutoff", [
+    ('test_data22.csv', 0.005),
+    ('test_data22.csv', 0.0045),
+])
+def test_low_pass_hz(file, cutoff):
+    """
+
+    Args:
+        file: file name
+        cutoff: normalized cutoff frequency
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv(file, names=headers)
+    fs = sample_rate(data['time'])
+    normalized = low_pass(data['voltage'], cutoff)
+    hz = low_pass(data['voltage'], cutoff * fs / 2, fs=fs)
+    assert np.allclose(normalized, hz)
+    assert np.allclose(Hilbert(data, cutoff),
+                       Hilbert(data, cutoff * fs / 2, hz=True))
+
+
+@pytest.mark.parametrize("frequency, expected", [
+    (1.0, False),
+    (10.0, True),
+    (60.0, False),
+])
+def test_band_pass(frequency, expected):
+    """
+
+    Args:
+        frequency: frequency of a test sine in Hz
+        expected: True if the sine is inside the 5-15 Hz band
+
+    Returns: Pass or Fail
+
+    """
+    time = np.arange(5000) / 250.0
+    sine = np.sin(2 * np.pi * frequency * time)
+    filtered = band_pass(sine, 5, 15, 2, 250.0)
+    assert expected == bool(np.std(filtered[500:-500]) > 0.5 *
+                            np.std(sine))
@@ -0,0 +1,110 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pytest import approx
+from hrv import rr_intervals
+from hrv import spacing_exceeds
+from hrv import sdnn
+from hrv import rmssd
+from hrv import pnn50
+from hrv import instantaneous_hr
+from hrv import hrv_metrics
+from main import create_metrics
+
+
+@pytest.mark.parametrize("beat_times, expected", [
+    ([1.0, 2.0, 3.5], [1.0, 1.5]),
+    ([1.0], []),
+])
+def test_rr_intervals(beat_times, expected):
+    """
+
+    Args:
+        beat_times: times of detected beats
+        expected: R-R intervals
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == approx(list(rr_intervals(beat_times)))
+
+
+@pytest.mark.parametrize("intervals, space, expected", [
+    ([1.0, 1.0, 1.0], 0.5, False),
+    ([1.0, 1.0, 4.0], 0.5, True),
+    ([1.0, 1.0, 4.0], 2.5, False),
+])
+def test_spacing_exceeds(intervals, space, expected):
+    """
+
+    Args:
+        intervals: R-R intervals
+        space: allowed distance from the mean interval
+        expected: True if peaks are too far apart
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == spacing_exceeds(intervals, space)
+
+
+@pytest.mark.parametrize("intervals, expected", [
+    ([0.8, 0.9, 0.88, 1.0], (0.0823, 0.0909, 66.67)),
+    ([0.8, 0.82, 0.84], (0.02, 0.02, 0.0)),
+    ([0.8], (None, None, None)),
+])
+def test_variability(intervals, expected):
+    """
+
+    Args:
+        intervals: R-R intervals
+        expected: sdnn, rmssd, and pnn50
+
+    Returns: Pass or Fail
+
+    """
+    out = (sdnn(intervals), rmssd(intervals), pnn50(intervals))
+    if expected[0] is None:
+        assert expected == out
+    else:
+        assert expected == approx(out, abs=1e-2)
+
+
+@pytest.mark.parametrize("intervals, expected", [
+    ([1.0, 0.5, 0.75], [60, 120, 80]),
+])
+def test_instantaneous_hr(intervals, expected):
+    """
+
+    Args:
+        intervals: R-R intervals
+        expected: heart rate of each interval
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == approx(list(instantaneous_hr(intervals)))
+
+
+@pytest.mark.parametrize("beat_times, expected", [
+    ([0.0, 1.0, 1.5, 2.5], (0.8333, 60.0, 120.0)),
+    ([], (None, None, None)),
+])
+def test_hrv_metrics(beat_times, expected):
+    """
+
+    Args:
+        beat_times: times of detected beats
+        expected: mean R-R interval, and min and max heart rate
+
+    Returns: Pass or Fail
+
+    """
+    metrics = hrv_metrics(beat_times)
+    out = (metrics['mean_rr'], metrics['min_hr_bpm'], metrics['max_hr_bpm'])
+    if expected[0] is None:
+        assert expected == out
+    else:
+        assert expected == approx(out, abs=1e-3)
+    found = pd.DataFrame({'time': np.array(beat_times, dtype=float)})
+    assert metrics == create_metrics(found, (1, 0), 3, 60, True)['hrv']
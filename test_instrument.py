@@ -0,0 +1,139 @@
+import pytest
+import os
+import json
+import shutil
+import instrument
+from instrument import Recorder
+from instrument import timer
+from instrument import profile_file
+from batch import run_batch
+from main import analyze_file
+
+
+def test_timer_disabled():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    instrument.disable()
+    assert timer('read') is timer('detect')
+    with timer('read'):
+        pass
+    with pytest.raises(KeyError):
+        with timer('read'):
+            raise KeyError('not swallowed')
+    assert instrument.active() is None
+
+
+@pytest.mark.parametrize("calls, expected", [
+    ([('read', 'a.csv'), ('read', 'b.csv'), ('detect', 'a.csv')],
+     {'read': 2, 'detect': 1}),
+])
+def test_recorder(calls, expected):
+    """
+
+    Args:
+        calls: stage and file of each timed block
+        expected: number of calls of each stage over the batch
+
+    Returns: Pass or Fail
+
+    """
+    recorder = Recorder()
+    with instrument.recording(recorder):
+        for stage, file in calls:
+            instrument.begin(file)
+            with timer(stage):
+                pass
+    assert instrument.active() is None
+    totals = recorder.batch_totals()
+    assert expected == {stage: totals[stage]['count'] for stage in totals}
+    assert 2 == len(recorder.to_json()['files'])
+    assert 1 == recorder.file_totals('b.csv')['read']['count']
+    text = recorder.to_prometheus(per_file=True)
+    assert 'hrm_stage_calls_total{stage="read"} 2' in text
+    assert 'hrm_file_stage_seconds_total{file="a.csv",stage="detect"}' \
+        in text
+    assert 'file=' not in ''.join(x for x in text.split('\n')
+                                  if x.startswith('hrm_stage_'))
+
+
+def test_to_prometheus_escapes():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    recorder = Recorder()
+    recorder.add('read', 1.0, 'a "b"\\c\nd.csv')
+    text = recorder.to_prometheus(per_file=True)
+    assert 'file="a \\"b\\"\\\\c\\nd.csv"' in text
+    assert 9 == len(text.strip().split('\n'))
+
+
+def test_merge():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    recorder = Recorder()
+    recorder.add('read', 1.0, 'a.csv')
+    recorder.merge({'a.csv': {'read': [2, 0.5]},
+                    'b.csv': {'read': [1, 0.25]}})
+    assert {'count': 4, 'seconds': 1.75} == recorder.batch_totals()['read']
+
+
+def test_analyze_file_stages(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the json report
+
+    Returns: Pass or Fail
+
+    """
+    recorder = Recorder()
+    with instrument.recording(recorder):
+        analyze_file('test_data22.csv', (2, 3), 1, 0)
+    stages = recorder.file_totals('test_data22.csv')
+    for stage in ['read', 'validate', 'pad', 'envelope', 'detect',
+                  'check_loop', 'metrics']:
+        assert 1 == stages[stage]['count']
+    report = os.path.join(str(tmpdir), 'timing.json')
+    recorder.to_json(report)
+    with open(report) as infile:
+        assert 'test_data22.csv' in json.load(infile)['files']
+
+
+def test_run_batch_timing(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+
+    Returns: Pass or Fail
+
+    """
+    shutil.copy('test_data22.csv', str(tmpdir))
+    shutil.copy('sine.csv', str(tmpdir))
+    shutil.copy('test_write_excel.xlsx',
+                os.path.join(str(tmpdir), 'Beat_Tracking.xlsx'))
+    recorder = Recorder()
+    run_batch(str(tmpdir), 2, (2, 3), 1, recorder=recorder)
+    totals = recorder.batch_totals()
+    assert 2 == totals['read']['count'] == totals['json']['count']
+    assert 1 == totals['excel']['count']
+    assert instrument.active() is None
+
+
+def test_profile_file():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    metrics, stats = profile_file(analyze_file, 'test_data22.csv', (2, 3))
+    assert 37 == metrics['num_beats']
+    assert stats.total_calls > 0
@@ -7,7 +7,9 @@ from main import calc_v_extreme
 from pytest import approx
 from main import user_input
 from main import is_data_valid
+from main import validate_columns
 from main import edge_case
+from main import edge_case_array
 from main import check_spacing
 from main import Hilbert
 import numpy.fft as fft
@@ -17,8 +19,15 @@ from main import write_excel
 from openpyxl import load_workbook
 from main import calc_avg
 from main import peak_detector
+from main import peak_detector_array
 from main import threshold_peak_detect
+from main import threshold_peak_detect_array
 from main import check_loop
+from main import search_cutoff
+from main import envelope
+from main import low_pass
+from main import analyze_file
+from batch import run_file
 import numpy as np
 
 
@@ -86,7 +95,7 @@ def test_user_input(file, dur, window, expected):
 
 @pytest.mark.parametrize("file, expected", [
     ('sine.csv', True),
-    ('sine_with_words.csv', False),
+    ('sine_with_words.csv', True),
 ])
 def test_is_data_valid(file, expected):
     """
@@ -114,6 +123,54 @@ def test_is_data_valid(file, expected):
     assert expected == switch
 
 
+def test_bad_second_row(tmpdir):
+    """ A bad value in row 1 is dropped without breaking the duration,
+    with or without the recording cache
+
+    Args:
+        tmpdir: temporary folder for the csv file and cache
+
+    Returns: Pass or Fail
+
+    """
+    with open(os.path.join('data', 'test_data1.csv')) as infile:
+        lines = infile.readlines()
+    lines[1] = '0.003,bad\n'
+    file = os.path.join(str(tmpdir), 'test_data1.csv')
+    with open(file, 'w') as outfile:
+        outfile.writelines(lines)
+    data = is_data_valid(pd.read_csv(file, names=['time', 'voltage']))
+    assert list(range(len(lines) - 1)) == list(data.index)
+    metrics = analyze_file(file, (2, 3))
+    cache_dir = os.path.join(str(tmpdir), 'cache')
+    cached = run_file(file, (2, 3), 1, cache_dir)[1]
+    assert 35 == metrics['num_beats'] == cached['num_beats']
+    assert metrics['duration'] == cached['duration']
+
+
+@pytest.mark.parametrize("file, expected", [
+    ('sine.csv', (239, 0, 0)),
+    ('sine_with_words.csv', (237, 1, 1)),
+])
+def test_validate_columns(file, expected):
+    """
+
+    Args:
+        file: file name
+        expected: number of rows kept and number of bad
+        time and voltage cells
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv(file, names=headers)
+    time, voltage, report = validate_columns(data)
+    assert time.dtype == np.float64 and voltage.dtype == np.float64
+    assert report['rows'] - report['dropped'] == len(time)
+    assert expected == (len(voltage), report['time'], report['voltage'])
+
+
 @pytest.mark.parametrize("file, expected", [
     ('sine.csv', (0.017, 0.017)),
 ])
@@ -140,6 +197,36 @@ def test_edge_case(file, expected):
     assert expected == tup_out
 
 
+@pytest.mark.parametrize("file, amount, lead, expected", [
+    ('sine.csv', 200, 200, (-10.0, 0.0, 11.9, 21.85)),
+    ('sine.csv', 10, 200, (-10.0, 0.0, 11.9, 12.35)),
+    ('sine.csv', 10, 20, (-1.0, 0.0, 11.9, 12.35)),
+])
+def test_edge_case_array(file, amount, lead, expected):
+    """
+
+    Args:
+        file: file name
+        amount: number of points used to pad either side
+        lead: time steps from the first padded time to the data
+        expected: first padded time, first and last data time,
+        and last padded time
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv(file, names=headers)
+    time, voltage = edge_case_array(data['time'], data['voltage'],
+                                    amount, 0.5, lead)
+    out = edge_case(data, amount, 0.5, lead)
+    assert list(out['time']) == list(time)
+    assert len(data) + 2 * amount == len(voltage)
+    assert voltage[0] == voltage[-1] == 0.5
+    tup = (time[0], time[amount], time[-amount - 1], time[-1])
+    assert expected == tuple(round(x, 2) for x in tup)
+
+
 @pytest.mark.parametrize("file, expected, space, one, two", [
     ('sine.csv', False, 1, 10, 12),
     ('sine.csv', True, 0.5, 1, 120),
@@ -299,6 +386,33 @@ def test_peak_detector(file, expected):
     assert expected == out
 
 
+@pytest.mark.parametrize("file, expected", [
+    ('test_data22.csv',
+     [51, 659, 1400, 1659, 1933, 2212, 2471, 2736, 3015, 3272, 3541, 3827,
+      4080, 4338, 4618, 4895, 5140, 5422, 5699, 5969, 6242, 6521, 6793,
+      7040, 7332, 7603, 7874, 8163, 8449, 8702, 8985, 9256, 9529, 9784]),
+])
+def test_peak_detector_array(file, expected):
+    """
+
+    Args:
+        file: file name
+        expected: indices of the peaks found by the original
+        sample by sample loop
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv(file, names=headers)
+    filtered = Hilbert(data, 0.005)
+    indices, times, values = peak_detector_array(
+        filtered, data['time'].values, data['voltage'].values)
+    assert expected == list(indices)
+    assert list(data['time'][expected]) == list(times)
+    assert expected == list(peak_detector(filtered, data)['index'])
+
+
 @pytest.mark.parametrize("file, expected, sign", [
     ('sine.csv', 2, 1),
     ('sine.csv', 2, -1),
@@ -322,6 +436,38 @@ def test_threshold_peak_detect(file, expected, sign):
     assert expected == out
 
 
+@pytest.mark.parametrize("file, expected", [
+    ('sine.csv', ([17, 143], [80, 206])),
+    ('test_data22.csv',
+     ([64, 333, 881, 1142, 1404, 1668, 1931, 2193, 2469, 2735, 2998, 3263,
+       3538, 3802, 4062, 4343, 4612, 4877, 5149, 5426, 5692, 5963, 6240,
+       6505, 6774, 7046, 7324, 7596, 7878, 8152, 8427, 8700, 8974, 9244,
+       9782],
+      [589, 593, 616])),
+])
+def test_threshold_peak_detect_array(file, expected):
+    """
+
+    Args:
+        file: file name
+        expected: indices of the peaks found by the original
+        sample by sample loop with the positive and negative
+        thresholds
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv(file, names=headers)
+    max_min = (data['voltage'].max(), data['voltage'].min())
+    pos, neg = threshold_peak_detect_array(data['voltage'], max_min)
+    assert expected == (list(pos[0]), list(neg[0]))
+    assert list(data['voltage'][expected[0]]) == list(pos[1])
+    found_pos = threshold_peak_detect(data, max_min, 1)
+    found_neg = threshold_peak_detect(data, max_min, 0)
+    assert expected == (list(found_pos['index']), list(found_neg['index']))
+
+
 @pytest.mark.parametrize("file, index, method, expected, user_interval", [
     ('sine.csv', [32, 156], 1, True, [0, -1]),
     ('sine.csv', [32, 156], 0, True, [0, -1]),
@@ -381,3 +527,31 @@ def test_check_loop(filter_value, file, space, print_plot,
     found2 = check_loop(found, data, filter_value, file,
                         space, print_plot, max_min)
     assert expected == len(found2['index'])
+
+
+@pytest.mark.parametrize("file, workers, expected", [
+    ('test_data22.csv', None, (0.009, 2, 37)),
+    ('test_data22.csv', 2, (0.009, 2, 37)),
+    ('sine.csv', None, (0.005, 0, 1)),
+])
+def test_search_cutoff(file, workers, expected):
+    """
+
+    Args:
+        file: file name
+        workers: number of threads used to try cutoffs
+        expected: chosen cutoff, number of retries, and number of peaks
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv(file, names=headers)
+    data = edge_case(data, 150, np.mean(data['voltage']))
+    amplitude_envelope = envelope(data['voltage'])
+    filtered = low_pass(amplitude_envelope, 0.005)
+    assert list(filtered) == list(Hilbert(data, 0.005))
+    found = peak_detector(filtered, data)
+    found, cutoff, iterations = search_cutoff(found, data, 0.005, 1,
+                                              amplitude_envelope, workers)
+    assert expected == (round(cutoff, 4), iterations, len(found['index']))
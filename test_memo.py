@@ -0,0 +1,87 @@
+import pytest
+import os
+import shutil
+from memo import fingerprint
+from memo import is_current
+from memo import record
+from memo import load_manifest
+from memo import save_manifest
+
+
+@pytest.mark.parametrize("params, other, expected", [
+    ({'space': 1}, {'space': 1}, True),
+    ({'space': 1}, {'space': 2}, False),
+    ({'space': 1, 'filter_value': 0.005},
+     {'filter_value': 0.005, 'space': 1}, True),
+])
+def test_fingerprint(params, other, expected):
+    """
+
+    Args:
+        params: detector parameters
+        other: second set of detector parameters
+        expected: True if both fingerprints match
+
+    Returns: Pass or Fail
+
+    """
+    same = fingerprint('sine.csv', params) == fingerprint('sine.csv', other)
+    assert expected == same
+    assert fingerprint('sine.csv', params) != \
+        fingerprint('sine_with_words.csv', params)
+
+
+def test_is_current(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the csv, json and manifest
+
+    Returns: Pass or Fail
+
+    """
+    file = os.path.join(str(tmpdir), 'sine.csv')
+    shutil.copy('sine.csv', file)
+    params = {'space': 1}
+    manifest = load_manifest(str(tmpdir))
+    assert not is_current(file, params, manifest)
+    record(file, params, manifest)
+    assert not is_current(file, params, manifest)
+    with open(os.path.join(str(tmpdir), 'sine.json'), 'w') as outfile:
+        outfile.write('{}')
+    assert is_current(file, params, manifest)
+    assert not is_current(file, {'space': 2}, manifest)
+    save_manifest(str(tmpdir), manifest)
+    manifest = load_manifest(str(tmpdir))
+    os.utime(file, (0, 0))
+    assert is_current(file, params, manifest)
+    with open(file, 'a') as outfile:
+        outfile.write('12,0\r')
+    assert not is_current(file, params, manifest)
+
+
+def test_is_current_output_file(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the csv and manifest
+
+    Returns: Pass or Fail
+
+    """
+    file = os.path.join(str(tmpdir), 'sine.csv')
+    shutil.copy('sine.csv', file)
+    ndjson = os.path.join(str(tmpdir), 'metrics.ndjson')
+    params = {'space': 1}
+    manifest = record(file, params, dict(), output_file=ndjson)
+    assert is_current(file, params, manifest, output_file=ndjson,
+                      written={file: {}})
+    assert not is_current(file, params, manifest, output_file=ndjson,
+                          written=dict())
+    assert not is_current(file, params, manifest, output_file=ndjson)
+    with open(os.path.join(str(tmpdir), 'sine.json'), 'w') as outfile:
+        outfile.write('{}')
+    assert not is_current(file, params, manifest)
+    record(file, params, manifest)
+    assert not is_current(file, params, manifest, output_file=ndjson,
+                          written={file: {}})
@@ -0,0 +1,147 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pytest import approx
+from benchmark import synthetic_ecg
+import main
+from multi import as_batch
+from multi import durations
+from multi import extremes
+from multi import pad_batch
+from multi import envelopes
+from multi import detect_batch
+from multi import split
+
+
+@pytest.mark.parametrize("times, voltages, expected", [
+    ([0, 1, 2], [[1, 2, 3], [4, 5, 6]], (2, 3)),
+    ([[0, 1, 2]], [1, 2, 3], (1, 3)),
+])
+def test_as_batch(times, voltages, expected):
+    """
+
+    Args:
+        times: shared or per recording times
+        voltages: one or many recordings
+        expected: shape of both returned arrays
+
+    Returns: Pass or Fail
+
+    """
+    times, voltages = as_batch(times, voltages)
+    assert expected == times.shape == voltages.shape
+
+
+@pytest.mark.parametrize("times, voltages, expected", [
+    ([[0, 1, 2, 4], [0, 2, 4, 6]], [[1, -2, 3, 0], [5, 5, 5, 5]],
+     ([3, 4], [[3, -2], [5, 5]])),
+])
+def test_extremes_durations(times, voltages, expected):
+    """
+
+    Args:
+        times: times of each recording
+        voltages: voltages of each recording
+        expected: durations and (max, min) of each recording
+
+    Returns: Pass or Fail
+
+    """
+    assert expected[0] == approx(list(durations(np.array(times))))
+    assert expected[1] == extremes(np.array(voltages)).tolist()
+
+
+@pytest.mark.parametrize("n, amount", [
+    (100, 10),
+    (500, 150),
+])
+def test_pad_batch(n, amount):
+    """
+
+    Args:
+        n: number of samples per recording
+        amount: number of points used to buffer each side
+
+    Returns: Pass or Fail
+
+    """
+    times, voltages = as_batch(np.arange(n) * 0.01,
+                               np.random.RandomState(0).rand(3, n))
+    levels = voltages.mean(axis=1)
+    padded_time, padded_voltage = pad_batch(times, voltages, amount, levels)
+    for row in range(3):
+        expected = main.edge_case_array(times[row], voltages[row], amount,
+                                        levels[row])
+        assert np.array_equal(expected[0], padded_time[row])
+        assert np.array_equal(expected[1], padded_voltage[row])
+
+
+@pytest.mark.parametrize("cutoff", [
+    0.005,
+    0.05,
+])
+def test_envelopes(cutoff):
+    """
+
+    Args:
+        cutoff: cutoff frequency for butterworth filter
+
+    Returns: Pass or Fail
+
+    """
+    voltages = np.random.RandomState(1).rand(4, 1000)
+    filtered = envelopes(voltages, cutoff)
+    for row in range(4):
+        expected = main.low_pass(main.envelope(voltages[row]), cutoff)
+        assert expected == approx(filtered[row])
+
+
+@pytest.mark.parametrize("bpms", [
+    [60, 72, 90],
+    [72],
+])
+def test_detect_batch(bpms):
+    """
+
+    Args:
+        bpms: heart rate of each synthetic recording
+
+    Returns: Pass or Fail
+
+    """
+    rows = [synthetic_ecg(5000, bpm=bpm, seed=i)
+            for i, bpm in enumerate(bpms)]
+    voltages = np.vstack([row['voltage'].values for row in rows])
+    offsets, indices, beat_times, extreme, dur = detect_batch(
+        rows[0]['time'].values, voltages)
+    assert len(bpms) + 1 == len(offsets)
+    for row, data in enumerate(rows):
+        avg_v = np.sum(data['voltage'].values) / len(data['voltage'])
+        padded = main.edge_case(data, 150, avg_v)
+        found = main.peak_detector(main.Hilbert(padded, 0.005), padded)
+        assert list(found['time']) == list(split(offsets, beat_times)[row])
+        assert list(found['index'] - 150) == \
+            list(split(offsets, indices)[row])
+        assert main.calc_v_extreme(data) == approx(tuple(extreme[row]))
+        assert main.calc_duration(data) == approx(dur[row])
+
+
+@pytest.mark.parametrize("file", [
+    'data/test_data10.csv',
+    'test_data22.csv',
+])
+def test_detect_batch_analyze_file(file):
+    """
+
+    Args:
+        file: name of csv file
+
+    Returns: Pass or Fail
+
+    """
+    data = main.is_data_valid(pd.read_csv(file, names=['time', 'voltage']))
+    offsets, indices, beat_times, extreme, dur = detect_batch(
+        data['time'].values, np.vstack([data['voltage'].values] * 2))
+    metrics = main.analyze_file(file, (2, 3))
+    for row in split(offsets, beat_times):
+        assert metrics['beats'] == list(row)
@@ -0,0 +1,160 @@
+import pytest
+import os
+import gzip
+import json
+import shutil
+import numpy as np
+from output import json_name
+from output import encode
+from output import MetricsWriter
+from output import read_ndjson
+from main import write_json
+from batch import run_batch
+from pipeline import run_async_batch
+
+METRICS = {'voltage_extremes': (np.float64(1.05), np.float64(-0.68)),
+           'duration': np.float64(27.775), 'num_beats': 3,
+           'mean_hr_bpm': 72.0, 'beats': [0.214, 1.028, 1.842]}
+
+
+@pytest.mark.parametrize("file, directory, expected", [
+    ('data/test_data1.csv', None, 'data/test_data1.json'),
+    ('data/run.2.ecg.csv', None, 'data/run.2.ecg.json'),
+    ('./sine.csv', None, './sine.json'),
+    ('data/test_data1.csv', 'out', os.path.join('out', 'test_data1.json')),
+])
+def test_json_name(file, directory, expected):
+    """
+
+    Args:
+        file: name of csv file
+        directory: folder for the json file, or None
+        expected: name of the json file
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == json_name(file, directory)
+
+
+@pytest.mark.parametrize("metrics, file", [
+    (METRICS, None),
+    (METRICS, 'data/test_data1.csv'),
+    (dict(METRICS, beats=np.array([0.25, 1.5])), None),
+    (dict(METRICS, num_beats=np.int64(3), hrv={'sdnn': 0.01}), None),
+    (dict(METRICS, beats=[1.0, float('nan')]), None),
+])
+def test_encode(metrics, file):
+    """
+
+    Args:
+        metrics: dictionary of metrics
+        file: name of csv file to store, or None
+
+    Returns: Pass or Fail
+
+    """
+    expected = json.loads(json.dumps(metrics, default=lambda x: x.tolist()))
+    loaded = json.loads(encode(metrics, file))
+    if file is not None:
+        assert file == loaded.pop('file')
+    assert expected == loaded
+    assert '\n' not in encode(metrics, file)
+    if file is not None:
+        assert encode(metrics, file).startswith('{"file": ')
+
+
+@pytest.mark.parametrize("name, buffer_size", [
+    ('metrics.ndjson', 1 << 20),
+    ('metrics.ndjson', 1),
+    ('metrics.ndjson.gz', 1 << 20),
+])
+def test_metrics_writer_ndjson(tmpdir, name, buffer_size):
+    """
+
+    Args:
+        tmpdir: temporary folder for the output
+        name: name of the consolidated file
+        buffer_size: bytes held before writing
+
+    Returns: Pass or Fail
+
+    """
+    path = os.path.join(str(tmpdir), name)
+    files = ['a.csv', 'b.2.csv', 'c.csv']
+    with MetricsWriter(path, buffer_size=buffer_size) as writer:
+        for file in files:
+            writer.write(file, METRICS)
+    assert 3 == writer.count
+    results = read_ndjson(path)
+    assert files == list(results)
+    assert [0.214, 1.028, 1.842] == results['b.2.csv']['beats']
+    if name.endswith('.gz'):
+        with gzip.open(path, 'rt') as infile:
+            assert 3 == len(infile.readlines())
+    with pytest.raises(ValueError):
+        writer.write('d.csv', METRICS)
+
+
+def test_metrics_writer_json(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the output
+
+    Returns: Pass or Fail
+
+    """
+    directory = os.path.join(str(tmpdir), 'out')
+    with MetricsWriter(directory=directory) as writer:
+        writer.write('data/run.2.csv', METRICS)
+    with open(os.path.join(directory, 'run.2.json')) as infile:
+        assert 3 == json.load(infile)['num_beats']
+
+
+def test_write_json_dotted(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the output
+
+    Returns: Pass or Fail
+
+    """
+    file = os.path.join(str(tmpdir), 'run.2.csv')
+    write_json(file, METRICS)
+    with open(os.path.join(str(tmpdir), 'run.2.json')) as infile:
+        assert [0.214, 1.028, 1.842] == json.load(infile)['beats']
+
+
+@pytest.mark.parametrize("name", [
+    'metrics.ndjson',
+    'metrics.ndjson.gz',
+])
+def test_batch_output_file(tmpdir, name):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+        name: name of the consolidated file
+
+    Returns: Pass or Fail
+
+    """
+    for file in ['test_data22.csv', 'sine.csv']:
+        shutil.copy(file, str(tmpdir))
+    path = os.path.join(str(tmpdir), name)
+    results, errors = run_batch(str(tmpdir), 1, excel_file_name=None,
+                                output_file=path)
+    written = read_ndjson(path)
+    assert sorted(results) == list(written)
+    for file in results:
+        assert results[file]['beats'] == written[file]['beats']
+        assert list(results[file]['voltage_extremes']) == \
+            written[file]['voltage_extremes']
+    for file in results:
+        assert not os.path.isfile(os.path.splitext(file)[0] + '.json')
+    other = os.path.join(str(tmpdir), 'async_' + name)
+    results, errors = run_async_batch(str(tmpdir), 1, excel_file_name=None,
+                                      output_file=other)
+    assert sorted(results) == sorted(read_ndjson(other))
@@ -0,0 +1,111 @@
+import pytest
+import os
+import shutil
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from openpyxl import load_workbook
+import pipeline
+from batch import list_csv
+from batch import run_batch
+from pipeline import read_file
+from pipeline import run_pipeline
+from pipeline import run_async_batch
+
+
+@pytest.mark.parametrize("file, expected", [
+    ('sine.csv', 2),
+    ('sine_with_words.csv', 2),
+])
+def test_read_file(file, expected):
+    """
+
+    Args:
+        file: name of csv file
+        expected: number of columns read
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == len(read_file(file).columns)
+
+
+@pytest.mark.parametrize("workers, prefetch", [
+    (2, 1),
+    (1, 4),
+])
+def test_run_async_batch(tmpdir, workers, prefetch):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+        workers: number of files analysed at once
+        prefetch: number of files read ahead
+
+    Returns: Pass or Fail
+
+    """
+    for file in ['test_data22.csv', 'sine_with_words.csv', 'sine.csv']:
+        shutil.copy(file, str(tmpdir))
+    with open(os.path.join(str(tmpdir), 'empty_data1.csv'), 'w'):
+        pass
+    shutil.copy('test_write_excel.xlsx',
+                os.path.join(str(tmpdir), 'Beat_Tracking.xlsx'))
+    expected, expected_errors = run_batch(str(tmpdir), 1, (2, 3), 1, None)
+    results, errors = run_async_batch(str(tmpdir), workers, (2, 3), 1,
+                                      io_workers=2, prefetch=prefetch)
+    assert expected == results
+    assert sorted(expected_errors) == sorted(errors)
+    for file in results:
+        assert os.path.isfile(os.path.splitext(file)[0] + '.json')
+    wb = load_workbook(os.path.join(str(tmpdir), 'Beat_Tracking.xlsx'))
+    assert '37' == wb.active['C23'].value
+
+
+def test_run_pipeline_thread_pool(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+
+    Returns: Pass or Fail
+
+    """
+    shutil.copy('test_data22.csv', str(tmpdir))
+    loop = asyncio.new_event_loop()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        results, errors = loop.run_until_complete(run_pipeline(
+            list_csv(str(tmpdir)), workers=1, cpu_pool=pool))
+    loop.close()
+    assert 37 == results[list_csv(str(tmpdir))[0]]['num_beats']
+
+
+def test_run_pipeline_write_error(tmpdir, monkeypatch):
+    """
+
+    Args:
+        tmpdir: temporary folder to run the batch in
+        monkeypatch: replaces the json writer with one that fails once
+
+    Returns: Pass or Fail
+
+    """
+    for file in ['test_data22.csv', 'sine.csv']:
+        shutil.copy(file, str(tmpdir))
+    files = list_csv(str(tmpdir))
+    write_json = pipeline.write_json
+
+    def write(file, metrics):
+        if file == files[0]:
+            raise OSError('disk full')
+        write_json(file, metrics)
+
+    monkeypatch.setattr(pipeline, 'write_json', write)
+    loop = asyncio.new_event_loop()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        results, errors = loop.run_until_complete(run_pipeline(
+            files, workers=1, cpu_pool=pool))
+    loop.close()
+    assert [files[0]] == list(errors)
+    assert 'OSError: disk full' == errors[files[0]]
+    assert [files[1]] == list(results)
+    assert os.path.isfile(os.path.splitext(files[1])[0] + '.json')
@@ -0,0 +1,128 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pytest import approx
+from realtime import RealtimeDetector
+from filters import sample_rate
+from main import analyze_file
+
+
+@pytest.mark.parametrize("file, block", [
+    ('test_data22.csv', 1),
+    ('test_data22.csv', 64),
+    ('test_data22.csv', 10000),
+    ('data/test_data1.csv', 64),
+    ('data/test_data7.csv', 64),
+])
+def test_update(file, block):
+    """
+
+    Args:
+        file: file name
+        block: number of samples pushed at a time
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv(file, names=headers)
+    detector = RealtimeDetector(sample_rate(data['time']))
+    found = list()
+    for start in range(0, len(data), block):
+        stop = start + block
+        found += detector.update(data['time'].values[start:stop],
+                                 data['voltage'].values[start:stop])
+    indices = [beat[0] for beat in found]
+    assert indices == sorted(set(indices))
+    assert found[0][2] is None
+    assert found[-1][2] == approx(detector.bpm())
+    # Each beat follows a beat of the whole recording by the filter delay
+    beats = np.array(analyze_file(file, (2, 3))['beats'])
+    matched = list()
+    for index, time, bpm in found:
+        assert index >= detector.warmup
+        nearest = np.argmin(np.abs(beats - (time - detector.delay)))
+        assert abs(beats[nearest] - (time - detector.delay)) < 0.3
+        matched.append(nearest)
+    assert len(matched) == len(set(matched))
+    assert len(found) >= 0.8 * np.sum(beats >= 2.0)
+
+
+@pytest.mark.parametrize("missing", [
+    [3000],
+    [0],
+    list(range(0, 600)),
+])
+def test_update_missing(missing):
+    """
+
+    Args:
+        missing: samples whose voltage is dropped
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv('data/test_data1.csv', names=headers)
+    voltage = data['voltage'].values.copy()
+    voltage[missing] = np.nan
+    clean = RealtimeDetector(sample_rate(data['time']))
+    detector = RealtimeDetector(sample_rate(data['time']))
+    expected = list()
+    found = list()
+    for start in range(0, len(data), 50):
+        stop = start + 50
+        expected += clean.update(data['time'].values[start:stop],
+                                 data['voltage'].values[start:stop])
+        found += detector.update(data['time'].values[start:stop],
+                                 voltage[start:stop])
+    assert not np.isnan(detector.zi).any()
+    # Beats carry on after the gap, at most a few samples off once the
+    # filter has caught up with the clean run
+    after = np.array([beat[0] for beat in expected
+                      if beat[0] > max(missing) + 500])
+    resumed = np.array([beat[0] for beat in found
+                        if beat[0] > max(missing) + 500])
+    assert len(after) > 20
+    assert len(after) == len(resumed)
+    assert np.abs(after - resumed).max() <= 10
+
+
+@pytest.mark.parametrize("cutoff, hz", [
+    (0.005, False),
+    (0.625, True),
+])
+def test_cutoff_hz(cutoff, hz):
+    """
+
+    Args:
+        cutoff: cutoff frequency for butterworth filter
+        hz: True if cutoff is in Hz
+
+    Returns: Pass or Fail
+
+    """
+    detector = RealtimeDetector(250, cutoff, hz=hz)
+    reference = RealtimeDetector(250)
+    assert detector.sos == approx(reference.sos)
+
+
+@pytest.mark.parametrize("times, expected", [
+    ([0.0], None),
+    ([0.0, 1.0, 2.0], 60),
+    ([0.0, 0.5, 1.0, 1.5], 120),
+    ([0.0, 10.0, 11.0, 12.0], 60),
+])
+def test_bpm(times, expected):
+    """
+
+    Args:
+        times: times of detected beats
+        expected: rolling mean bpm
+
+    Returns: Pass or Fail
+
+    """
+    detector = RealtimeDetector(250, window=2)
+    detector.beats.extend(times)
+    assert expected == detector.bpm()
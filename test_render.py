@@ -0,0 +1,98 @@
+import pytest
+import os
+import numpy as np
+import pandas as pd
+from render import decimate_minmax
+from render import render_plot
+from render import PlotRenderer
+from main import plot_data
+
+
+@pytest.mark.parametrize("n, buckets, expected", [
+    (100, 80, 100),
+    (100000, 500, 1000),
+    (100003, 500, 1202),
+])
+def test_decimate_minmax(n, buckets, expected):
+    """
+
+    Args:
+        n: number of points in the trace
+        buckets: number of buckets to decimate into
+        expected: largest number of points that may be kept
+
+    Returns: Pass or Fail
+
+    """
+    x = np.arange(n) / 100.0
+    y = np.sin(x) + np.where(np.arange(n) == n // 3, 5.0, 0.0)
+    y[7] = np.nan
+    x_out, y_out = decimate_minmax(x, y, buckets)
+    assert expected >= len(x_out)
+    assert np.all(np.diff(x_out) > 0)
+    assert np.nanmax(y) == np.nanmax(y_out)
+    assert np.nanmin(y) == np.nanmin(y_out)
+
+
+@pytest.mark.parametrize("extension", ['.png', '.svg'])
+def test_render_plot(tmpdir, extension):
+    """
+
+    Args:
+        tmpdir: temporary folder for the image
+        extension: image format to write
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv('sine.csv', names=headers)
+    output = os.path.join(str(tmpdir), 'sine' + extension)
+    trace = (data['time'], data['voltage'])
+    peaks = (data['time'][[32, 156]], data['voltage'][[32, 156]])
+    assert output == render_plot(trace, trace, peaks, 'sine.csv', output,
+                                 (2, 3))
+    assert os.path.getsize(output) > 0
+
+
+@pytest.mark.parametrize("method", [0, 1])
+def test_plot_renderer(tmpdir, method):
+    """
+
+    Args:
+        tmpdir: temporary folder for the images
+        method: which type of peak detection method used
+
+    Returns: Pass or Fail
+
+    """
+    headers = ['time', 'voltage']
+    data = pd.read_csv('test_data22.csv', names=headers)
+    outputs = [os.path.join(str(tmpdir), str(x) + '.png') for x in range(3)]
+    with PlotRenderer(2) as renderer:
+        for output in outputs:
+            plot_data(data, data['voltage'], [10, 500], 'test_data22.csv',
+                      method, (2, 3), output, renderer)
+    for output in outputs:
+        assert os.path.getsize(output) > 0
+
+
+def test_plot_renderer_errors(tmpdir):
+    """
+
+    Args:
+        tmpdir: temporary folder for the images
+
+    Returns: Pass or Fail
+
+    """
+    trace = (np.arange(100.0), np.sin(np.arange(100.0)))
+    peaks = ([10.0], [1.0])
+    good = os.path.join(str(tmpdir), 'good.png')
+    bad = os.path.join(str(tmpdir), 'missing', 'bad.png')
+    renderer = PlotRenderer()
+    renderer.submit(trace, None, peaks, 'bad.csv', bad)
+    renderer.submit(trace, None, peaks, 'good.csv', good)
+    assert [None, good] == renderer.close()
+    assert ['bad.csv'] == list(renderer.errors)
+    assert os.path.getsize(good) > 0
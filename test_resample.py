@@ -0,0 +1,211 @@
+import pytest
+import numpy as np
+from pytest import approx
+from resample import resolution
+from resample import inspect
+from resample import rational
+from resample import regularize
+from resample import resample
+from resample import ingest
+from benchmark import synthetic_ecg
+from main import analyze_file
+from main import scale_samples
+
+
+@pytest.mark.parametrize("time, expected", [
+    ([0, 0.002, 0.003, 0.006, np.nan], 1e-3),
+    ([10, 12.5, 15], 0.1),
+    ([1, 2, 3], 1.0),
+    (np.arange(100) / 360.0, 0.0),
+])
+def test_resolution(time, expected):
+    """
+
+    Args:
+        time: time array
+        expected: step the times are rounded to
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == approx(resolution(time))
+
+
+@pytest.mark.parametrize("time, expected", [
+    (np.arange(1000) / 250.0, (250.0, 0, True)),
+    (np.delete(np.arange(1000) / 250.0, np.arange(100, 110)),
+     (250.0, 1, False)),
+    (np.round(np.arange(10000) / 360.0, 3), (360.0, 0, True)),
+    (np.arange(10000) / 360.0 +
+     np.random.RandomState(0).uniform(0, 1e-3, 10000), (360.0, 0, False)),
+])
+def test_inspect(time, expected):
+    """
+
+    Args:
+        time: time array
+        expected: sample rate, number of gaps and whether the
+        recording is evenly spaced
+
+    Returns: Pass or Fail
+
+    """
+    report = inspect(time)
+    assert expected[0] == approx(report['fs'], rel=1e-2)
+    assert expected[1:] == (report['gaps'], report['uniform'])
+
+
+@pytest.mark.parametrize("ratio, expected", [
+    (0.25, (1, 4)),
+    (250 / 360.0, (25, 36)),
+    (1 / 3.0, (1, 3)),
+])
+def test_rational(ratio, expected):
+    """
+
+    Args:
+        ratio: new over old sample rate
+        expected: up and down factors
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == rational(ratio)
+
+
+def test_regularize():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    time = np.array([0, 0.1, 0.2, 0.5, np.nan, 0.6])
+    voltage = time * 2
+    grid, values = regularize(time, voltage, 10.0)
+    assert [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6] == approx(list(grid))
+    assert list(grid * 2) == approx(list(values))
+
+
+@pytest.mark.parametrize("fs, target_fs", [
+    (1000.0, 250.0),
+    (360.0, 250.0),
+    (125.0, 250.0),
+])
+def test_resample(fs, target_fs):
+    """
+
+    Args:
+        fs: sample rate of a synthetic recording
+        target_fs: sample rate to resample to
+
+    Returns: Pass or Fail
+
+    """
+    data = synthetic_ecg(int(20 * fs), fs)
+    time, voltage, new_fs = resample(data['time'], data['voltage'],
+                                     target_fs)
+    assert target_fs == approx(new_fs)
+    assert int(20 * target_fs) == len(voltage) == len(time)
+    assert np.max(voltage) > 1
+
+
+@pytest.mark.parametrize("target_fs, max_fs, expected", [
+    (None, None, (None, 5000)),
+    (None, 500.0, (None, 5000)),
+    (None, 200.0, (200.0, 4000)),
+    (500.0, None, (500.0, 10000)),
+])
+def test_ingest(target_fs, max_fs, expected):
+    """
+
+    Args:
+        target_fs: canonical sample rate
+        max_fs: highest sample rate kept
+        expected: sample rate resampled to and number of samples
+
+    Returns: Pass or Fail
+
+    """
+    data = synthetic_ecg(5000)
+    out, report = ingest(data, target_fs, max_fs)
+    assert expected == (report['resampled_fs'], len(out))
+    if expected[0] is None:
+        assert out is data
+
+
+def test_ingest_gaps():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    data = synthetic_ecg(5000).drop(range(1000, 1100))
+    out, report = ingest(data, 250.0)
+    assert 1 == report['gaps']
+    assert 250.0 == report['resampled_fs']
+    assert np.allclose(np.diff(out['time']), 1 / 250.0)
+
+
+@pytest.mark.parametrize("detector, max_fs", [
+    ('pan_tompkins', 125.0),
+    ('hilbert', 250.0),
+])
+def test_analyze_file_max_fs(detector, max_fs):
+    """
+
+    Args:
+        detector: name of the detector
+        max_fs: highest sample rate kept
+
+    Returns: Pass or Fail
+
+    """
+    metrics = analyze_file('test_data22.csv', (2, 3), detector=detector,
+                           max_fs=max_fs)
+    assert 37 == metrics['num_beats']
+
+
+@pytest.mark.parametrize("samples, fs, source_fs, expected", [
+    (5, None, None, 5),
+    (5, 250.0, 1000.0, 1),
+    (5, 125.0, 360.0, 2),
+    (150, 1000.0, 250.0, 600),
+])
+def test_scale_samples(samples, fs, source_fs, expected):
+    """
+
+    Args:
+        samples: number of samples at the recording's own rate
+        fs: sample rate resampled to
+        source_fs: sample rate of the recording
+        expected: number of samples at fs
+
+    Returns: Pass or Fail
+
+    """
+    assert expected == scale_samples(samples, fs, source_fs)
+
+
+@pytest.mark.parametrize("file, target_fs, max_fs", [
+    ('data/test_data12.csv', None, 250.0),
+    ('data/test_data12.csv', 1000.0, None),
+    ('test_data22.csv', None, 125.0),
+    ('test_data22.csv', 1000.0, None),
+    ('test_data1.csv', None, 125.0),
+])
+def test_analyze_file_resampled(file, target_fs, max_fs):
+    """ Downsampled and upsampled recordings keep their beat count
+
+    Args:
+        file: name of csv file
+        target_fs: canonical sample rate
+        max_fs: highest sample rate kept
+
+    Returns: Pass or Fail
+
+    """
+    native = analyze_file(file, (2, 3))
+    metrics = analyze_file(file, (2, 3), target_fs=target_fs,
+                           max_fs=max_fs)
+    assert native['num_beats'] == metrics['num_beats']
+    assert native['beats'] == approx(metrics['beats'], abs=0.01)
@@ -0,0 +1,86 @@
+import pytest
+import json
+import numpy as np
+import pandas as pd
+from results import BeatResult
+from main import create_metrics
+from main import found_frame
+
+
+@pytest.mark.parametrize("index, time, voltage", [
+    ([3, 10, 25], [0.1, 0.4, 0.9], [1.1, 1.2, 0.9]),
+    ([], [], []),
+])
+def test_beat_result(index, time, voltage):
+    """
+
+    Args:
+        index: locations of found peaks
+        time: times of found peaks
+        voltage: voltages of found peaks
+
+    Returns: Pass or Fail
+
+    """
+    result = found_frame(np.array(index), np.array(time), np.array(voltage))
+    assert len(index) == len(result)
+    assert (len(index) == 0) == result.empty
+    assert np.int64 == result['index'].dtype
+    assert result['time'].flags['C_CONTIGUOUS']
+    assert list(time) == list(result['time'])
+    with pytest.raises(KeyError):
+        result['bpm']
+    with pytest.raises(AttributeError):
+        result.other = 1
+    frame = result.to_frame()
+    assert list(index) == list(frame['index'])
+    assert list(time) == list(BeatResult.from_frame(frame)['time'])
+
+
+@pytest.mark.parametrize("extremes, duration, bpm", [
+    ((1.5, -0.5), 10.0, 72.0),
+    (None, None, None),
+])
+def test_bytes(extremes, duration, bpm):
+    """
+
+    Args:
+        extremes: maximum and minimum voltage
+        duration: duration of the recording
+        bpm: average heart rate
+
+    Returns: Pass or Fail
+
+    """
+    result = BeatResult([1, 5], [0.5, 1.5], [1.0, 2.0], extremes,
+                        duration, bpm)
+    record = result.to_bytes()
+    out = BeatResult.from_bytes(record)
+    assert [1, 5] == list(out['index'])
+    assert [0.5, 1.5] == list(out['time'])
+    assert [1.0, 2.0] == list(out['voltage'])
+    assert (extremes, duration, bpm) == (out.extremes, out.duration,
+                                         out.bpm)
+    with pytest.raises(ValueError):
+        BeatResult.from_bytes(b'JUNK' + record[4:])
+
+
+def test_create_metrics_compatible():
+    """
+
+    Returns: Pass or Fail
+
+    """
+    frame = pd.DataFrame({'index': [1, 5], 'time': [0.5, 1.5],
+                          'voltage': [1.0, 2.0]})
+    result = BeatResult.from_frame(frame)
+    from_frame = create_metrics(frame, (2.0, 1.0), 3.0, 40.0, True)
+    from_result = create_metrics(result, (2.0, 1.0), 3.0, 40.0, True)
+    assert from_frame == from_result
+    assert ['voltage_extremes', 'duration', 'num_beats', 'mean_hr_bpm',
+            'beats', 'hrv'] == list(from_result)
+    assert result.bpm is None and result.extremes is None
+    text = BeatResult(result.index, result.time, result.voltage,
+                      (2.0, 1.0), 3.0, 40.0).to_json()
+    assert [2.0, 1.0] == json.loads(text)['voltage_extremes']
+    assert [0.5, 1.5] == json.loads(text)['beats']
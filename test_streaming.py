@@ -0,0 +1,139 @@
+import pytest
+import numpy as np
+import pandas as pd
+from main import validate_columns
+from main import edge_case_array
+from main import envelope
+from main import low_pass
+from main import peak_detector_array
+from streaming import stream_peaks
+from streaming import scan_levels
+from streaming import new_state
+from streaming import owned_peaks
+from streaming import update_histogram
+from streaming import mode
+
+
+def whole_peaks(file, amount=150, cutoff=0.005):
+    """ Peaks peak_detector_array finds on the whole padded recording
+
+    Args:
+        file: file name
+        amount: number of points used to pad either end
+        cutoff: cutoff frequency for butterworth filter
+
+    Returns:
+        indices: list of peak locations in the unpadded recording
+        times: list of peak times
+    """
+    data = pd.read_csv(file, names=['time', 'voltage'])
+    time, voltage, report = validate_columns(data)
+    baseline, level = scan_levels(file)
+    padded_time, padded_voltage = edge_case_array(time, voltage, amount,
+                                                  level)
+    filtered = low_pass(envelope(padded_voltage), cutoff)
+    indices, times, values = peak_detector_array(filtered, padded_time,
+                                                 padded_voltage, baseline)
+    return (indices - amount).tolist(), times.tolist()
+
+
+@pytest.mark.parametrize("file, chunk_size", [
+    ('test_data22.csv', 700),
+    ('test_data22.csv', 1500),
+    ('test_data22.csv', 3000),
+    ('test_data22.csv', 100000),
+    ('data/test_data12.csv', 2500),
+    ('data/test_data30.csv', 4000),
+])
+def test_stream_peaks(file, chunk_size):
+    """
+
+    Args:
+        file: file name
+        chunk_size: number of rows read at a time
+
+    Returns: Pass or Fail
+
+    """
+    beats = list(stream_peaks(file, chunk_size=chunk_size, overlap=1000))
+    indices, times = whole_peaks(file)
+    assert indices == [beat[0] for beat in beats]
+    assert times == [beat[1] for beat in beats]
+
+
+@pytest.mark.parametrize("file, window, overlap", [
+    ('test_data22.csv', 3000, 2000),
+    ('test_data22.csv', 1000, 500),
+    ('data/test_data1.csv', 2500, 2000),
+    ('data/test_data23.csv', 1000, 8000),
+    ('data/test_data23.csv', 2500, 8000),
+    ('data/test_data30.csv', 1000, 8000),
+    ('data/test_data30.csv', 2500, 8000),
+])
+def test_stream_peaks_windows(file, window, overlap):
+    """
+
+    Args:
+        file: file name
+        window: number of samples searched per window
+        overlap: number of samples of context either side
+
+    Returns: Pass or Fail
+
+    """
+    expected = [beat[0] for beat in stream_peaks(
+        file, chunk_size=100000, overlap=overlap, window=window)]
+    for chunk_size in [300, 1024, 4999]:
+        assert expected == [beat[0] for beat in stream_peaks(
+            file, chunk_size=chunk_size, overlap=overlap, window=window)]
+    assert len(whole_peaks(file)[0]) == len(expected)
+    assert all(np.diff(expected) > 5)
+
+
+@pytest.mark.parametrize("seed, parts", [
+    (0, 2),
+    (1, 7),
+    (2, 40),
+])
+def test_owned_peaks(seed, parts):
+    """
+
+    Args:
+        seed: seed of the random envelope
+        parts: number of parts the envelope is searched in
+
+    Returns: Pass or Fail
+
+    """
+    rng = np.random.RandomState(seed)
+    n = 4000
+    time = np.arange(n) / 100.0 - 1.0
+    filtered = np.convolve(rng.rand(n), np.ones(9) / 9, mode='same')
+    expected = peak_detector_array(filtered, time, filtered, 0.4)[0]
+    edges = np.unique(np.concatenate(
+        ([0, n], rng.randint(0, n, parts - 1))))
+    state = new_state()
+    found = [owned_peaks(filtered, time, lo, hi, 0, 0.4, state)
+             for lo, hi in zip(edges[:-1], edges[1:])]
+    assert expected.tolist() == np.concatenate(found).tolist()
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    ([[0.1, 0.12, 0.5], [0.5, 0.52, 0.9]], 0.5),
+    ([[np.nan, -0.31], [-0.29]], -0.3),
+    ([], 0.0),
+])
+def test_mode(chunks, expected):
+    """
+
+    Args:
+        chunks: voltages read in separate chunks
+        expected: modal voltage over all chunks
+
+    Returns: Pass or Fail
+
+    """
+    counts = dict()
+    for chunk in chunks:
+        update_histogram(counts, np.array(chunk))
+    assert expected == mode(counts)